@@ -1,60 +1,396 @@
-import asyncio, time
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+import asyncio, datetime, email.utils, os, time
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from typing import Optional
-from main import scrape_all
+from main import scrape_all, build_summary, _finish_run
+from registry import registry_for, diff_hashes
+from scraper import metrics, log
+from scraper.archive import suspended as archive_suspended
+from scraper.results import publish, latest_version, load_generation, load_changes, try_lead
+from scraper.state import load_state, save_state
+from scraper.serialize import RowView, MEDIA_TYPES, dumps, negotiate_format, negotiate_encoding
+from scraper.cache import QueryCache, productions_key
+from scraper.broker import Broker, sse_format, company_changes
+from scraper.changes import compose_deltas
+from scraper.search import SearchIndex
+from scraper.calendars import FeedSet
 
 app = FastAPI(title="ShakesFind API", version="0.1.0")
 
-_last_result = {"companies": [], "generated_at": None}
+# Workers serve the last published generation (scraper.results) from boot;
+# its search index and calendar feeds are built in the background and swapped
+# in when ready. One worker wins the leader flock and does all scraping (at
+# startup, every SF_REFRESH_SEC, after registry edits and on /scrape); the
+# rest poll for new versions and forward /scrape requests through state.
+DEFAULT_REGISTRY = os.getenv('SF_API_REGISTRY', 'registry.sample.yaml')
+POLL_SEC = float(os.getenv('SF_RESULTS_POLL_SEC', '5'))
+REFRESH_SEC = float(os.getenv('SF_REFRESH_SEC', '0'))  # leader re-scrape period; 0 = only at startup
+HEARTBEAT_SEC = float(os.getenv('SF_STREAM_HEARTBEAT_SEC', '15'))
+REGISTRY_WATCH = os.getenv('SF_REGISTRY_WATCH', '1') not in ('0', 'false', 'no')  # leader re-scrapes edited companies
+
+_last_result = {"companies": [], "generated_at": None, "version": None}
 _last_duration = None
 _running = False
+_leader_lock = None
+_tasks = set()
+_view = RowView([])  # pre-serialized /productions rows of the current generation
+_qcache = QueryCache()  # encoded responses for _view; replaced together with it
+_broker = Broker()  # /events subscribers
+_index = SearchIndex()  # /search over _view's generation; rebuilt per changed company
+_feeds = FeedSet()  # /feeds/*.ics bodies; re-rendered per changed feed
+_registry_seen = {}  # registry path -> {id: entry hash} the served generation was scraped from
+
+def _derive(gen):
+    """Search index and calendar feeds for a generation, reusing what did not change in the served ones."""
+    return (_index.updated(gen['companies'], gen['version']),
+            _feeds.updated(gen['companies'], gen.get('generated_at'), gen['version']))
+
+async def _prepare(gen):
+    return await asyncio.to_thread(_derive, gen)
+
+def _install(gen, derived=None):
+    global _last_result, _last_duration, _view, _qcache, _index, _feeds
+    # no await in here: requests see either all of the old view/cache/index/feeds or all of the new ones
+    _view, _qcache = RowView(gen['companies']), _qcache.renew(gen['version'])
+    _index, _feeds = derived or _derive(gen)
+    _last_result = {"companies": gen['companies'], "generated_at": gen['generated_at'], "version": gen['version']}
+    _last_duration = gen.get('duration_sec')
+
+async def _derive_later(gen):
+    """Build gen's index and feeds off the request path; swapped in if gen is still the served one."""
+    global _index, _feeds
+    try:
+        derived = await _prepare(gen)
+    except Exception as e:
+        log.error('api.derive_failed', version=gen['version'], error=e)
+        return
+    if _last_result['version'] == gen['version'] and _index.version != gen['version']:
+        _index, _feeds = derived
+
+def _spawn(coro):
+    task = asyncio.create_task(coro)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+def _rows_by_company(companies):
+    return {c['company']['id']: c['events'] for c in companies}
+
+def _publish_delta(company, old_rows, new_rows):
+    delta = company_changes(company, old_rows, new_rows)
+    if delta['added'] or delta['changed'] or delta['removed']:
+        _broker.publish('productions', delta)
 
-async def _do_scrape(registry_path: Optional[str], notion_enabled: bool, force: bool=False):
-    global _last_result, _last_duration, _running
+def _announce(entry, prev_rows):
+    """Stream one company's completion and its row delta against the served generation."""
+    meta = entry.get('meta') or {}
+    _broker.publish('company', {'company': entry['company'], 'events': len(entry['events']),
+                                'stale': meta.get('stale'), 'elapsed_ms': meta.get('elapsed_ms')})
+    _publish_delta(entry['company'], prev_rows.get(entry['company']['id'], []), entry['events'])
+
+def _announce_finished(prev_companies, gen):
+    seen = {c['company']['id'] for c in gen['companies']}
+    for c in prev_companies:
+        if c['company']['id'] not in seen:
+            _publish_delta(c['company'], c['events'], [])  # company dropped from the registry
+    _broker.publish('scrape_finished', {'version': gen['version'], 'generated_at': gen['generated_at'],
+                                        'companies': len(gen['companies']),
+                                        'events': sum(len(c['events']) for c in gen['companies'])})
+
+async def _do_scrape(registry_path: Optional[str], notion_enabled: bool, force: bool=False, probe: bool=False,
+                     changed_only: bool=False):
+    """Scrape and publish a new generation. `changed_only`: just the registry companies added or edited
+    since the served generation (removed ones are dropped), or everything when the served generation
+    is no longer the latest published one; False when there is nothing to do."""
+    global _running
     if _running and not force:
         return False  # already running
-    _running = True
+    _running = True  # claimed before the first await so a concurrent caller backs off
+    try:
+        reg = registry_for(registry_path) if registry_path else None
+        if reg is not None:
+            try:
+                await asyncio.to_thread(reg.refresh)
+            except FileNotFoundError:
+                reg = None  # left for scrape_all to report
+        hashes = dict(reg.hashes) if reg is not None else None
+        only_ids, removed = None, set()
+        if changed_only:
+            seen = _registry_seen.get(reg.path) if reg is not None else None
+            if seen is None or seen == hashes:
+                _running = False
+                return False  # no full scrape to patch yet, or nothing changed
+            d = diff_hashes(seen, hashes)
+            only_ids, removed = d['added'] + d['changed'], set(d['removed'])
+            log.info('api.registry_changed', added=len(d['added']), changed=len(d['changed']), removed=len(removed))
+            latest = await asyncio.to_thread(latest_version)
+            if latest != _last_result['version']:
+                # someone else (main.py --publish) published since: patching ours would revert theirs
+                log.info('api.patch_base_moved', served=_last_result['version'], latest=latest)
+                only_ids, removed = None, set()
+    except BaseException:
+        _running = False
+        raise
     t0 = time.time()
+    prev, prev_version = _last_result['companies'], _last_result['version']
+    prev_rows = _rows_by_company(prev)
+    _broker.publish('scrape_started', {'version': _last_result['version'], 'companies': only_ids})
     try:
-        data = await scrape_all(registry_path=registry_path, notion_enabled=notion_enabled)
-        _last_duration = time.time() - t0
-        _last_result = {"companies": data, "generated_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}
+        data = []
+        if only_ids is None or only_ids:
+            data = await scrape_all(registry_path=registry_path, notion_enabled=notion_enabled, probe=probe,
+                                    only_ids=only_ids, on_company=lambda entry: _announce(entry, prev_rows), finish=False)
+        if only_ids is not None:
+            # patch the served generation: scraped companies replace theirs in place, new ones go last
+            fresh = {c['company']['id']: c for c in data}
+            data = [fresh.pop(c['company']['id'], c) for c in prev if c['company']['id'] not in removed] + list(fresh.values())
+        duration = time.time() - t0
+        generated_at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        summary = build_summary(data, probe=probe)  # this run's timings, not an overlapping one's
+        if metrics.run_timings() is not None:
+            _finish_run()
+        version = await asyncio.to_thread(publish, data, generated_at, duration, summary, previous=(prev_version, prev))
+        gen = {"companies": data, "generated_at": generated_at, "version": version, "duration_sec": duration}
+        _install(gen, await _prepare(gen))
+        _announce_finished(prev, gen)
+        if reg is not None:
+            _registry_seen[reg.path] = hashes
+    except Exception as e:
+        _broker.publish('scrape_failed', {'error': str(e)})
+        raise
     finally:
         _running = False
     return True
 
+async def _follow_once():
+    v = await asyncio.to_thread(latest_version)
+    if v is not None and v != _last_result.get('version'):
+        gen = await asyncio.to_thread(load_generation, v)
+        if gen:
+            prev = _last_result['companies']
+            _install(gen, await _prepare(gen))
+            log.info('api.reload', version=v)
+            if _broker.subscribers:
+                # followers only see whole generations: one delta per company, no progress events
+                prev_rows = _rows_by_company(prev)
+                for entry in gen['companies']:
+                    _publish_delta(entry['company'], prev_rows.get(entry['company']['id'], []), entry['events'])
+                _announce_finished(prev, gen)
+
+async def _lead():
+    handled = (load_state('scrape_request') or {}).get('requested_at')
+    next_refresh = time.monotonic()  # background refresh right after boot
+    while True:
+        if not _running:
+            try:
+                await _follow_once()  # generations published outside this app, e.g. main.py --publish
+            except Exception as e:
+                log.error('api.reload_failed', error=e)
+        req = load_state('scrape_request')
+        try:
+            if req.get('requested_at') and req['requested_at'] != handled:
+                handled = req['requested_at']
+                await _do_scrape(req.get('registry') or DEFAULT_REGISTRY, req.get('notion', False), probe=req.get('probe', False))
+            elif time.monotonic() >= next_refresh:
+                await _do_scrape(DEFAULT_REGISTRY, notion_enabled=False)
+                next_refresh = time.monotonic() + REFRESH_SEC if REFRESH_SEC else float('inf')
+            elif REGISTRY_WATCH:
+                await _do_scrape(DEFAULT_REGISTRY, notion_enabled=False, changed_only=True)
+        except Exception as e:
+            log.error('api.scrape_failed', error=e)
+        await asyncio.sleep(POLL_SEC)
+
+async def _worker_loop():
+    global _leader_lock
+    while True:
+        _leader_lock = _leader_lock or try_lead()
+        if _leader_lock is not None:
+            log.info('api.leader', pid=os.getpid())
+            return await _lead()
+        try:
+            await _follow_once()
+        except Exception as e:
+            log.error('api.reload_failed', error=e)
+        await asyncio.sleep(POLL_SEC)
+
 @app.get('/health')
 async def health():
     return {
         "status": "ok",
         "generated_at": _last_result["generated_at"],
+        "version": _last_result["version"],
         "companies": len(_last_result["companies"]),
+        "leader": _leader_lock is not None,
         "running": _running,
-        "last_duration_sec": _last_duration
+        "last_duration_sec": _last_duration,
+        "timings": metrics.last_run(),
+        "query_cache": _qcache.info(),
+        "stream": _broker.info(),
+        "search": _index.info(),
+        "feeds": _feeds.info(),
+        "registry": registry_for(DEFAULT_REGISTRY).info()
     }
 
 @app.post('/scrape')
 @app.get('/scrape')
-async def trigger_scrape(registry: Optional[str] = None, notion: bool = False, force: bool = False):
-    started = await _do_scrape(registry, notion, force=force)
+async def trigger_scrape(registry: Optional[str] = None, notion: bool = False, force: bool = False, probe: bool = False):
+    if _leader_lock is None:
+        # followers never scrape; hand the request to the leader worker
+        save_state('scrape_request', {'registry': registry, 'notion': notion, 'probe': probe, 'requested_at': time.time()})
+        return {"started": False, "queued": True, "running": _running, "forced": force}
+    started = await _do_scrape(registry, notion, force=force, probe=probe)
     return {"started": started, "running": _running, "forced": force}
 
+@app.get('/events')
+async def stream_events():
+    """SSE: scrape_started, company, productions (added/changed/removed rows), scrape_finished|scrape_failed, resync."""
+    sub = _broker.subscribe()  # the cap is checked before the response starts
+    if sub is None:
+        raise HTTPException(status_code=503, detail='too many stream subscribers')
+    hello = {'version': _last_result['version'], 'generated_at': _last_result['generated_at']}
+
+    async def gen():
+        try:
+            yield b'retry: 3000\n' + sse_format((0, 'hello', hello))
+            while True:
+                try:
+                    item = await asyncio.wait_for(sub.queue.get(), HEARTBEAT_SEC)
+                except asyncio.TimeoutError:
+                    yield b': ping\n\n'
+                    continue
+                yield sse_format(item)
+        finally:
+            _broker.unsubscribe(sub)
+
+    # a client gone before the first chunk never starts gen(): the background task frees the slot
+    return StreamingResponse(gen(), media_type='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+                             background=BackgroundTask(_broker.unsubscribe, sub))
+
+@app.get('/metrics')
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type='text/plain; version=0.0.4')
+
+@app.get('/debug/profile')
+async def debug_profile(company: str, mode: str = 'sample', top: int = 25, format: str = 'json'):
+    """Scrape one company of the served registry under the profiler. Disabled unless SF_DEBUG_ENDPOINTS=1.
+
+    The run leaves no trace: nothing is archived, learned or counted in /metrics.
+    """
+    if os.getenv('SF_DEBUG_ENDPOINTS') != '1':
+        raise HTTPException(status_code=404, detail='Not Found')
+    from scraper.profiling import profile_async, MODES
+    if mode not in MODES:
+        raise HTTPException(status_code=400, detail=f'mode must be one of {MODES}')
+
+    async def run():
+        with archive_suspended(), metrics.muted():
+            return await scrape_all(registry_path=DEFAULT_REGISTRY, notion_enabled=False, only_ids=[company],
+                                    learn=False, finish=False)
+
+    data, report = await profile_async(run, mode=mode, top=top)
+    if not data:
+        raise HTTPException(status_code=404, detail=f'unknown company {company}')
+    if format == 'collapsed':
+        if report.get('collapsed') is None:
+            raise HTTPException(status_code=400, detail='collapsed stacks need mode=sample')
+        return PlainTextResponse(report['collapsed'])
+    return {
+        'company': company,
+        'mode': report['mode'],
+        'wall_ms': report['wall_ms'],
+        'samples': report.get('samples'),
+        'events': sum(len(c['events']) for c in data),
+        'top': report['top'],
+        'collapsed': report.get('collapsed'),
+    }
+
 @app.get('/companies')
 async def list_companies():
     return [c['company'] for c in _last_result['companies']]
 
 @app.get('/productions')
-async def list_productions(play: Optional[str] = None, company: Optional[str] = None):
-    events = []
-    for c in _last_result['companies']:
-        if company and c['company']['id'] != company:
-            continue
-        for e in c['events']:
-            if play and (e.get('canonical_title') or '').lower().replace(' ', '') != play.replace(' ', '').lower():
-                continue
-            events.append({**e, 'company': c['company']})
-    return events
+async def list_productions(request: Request, play: Optional[str] = None, company: Optional[str] = None, format: Optional[str] = None):
+    fmt = negotiate_format(request.headers.get('accept'), format)
+    if fmt is None:
+        raise HTTPException(status_code=406, detail='msgpack is not installed on this server')
+    accept_encoding = negotiate_encoding(request.headers.get('accept-encoding'))
+    key = productions_key(company, play, fmt, accept_encoding)
+    view, cache = _view, _qcache
+    hit = cache.get(key)
+    if hit is None:
+        hit = view.encoded(view.select(key[1], key[2]), fmt, accept_encoding)
+        cache.put(key, hit, len(hit[0]))
+    payload, encoding = hit
+    headers = {'Vary': 'Accept, Accept-Encoding'}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(payload, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+@app.get('/search')
+async def search(q: str, limit: int = 20, company: Optional[str] = None):
+    limit = max(1, min(limit, 200))
+    total, hits = _index.search(q, limit, (company or '').strip() or None)
+    body = {'query': q, 'total': total, 'version': _index.version,
+            'results': [{**row, 'company': stub, 'score': score} for score, stub, row in hits]}
+    return Response(dumps(body), media_type='application/json')
+
+def _not_modified_since(ims, last_modified) -> bool:
+    """True when the feed is not newer than the If-Modified-Since date; an unparsable date counts as modified."""
+    if not ims:
+        return False
+    try:
+        since = email.utils.parsedate_to_datetime(ims)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=datetime.timezone.utc)  # asctime dates carry no zone; HTTP dates are GMT
+    return email.utils.parsedate_to_datetime(last_modified) <= since
+
+def _feed_response(feed, request: Request):
+    if feed is None:
+        raise HTTPException(status_code=404, detail='no such feed')
+    headers = {'ETag': feed['etag'], 'Last-Modified': feed['last_modified']}
+    inm = request.headers.get('if-none-match')
+    if inm is not None:
+        fresh = inm.strip() == '*' or feed['etag'] in [t.strip() for t in inm.split(',')]
+    else:
+        fresh = _not_modified_since(request.headers.get('if-modified-since'), feed['last_modified'])
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    return Response(feed['body'], media_type='text/calendar; charset=utf-8', headers=headers)
+
+@app.get('/feeds/play/{slug}.ics')
+async def play_feed(slug: str, request: Request):
+    return _feed_response(_feeds.get('play', slug), request)
+
+@app.get('/feeds/company/{company_id}.ics')
+async def company_feed(company_id: str, request: Request):
+    return _feed_response(_feeds.get('company', company_id), request)
+
+@app.get('/changes')
+async def changes(since: int):
+    """Company deltas from version `since` to the served one, or resync=true when `since` is out of the ring.
+
+    Clients drop `removed` hashes, upsert `added` rows and patch `changed` fields ([old, new]).
+    """
+    version, cache = _last_result['version'], _qcache
+    key = ('changes', since)
+    hit = cache.get(key)
+    if hit is None:
+        if version is None:
+            deltas = None  # nothing served yet
+        elif since == version:
+            deltas = []
+        else:
+            deltas = await asyncio.to_thread(load_changes, since, version)
+        if deltas is None:
+            body = {'since': since, 'version': version, 'resync': True}
+        else:
+            body = {'since': since, 'version': version, 'resync': False, 'companies': compose_deltas(deltas)}
+        payload = dumps(body)
+        hit = (payload, None)
+        cache.put(key, hit, len(payload))
+    return Response(hit[0], media_type='application/json')
 
 @app.get('/summary')
 async def summary():
@@ -69,14 +405,24 @@ async def summary():
         'ratio': (total_shakes / total_events) if total_events else 0.0
     }
 
-# Auto initial scrape on startup (registry default: registry.sample.yaml if present)
+# Warm start: serve the last published result immediately; scraping happens in the background
 @app.on_event('startup')
 async def startup_scrape():
     try:
-        await _do_scrape('registry.sample.yaml', notion_enabled=False)
-    except Exception:
-        pass
+        gen = await asyncio.to_thread(load_generation)
+        if gen:
+            # serve rows right away; /search and /feeds catch up when the background build lands
+            _install(gen, (_index, _feeds))
+            _spawn(_derive_later(gen))
+    except Exception as e:
+        log.error('api.warm_start_failed', error=e)
+    _spawn(_worker_loop())
+
+@app.on_event('shutdown')
+async def stop_background():
+    for task in list(_tasks):
+        task.cancel()
 
 @app.get('/')
 async def root():
-    return JSONResponse({"message": "ShakesFind API", "endpoints": ["/health", "/companies", "/productions", "/scrape"]})
+    return JSONResponse({"message": "ShakesFind API", "endpoints": ["/health", "/companies", "/productions", "/search", "/feeds/play/{slug}.ics", "/feeds/company/{id}.ics", "/changes", "/scrape", "/events", "/metrics"]})
@@ -0,0 +1,157 @@
+"""In-process load test for the API response path.
+
+    python -m benchmarks.api_load --companies 200 --events 25 --requests 200 --concurrency 8
+
+A synthetic result generation is installed into api.py. Concurrent clients
+hit it through an ASGI transport, so the numbers cover routing, encoding and
+compression with no socket overhead. `legacy` is the previous /productions
+handler: build a list of dicts and let FastAPI run jsonable_encoder and
+stdlib json. The other scenarios use the pre-serialized fragment path with
+and without content coding, plus MessagePack, and /search.
+"""
+import argparse, asyncio, datetime, hashlib, json, random, statistics, sys, time
+
+from benchmarks import synthetic
+
+
+DESCRIPTIONS = (
+    'A bold new staging set in a crumbling seaside hotel, with live music between the acts.',
+    'Our touring ensemble brings the play to parks across the county; bring a blanket and a picnic.',
+    'Directed by the artistic director in her final season, featuring the company of resident actors.',
+    'A ninety-minute cut for families, performed in the round with audience participation.',
+    'Original practices: candlelit, doubled casting and music played on period instruments.',
+)
+
+
+def synthetic_generation(companies=200, events=25, seed=7):
+    rng = random.Random(seed)
+    out = []
+    for ci in range(companies):
+        cid = f"syn{ci:04d}"
+        stub = {'id': cid, 'name': f'Synthetic Players {cid}', 'url': f'https://{cid}.example.org/season'}
+        rows = []
+        for i in range(events):
+            title, start, end = synthetic._show(rng, i)
+            canon = title.replace("William Shakespeare's ", '') if title not in synthetic.NOISE_TITLES else None
+            rows.append({
+                'company_id': cid, 'company_name': stub['name'], 'title_display': title, 'canonical_title': canon,
+                'is_shakespeare': bool(canon), 'start_date': start.isoformat(), 'end_date': end.isoformat(),
+                'venue': 'Main Stage', 'description': DESCRIPTIONS[(ci + i) % len(DESCRIPTIONS)], 'show_url': f"{stub['url']}/{i}", 'source_page': stub['url'],
+                'source_hash': hashlib.sha1(f'{cid}|{i}'.encode()).hexdigest(), 'match_confidence': 1.0 if canon else 0.0,
+                'raw_dates_text': synthetic._range_text(start, end), 'date_confidence': 0.9,
+                'fetched_at_utc': datetime.datetime(2026, 3, 1, tzinfo=datetime.timezone.utc).isoformat(), 'play_id': None,
+            })
+        out.append({'company': stub, 'events': rows, 'meta': {}})
+    return out
+
+
+def _legacy_app(api):
+    from fastapi import FastAPI
+    from typing import Optional
+    app = FastAPI()
+
+    @app.get('/productions')
+    async def list_productions(play: Optional[str] = None, company: Optional[str] = None):
+        events = []
+        for c in api._last_result['companies']:
+            if company and c['company']['id'] != company:
+                continue
+            for e in c['events']:
+                if play and (e.get('canonical_title') or '').lower().replace(' ', '') != play.replace(' ', '').lower():
+                    continue
+                events.append({**e, 'company': c['company']})
+        return events
+
+    return app
+
+
+async def _hammer(app, path, headers, requests, concurrency):
+    import httpx
+    headers = {'Accept-Encoding': 'identity', **headers}  # httpx asks for gzip by default
+    lat = []
+    size = 0
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench') as client:
+        r = await client.get(path, headers=headers)  # warm caches (fragments, compressed full body)
+        r.raise_for_status()
+        size = int(r.headers.get('content-length') or len(r.content))  # on-the-wire size
+        queue = iter(range(requests))
+
+        async def worker():
+            for _ in queue:
+                t0 = time.perf_counter()
+                async with client.stream('GET', path, headers=headers) as resp:
+                    resp.raise_for_status()
+                    async for _ in resp.aiter_raw():  # raw bytes: keep client-side decompression out of the timing
+                        pass
+                lat.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        wall = time.perf_counter() - t0
+    lat.sort()
+    return {
+        'rps': round(requests / wall, 1),
+        'p50_ms': round(statistics.median(lat), 2),
+        'p95_ms': round(lat[int(len(lat) * 0.95) - 1], 2),
+        'bytes': size,
+    }
+
+
+def scenarios(api):
+    from scraper.serialize import brotli, msgpack
+    legacy = _legacy_app(api)
+    out = [
+        ('legacy_full', legacy, '/productions', {}),
+        ('fast_full', api.app, '/productions', {}),
+        ('fast_full_gzip', api.app, '/productions', {'Accept-Encoding': 'gzip'}),
+        ('legacy_company', legacy, '/productions?company=syn0007', {}),
+        ('fast_company', api.app, '/productions?company=syn0007', {}),
+        ('legacy_play', legacy, '/productions?play=Hamlet', {}),
+        ('fast_play', api.app, '/productions?play=Hamlet', {}),
+        ('search_word', api.app, '/search?q=hamlet', {}),
+        ('search_prefix', api.app, '/search?q=ham+stag', {}),
+    ]
+    if brotli is not None:
+        out.insert(3, ('fast_full_br', api.app, '/productions', {'Accept-Encoding': 'br'}))
+    if msgpack is not None:
+        out.insert(3, ('fast_full_msgpack', api.app, '/productions', {'Accept': 'application/msgpack'}))
+    return out
+
+
+async def run(companies=200, events=25, requests=200, concurrency=8, only=None):
+    import api
+    gen = synthetic_generation(companies, events)
+    api._install({'companies': gen, 'generated_at': '2026-03-01T00:00:00Z', 'version': 1})
+    results = {}
+    for name, app, path, headers in scenarios(api):
+        if only and name not in only:
+            continue
+        results[name] = await _hammer(app, path, headers, requests, concurrency)
+    return {'companies': companies, 'events_per_company': events, 'requests': requests,
+            'concurrency': concurrency, 'scenarios': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='API response-path load test')
+    parser.add_argument('--companies', type=int, default=200)
+    parser.add_argument('--events', type=int, default=25)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--only', help='Comma-separated scenario names')
+    parser.add_argument('--json', help='Write the report here as JSON')
+    args = parser.parse_args(argv)
+    only = {s.strip() for s in args.only.split(',')} if args.only else None
+    report = asyncio.run(run(args.companies, args.events, args.requests, args.concurrency, only))
+    print(f"{report['companies']} companies x {report['events_per_company']} events, "
+          f"{report['requests']} requests @ {report['concurrency']}")
+    print(f"{'scenario':20} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'bytes':>10}")
+    for name, r in report['scenarios'].items():
+        print(f"{name:20} {r['rps']:9.1f} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {r['bytes']:10d}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""Per-stage pipeline benchmarks with a regression gate.
+
+    python -m benchmarks.run                 # measure and print
+    python -m benchmarks.run --check         # exit 1 when a stage regressed past the threshold
+    python -m benchmarks.run --update        # rewrite benchmarks/baseline.json
+
+Each stage is timed (best of --repeat runs) and measured for peak traced
+allocation (tracemalloc). Times are scaled by a pure-Python calibration loop
+so baselines recorded on one machine stay comparable on another. Synthetic
+stages always run; `corpus:` stages run over snapshots/ when it is present
+and are only gated when the baseline has them too.
+"""
+import argparse, asyncio, contextlib, datetime, io, json, os, pathlib, statistics, sys, tempfile, time, tracemalloc
+
+from benchmarks import synthetic
+
+BASELINE_PATH = pathlib.Path(__file__).with_name('baseline.json')
+SNAPSHOTS = pathlib.Path('snapshots')
+TIME_THRESHOLD = 0.5    # +50% (calibrated) wall time
+ALLOC_THRESHOLD = 0.25  # +25% peak allocation
+MIN_SLACK_MS = 0.5      # ignore regressions smaller than this in absolute terms
+
+
+def calibrate(repeat=5):
+    def work():
+        d = {}
+        for i in range(60000):
+            d[str(i)] = i * 2
+        return sum(len(k) for k in d)
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        work()
+        dt = (time.perf_counter() - t0) * 1000
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def _corpus():
+    """(html, company) pairs for snapshots/<company_id>/*.html of registry.yaml companies."""
+    if not SNAPSHOTS.is_dir() or not pathlib.Path('registry.yaml').exists():
+        return []
+    from registry import load_registry
+    by_id = {c['id']: c for c in load_registry('registry.yaml')}
+    out = []
+    for f in sorted(SNAPSHOTS.rglob('*.html')):
+        c = by_id.get(f.relative_to(SNAPSHOTS).parts[0])
+        if c:
+            out.append((f.read_text(encoding='utf-8'), c))
+    return out
+
+
+def build_stages(scale=200):
+    """name -> zero-arg callable. Setup cost (page generation, imports) is paid here."""
+    from scraper.extractors.jsonld import extract_events_from_jsonld
+    from scraper.extractors.html import extract_events_from_html_async
+    from scraper.normalize import parse_dates
+    from scraper.resolve import match_shakespeare_local
+    from scraper.staleness import analyze_staleness
+    from writers.file_export import export_data
+    from scraper.dedup import dedup_rows
+    from main import extract_company_events, build_rows
+
+    loop = asyncio.new_event_loop()
+    cards_html, cards_co = synthetic.card_page(scale)
+    ld_html, ld_co = synthetic.jsonld_page(scale)
+    fig_html, fig_co = synthetic.figcaption_page(scale)
+    ics_text, ics_co = synthetic.ics_calendar(scale)
+    fallback_co = {k: v for k, v in fig_co.items() if k not in ('inline_detail', 'no_network')}  # no selectors: plan path
+    fallback_plan = {}
+    loop.run_until_complete(extract_events_from_html_async(fig_html, fallback_co, fallback_plan))
+    rss_text, rss_co = synthetic.rss_feed(scale)
+    dates = synthetic.date_strings(scale)
+    titles = synthetic.titles(scale * 2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        card_events = loop.run_until_complete(extract_events_from_html_async(cards_html, cards_co))
+    rows = build_rows(cards_co, card_events, cards_co['Productions URL'], local_only=True)
+    companies = [({**cards_co, 'id': f'c{i}'}, rows) for i in range(20)]
+    # every row three times: as listed, title upper-cased, dates one day later
+    shift = lambda d: (datetime.date.fromisoformat(d) + datetime.timedelta(days=1)).isoformat() if d else d
+    dup_rows = rows + [{**r, 'title_display': (r['title_display'] or '').upper()} for r in rows] + \
+        [{**r, 'start_date': shift(r['start_date']), 'end_date': shift(r['end_date'])} for r in rows]
+    export_payload = {'companies': [{'company': {'id': c['id']}, 'events': r, 'meta': {}} for c, r in companies]}
+    tmpdir = tempfile.mkdtemp(prefix='sf-bench-')
+
+    stages = {
+        'jsonld': lambda: extract_events_from_jsonld(ld_html, ld_co['Productions URL']),
+        'html_cards': lambda: loop.run_until_complete(extract_events_from_html_async(cards_html, cards_co)),
+        # the same season as html_cards, delivered as a calendar / feed
+        'ics': lambda: loop.run_until_complete(extract_company_events(ics_co, ics_text, ics_co['Productions URL'])),
+        'rss': lambda: loop.run_until_complete(extract_company_events(rss_co, rss_text, rss_co['Productions URL'])),
+        'html_fallback_discover': lambda: loop.run_until_complete(extract_events_from_html_async(fig_html, fallback_co, {})),
+        'html_fallback_cached': lambda: loop.run_until_complete(extract_events_from_html_async(fig_html, fallback_co, fallback_plan)),
+        'figcaption_inline': lambda: loop.run_until_complete(extract_company_events(fig_co, fig_html, fig_co['Productions URL'])),
+        'parse_dates': lambda: [parse_dates(t, 'America/New_York') for t in dates],
+        'match_shakespeare_local': lambda: [match_shakespeare_local(t) for t in titles],
+        'dedup_rows': lambda: dedup_rows(dup_rows),
+        'analyze_staleness': lambda: [analyze_staleness(c, r, today=datetime.date(2026, 3, 1)) for c, r in companies],
+        'export_data': lambda: export_data(dict(export_payload), os.path.join(tmpdir, 'out.json')),
+    }
+    corpus = _corpus()
+    if corpus:
+        stages['corpus:jsonld'] = lambda: [extract_events_from_jsonld(h, c.get('Productions URL')) for h, c in corpus]
+        fig = [(h, {**c, 'no_network': True, 'inline_detail': True}) for h, c in corpus]
+        stages['corpus:figcaption_inline'] = lambda: [
+            loop.run_until_complete(extract_company_events(c, h, c.get('Productions URL'))) for h, c in fig
+        ]
+        listed = [(h, c) for h, c in corpus if c.get('HTML List Selector')]
+        if listed:
+            stages['corpus:html_cards'] = lambda: [
+                loop.run_until_complete(extract_events_from_html_async(h, c)) for h, c in listed
+            ]
+    return stages
+
+
+def measure(fn, repeat=5):
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        fn()  # warm caches / lazy imports
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - t0) * 1000)
+            sink.seek(0)
+            sink.truncate()
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {'ms': round(min(times), 3), 'median_ms': round(statistics.median(times), 3), 'alloc_kib': round(peak / 1024, 1)}
+
+
+def run(scale=200, repeat=5, only=None):
+    stages = build_stages(scale)
+    results = {'calibration_ms': round(calibrate(), 3), 'scale': scale, 'stages': {}}
+    for name, fn in stages.items():
+        if only and name not in only:
+            continue
+        results['stages'][name] = measure(fn, repeat=repeat)
+    return results
+
+
+def compare(baseline: dict, current: dict, time_threshold=TIME_THRESHOLD, alloc_threshold=ALLOC_THRESHOLD):
+    """Return a list of regression strings (empty when the gate passes)."""
+    problems = []
+    if baseline.get('scale') != current.get('scale'):
+        return [f"scale mismatch: baseline={baseline.get('scale')} current={current.get('scale')}"]
+    factor = (current.get('calibration_ms') or 1) / (baseline.get('calibration_ms') or 1)
+    for name, base in baseline.get('stages', {}).items():
+        cur = current['stages'].get(name)
+        if cur is None:
+            continue
+        expected = base['ms'] * factor
+        if cur['ms'] > expected * (1 + time_threshold) and cur['ms'] - expected > MIN_SLACK_MS:
+            problems.append(f"{name}: {cur['ms']:.2f}ms vs {expected:.2f}ms calibrated baseline (+{(cur['ms'] / expected - 1) * 100:.0f}%)")
+        if base.get('alloc_kib') and cur['alloc_kib'] > base['alloc_kib'] * (1 + alloc_threshold):
+            problems.append(f"{name}: {cur['alloc_kib']:.0f}KiB peak vs {base['alloc_kib']:.0f}KiB baseline (+{(cur['alloc_kib'] / base['alloc_kib'] - 1) * 100:.0f}%)")
+    return problems
+
+
+def _print_table(results, baseline=None):
+    print(f"calibration {results['calibration_ms']:.2f}ms  scale={results['scale']}")
+    print(f"{'stage':32} {'best ms':>10} {'median ms':>10} {'peak KiB':>10} {'base ms':>10}")
+    for name, r in results['stages'].items():
+        base = ((baseline or {}).get('stages') or {}).get(name, {}).get('ms')
+        base_s = f"{base:10.2f}" if base is not None else f"{'-':>10}"
+        print(f"{name:32} {r['ms']:10.2f} {r['median_ms']:10.2f} {r['alloc_kib']:10.1f} {base_s}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ShakesFind pipeline benchmarks')
+    parser.add_argument('--scale', type=int, default=200, help='Synthetic events per page')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', help='Comma-separated stage names')
+    parser.add_argument('--check', action='store_true', help='Fail when a stage regresses past the threshold')
+    parser.add_argument('--update', action='store_true', help='Write results as the new baseline')
+    parser.add_argument('--time-threshold', type=float, default=TIME_THRESHOLD)
+    parser.add_argument('--alloc-threshold', type=float, default=ALLOC_THRESHOLD)
+    parser.add_argument('--json', help='Also write raw results to this path')
+    args = parser.parse_args(argv)
+    only = {s.strip() for s in args.only.split(',')} if args.only else None
+
+    results = run(scale=args.scale, repeat=args.repeat, only=only)
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else None
+    _print_table(results, baseline)
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps(results, indent=2))
+    if args.update:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+        print(f"[BENCH] baseline written to {BASELINE_PATH}")
+    if args.check:
+        if baseline is None:
+            print('[BENCH] no baseline; run with --update first')
+            return 2
+        problems = compare(baseline, results, args.time_threshold, args.alloc_threshold)
+        for p in problems:
+            print(f"[REGRESSION] {p}")
+        if problems:
+            return 1
+        print('[BENCH] no regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""Synthetic scale harness: N-company registry + local stand-in web server.
+
+    python -m benchmarks.scale --companies 500 --latency-ms 40 --error-rate 0.02 --forbid-rate 0.05
+    python -m benchmarks.scale --companies 50 --serve --registry-out /tmp/synthetic.yaml   # just serve
+
+Companies rotate through four page layouts (JSON-LD, card list, figcaptions,
+card list + detail pages). The server adds per-request latency, answers a
+fraction of companies with 500s, and 403s the bot UA for another fraction
+(the fetcher's browser-UA retry gets through). The driver runs the full
+scrape_all pipeline against it and reports wall time, per-company latency
+percentiles, peak RSS and events per second.
+"""
+import argparse, asyncio, hashlib, json, os, random, resource, shutil, sys, tempfile, threading, time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import yaml
+
+from benchmarks import synthetic
+
+LAYOUTS = ['jsonld', 'cards', 'figcaption', 'detail']
+
+
+def _frac(cid: str, salt: str) -> float:
+    return int(hashlib.sha1(f"{salt}:{cid}".encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+
+def company_ids(n):
+    return [f"syn{i:04d}" for i in range(n)]
+
+
+def layout_for(cid: str) -> str:
+    return LAYOUTS[int(cid[3:]) % len(LAYOUTS)]
+
+
+def registry_entries(n, base_url):
+    entries = []
+    for cid in company_ids(n):
+        layout = layout_for(cid)
+        entry = {'id': cid, 'name': f'Synthetic Players {cid}', 'timezone': 'America/New_York',
+                 'url': f"{base_url}/c/{cid}/season-2026"}
+        if layout == 'jsonld':
+            entry['strategy'] = ['jsonld', 'html']
+        elif layout == 'cards':
+            entry['strategy'] = ['html']
+            entry['html'] = {'list': 'section.shows .show-card',
+                             'fields': {'title': '.show-title', 'dates': '.show-dates', 'url': 'a@href'}}
+        elif layout == 'figcaption':
+            entry['strategy'] = ['html']
+            entry['html'] = {'inline_detail': True}
+        else:
+            entry['strategy'] = ['html']
+            entry['html'] = {'list': '.show-card', 'fields': {'title': '.show-title', 'url': 'a@href'},
+                             'detail_links': 'a.more', 'detail': {'fields': {'title': 'h1', 'dates': '.dates'}}}
+        entries.append(entry)
+    return entries
+
+
+def _shows(cid, count):
+    rng = random.Random(cid)
+    return [synthetic._show(rng, i) for i in range(count)]
+
+
+def render_page(cid: str, path_rest: str, shows_per_company=8):
+    """HTML for /c/<cid>/<path_rest>, or None for unknown paths."""
+    layout = layout_for(cid)
+    seed = int(cid[3:])
+    if path_rest.startswith('show/') and layout == 'detail':
+        i = int(path_rest.split('/', 1)[1])
+        title, start, end = _shows(cid, shows_per_company)[i]
+        return (f'<html><body><h1>{title}</h1><p class="dates">{synthetic._range_text(start, end)}</p>'
+                f'<p>{"Program notes. " * 40}</p></body></html>')
+    if not path_rest.startswith('season'):
+        return None
+    if layout == 'jsonld':
+        return synthetic.jsonld_page(shows_per_company, seed=seed, cid=cid)[0]
+    if layout == 'cards':
+        return synthetic.card_page(shows_per_company, seed=seed, cid=cid)[0]
+    if layout == 'figcaption':
+        return synthetic.figcaption_page(shows_per_company, seed=seed, cid=cid)[0]
+    cards = ''.join(
+        f'<div class="show-card"><h3 class="show-title">{t}</h3><a class="more" href="/c/{cid}/show/{i}">More</a></div>'
+        for i, (t, _, _) in enumerate(_shows(cid, shows_per_company))
+    )
+    return f'<html><body><div class="list">{cards}</div></body></html>'
+
+
+class StandInServer:
+    """Threaded HTTP server serving synthetic company pages with injected latency and failures."""
+
+    def __init__(self, latency_ms=20.0, jitter_ms=10.0, error_rate=0.0, forbid_rate=0.0, shows_per_company=8):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.forbid_rate = forbid_rate
+        self.shows_per_company = shows_per_company
+        self.stats = {'requests': 0, 'status_403': 0, 'status_500': 0, 'status_404': 0, 'bytes': 0}
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b''):
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                server._count('requests')
+                delay = max(0.0, server.latency_ms + random.uniform(-server.jitter_ms, server.jitter_ms))
+                time.sleep(delay / 1000)
+                parts = self.path.split('?', 1)[0].strip('/').split('/', 2)
+                if len(parts) < 3 or parts[0] != 'c':
+                    server._count('status_404')
+                    return self._send(404)
+                cid, rest = parts[1], parts[2]
+                if _frac(cid, 'error') < server.error_rate:
+                    server._count('status_500')
+                    return self._send(500)
+                if _frac(cid, 'forbid') < server.forbid_rate and 'ShakesFindBot' in (self.headers.get('User-Agent') or ''):
+                    server._count('status_403')
+                    return self._send(403)
+                html = render_page(cid, rest, server.shows_per_company)
+                if html is None:
+                    server._count('status_404')
+                    return self._send(404)
+                body = html.encode('utf-8')
+                server._count('bytes', len(body))
+                return self._send(200, body)
+
+            do_HEAD = do_GET
+
+        return Handler
+
+    def start(self, host='127.0.0.1', port=0):
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._httpd.server_address[1]}"
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return round(ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo), 1)
+
+
+def peak_rss_mib():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+async def drive(registry_path, **scrape_kwargs):
+    """Run scrape_all against the registry and summarize throughput/latency.
+
+    Unless SF_STATE_DIR is set, learned state (strategies, probes) goes to a
+    throwaway dir, so every run starts from the registry's static strategy order.
+    """
+    from main import scrape_all
+    own_state = 'SF_STATE_DIR' not in os.environ
+    if own_state:
+        os.environ['SF_STATE_DIR'] = tempfile.mkdtemp(prefix='sf-scale-state-')
+    t0 = time.perf_counter()
+    try:
+        results = await scrape_all(registry_path=registry_path, notion_enabled=False, **scrape_kwargs)
+    finally:
+        if own_state:
+            shutil.rmtree(os.environ.pop('SF_STATE_DIR'), ignore_errors=True)
+    wall = time.perf_counter() - t0
+    lat = [c['meta'].get('elapsed_ms') for c in results if c['meta'].get('elapsed_ms') is not None]
+    events = sum(len(c['events']) for c in results)
+    return {
+        'companies': len(results),
+        'companies_with_events': sum(1 for c in results if c['events']),
+        'fetch_errors': sum(1 for c in results if c['meta'].get('fetch', {}).get('error')),
+        'events': events,
+        'wall_sec': round(wall, 2),
+        'p50_company_ms': _percentile(lat, 50),
+        'p95_company_ms': _percentile(lat, 95),
+        'max_company_ms': max(lat) if lat else None,
+        'events_per_sec': round(events / wall, 1) if wall else None,
+        'peak_rss_mib': peak_rss_mib(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Synthetic N-company scale harness')
+    parser.add_argument('--companies', type=int, default=100)
+    parser.add_argument('--shows', type=int, default=8, help='Productions per company page')
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of companies answering 500')
+    parser.add_argument('--forbid-rate', type=float, default=0.0, help='Fraction of companies 403-ing the bot UA')
+    parser.add_argument('--registry-out', default=None, help='Where to write the synthetic registry YAML')
+    parser.add_argument('--serve', action='store_true', help='Only serve pages until interrupted')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--json', help='Write the report here as JSON')
+    args = parser.parse_args(argv)
+
+    server = StandInServer(args.latency_ms, args.jitter_ms, args.error_rate, args.forbid_rate, args.shows)
+    base = server.start(port=args.port)
+    reg_path = args.registry_out or os.path.join(os.getenv('TMPDIR', '/tmp'), f'sf-synthetic-{args.companies}.yaml')
+    with open(reg_path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(registry_entries(args.companies, base), f, sort_keys=False)
+    print(f"[SCALE] serving {args.companies} companies at {base}; registry {reg_path}")
+    try:
+        if args.serve:
+            while True:
+                time.sleep(3600)
+        report = asyncio.run(drive(reg_path))
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        server.stop()
+    report['server'] = dict(server.stats)
+    report['config'] = {k: getattr(args, k) for k in ('companies', 'shows', 'latency_ms', 'jitter_ms', 'error_rate', 'forbid_rate')}
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
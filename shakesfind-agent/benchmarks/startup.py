@@ -0,0 +1,115 @@
+"""Cold-start import benchmark (python -X importtime) with a stored baseline.
+
+    python -m benchmarks.startup                  # report import time for main and api
+    python -m benchmarks.startup --check          # fail on a regression or a heavy dep imported eagerly
+    python -m benchmarks.startup --update         # rewrite benchmarks/startup_baseline.json
+
+Each entry module is imported in a fresh interpreter. The cumulative time is
+the best of --repeat runs, scaled by the same calibration loop as
+benchmarks.run. The report lists the slowest imports by cumulative time.
+It also checks that the entry point did not pull in any module from LAZY,
+since those should only load once their strategy or feature is used.
+"""
+import argparse, json, pathlib, subprocess, sys
+
+from benchmarks.run import calibrate
+
+BASELINE_PATH = pathlib.Path(__file__).with_name('startup_baseline.json')
+ENTRY_MODULES = ['main', 'api', 'registry']
+LAZY = ['notion_client', 'extruct', 'w3lib', 'dateparser', 'bs4', 'selectolax', 'requests_cache', 'httpx', 'playwright']
+TIME_THRESHOLD = 0.5
+MIN_SLACK_MS = 20.0
+
+
+def importtime(code: str, cwd=None):
+    """Run `code` in a fresh interpreter; return [(module, self_us, cumulative_us)] in import order."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=cwd,
+                          capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cum_us, name = [p.strip() for p in line[len('import time:'):].split('|')]
+        rows.append((name, int(self_us), int(cum_us)))
+    return rows
+
+
+def loaded_lazy(rows):
+    """Top-level package names from LAZY that an import trace contains."""
+    seen = {name.split('.')[0] for name, _, _ in rows}
+    return [m for m in LAZY if m in seen]
+
+
+def measure(module: str, repeat=3, top=10):
+    best = None
+    for _ in range(repeat):
+        rows = importtime(f'import {module}')
+        total = next((cum for name, _, cum in rows if name == module), sum(s for _, s, _ in rows))
+        if best is None or total < best[0]:
+            best = (total, rows)
+    total, rows = best
+    slow = sorted(rows, key=lambda r: r[2], reverse=True)
+    return {
+        'ms': round(total / 1000, 1),
+        'modules': len(rows),
+        'lazy_loaded': loaded_lazy(rows),
+        'top': [{'module': n, 'cumulative_ms': round(c / 1000, 1)} for n, _, c in slow if n != module][:top],
+    }
+
+
+def run(modules=None, repeat=3):
+    return {'calibration_ms': round(calibrate(), 3),
+            'entries': {m: measure(m, repeat=repeat) for m in (modules or ENTRY_MODULES)}}
+
+
+def compare(baseline: dict, current: dict, time_threshold=TIME_THRESHOLD):
+    problems = []
+    factor = (current.get('calibration_ms') or 1) / (baseline.get('calibration_ms') or 1)
+    for name, cur in current['entries'].items():
+        if cur['lazy_loaded']:
+            problems.append(f"{name}: eagerly imports {', '.join(cur['lazy_loaded'])}")
+        base = baseline.get('entries', {}).get(name)
+        if not base:
+            continue
+        expected = base['ms'] * factor
+        if cur['ms'] > expected * (1 + time_threshold) and cur['ms'] - expected > MIN_SLACK_MS:
+            problems.append(f"{name}: import {cur['ms']:.0f}ms vs {expected:.0f}ms calibrated baseline")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cold-start import benchmark')
+    parser.add_argument('--only', help='Comma-separated entry modules (default: main,api,registry)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--check', action='store_true')
+    parser.add_argument('--update', action='store_true')
+    parser.add_argument('--json', help='Also write raw results to this path')
+    args = parser.parse_args(argv)
+    modules = [m.strip() for m in args.only.split(',')] if args.only else None
+
+    results = run(modules, repeat=args.repeat)
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else None
+    print(f"calibration {results['calibration_ms']:.2f}ms")
+    for name, r in results['entries'].items():
+        base = ((baseline or {}).get('entries') or {}).get(name, {}).get('ms')
+        print(f"{name:12} {r['ms']:8.1f}ms  modules={r['modules']}  base={base if base is not None else '-'}"
+              + (f"  LAZY VIOLATION: {','.join(r['lazy_loaded'])}" if r['lazy_loaded'] else ''))
+        for t in r['top'][:5]:
+            print(f"    {t['cumulative_ms']:8.1f}ms  {t['module']}")
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps(results, indent=2))
+    if args.update:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+        print(f"[BENCH] startup baseline written to {BASELINE_PATH}")
+    if args.check:
+        problems = compare(baseline or {}, results)
+        for p in problems:
+            print(f"[REGRESSION] {p}")
+        if problems:
+            return 1
+        print('[BENCH] startup ok')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
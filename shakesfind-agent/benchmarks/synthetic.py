@@ -0,0 +1,147 @@
+"""Deterministic synthetic theatre pages for benchmarks.
+
+Each generator returns (html, company) where `company` is a registry-shaped
+dict that makes the pipeline take the intended extraction path.
+"""
+import datetime, json, random
+
+from shakespeare_plays import CANON_TITLES
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August',
+          'September', 'October', 'November', 'December']
+NOISE_TITLES = ['Holiday Cabaret', 'Summer Camp Showcase', 'A Tribute in Concert', 'Gala Night',
+                'Sonnets Under the Stars', 'Playwrights Lab Reading']
+
+
+def _show(rng, i, year=2026):
+    title = rng.choice(CANON_TITLES) if rng.random() < 0.7 else rng.choice(NOISE_TITLES)
+    if rng.random() < 0.2:
+        title = f"William Shakespeare's {title}"
+    start = datetime.date(year, 1, 1) + datetime.timedelta(days=(i * 11) % 330)
+    end = start + datetime.timedelta(days=rng.randint(7, 40))
+    return title, start, end
+
+
+def _range_text(start, end):
+    if start.month == end.month and start.year == end.year:
+        return f"{MONTHS[start.month - 1]} {start.day} – {end.day}, {end.year}"
+    return f"{MONTHS[start.month - 1]} {start.day} – {MONTHS[end.month - 1]} {end.day}, {end.year}"
+
+
+def _company(cid, **extra):
+    return {
+        'id': cid, 'Name': f'Synthetic {cid}', 'Timezone': 'America/New_York',
+        'Productions URL': f'https://{cid}.example.org/season-2026', 'Status': 'active', **extra,
+    }
+
+
+def card_page(n=200, seed=1, cid='bench-cards'):
+    rng = random.Random(seed)
+    cards = []
+    for i in range(n):
+        title, start, end = _show(rng, i)
+        cards.append(
+            f'<article class="show-card"><h3 class="show-title"><a href="/shows/{i}">{title}</a></h3>'
+            f'<div class="show-dates"><p>{_range_text(start, end)} By William Shakespeare</p>'
+            f'<p>Festival Stage | Ages 12+</p><p>{"Lorem ipsum dolor sit amet. " * 6}</p></div></article>'
+        )
+    html = f'<html><body><nav>{"<a href=#>x</a>" * 50}</nav><section class="shows">{"".join(cards)}</section></body></html>'
+    company = _company(cid, **{
+        'HTML List Selector': 'section.shows .show-card',
+        'HTML Field Map': json.dumps({'title': '.show-title', 'dates': '.show-dates', 'url': 'a@href'}),
+        'Scrape Strategy': ['html'],
+    })
+    return html, company
+
+
+def jsonld_page(n=200, seed=2, cid='bench-jsonld'):
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(n):
+        title, start, end = _show(rng, i)
+        blocks.append(json.dumps({
+            '@context': 'https://schema.org', '@type': 'TheaterEvent', 'name': title,
+            'url': f'https://{cid}.example.org/shows/{i}', 'startDate': start.isoformat(),
+            'endDate': end.isoformat(), 'location': {'@type': 'Place', 'name': 'Main Stage'},
+        }))
+    scripts = ''.join(f'<script type="application/ld+json">{b}</script>' for b in blocks)
+    html = f'<html><head>{scripts}</head><body><p>{"filler " * 500}</p></body></html>'
+    return html, _company(cid, **{'Scrape Strategy': ['jsonld']})
+
+
+def figcaption_page(n=200, seed=3, cid='bench-fig'):
+    rng = random.Random(seed)
+    figs = []
+    for i in range(n):
+        title, start, end = _show(rng, i)
+        short = f"{MONTHS[start.month - 1][:3]} {start.day}–{MONTHS[end.month - 1][:3]} {end.day}"
+        figs.append(
+            f'<figure><img src="/img/{i}.jpg"><figcaption><div><a class="buy-tickets-button" href="/tickets/{i}">'
+            f'<span>Buy Tickets</span></a><h1>{title}</h1><p class="prod-dates">{short}</p></div></figcaption></figure>'
+        )
+    html = f'<html><body><main>{"".join(figs)}</main></body></html>'
+    company = _company(cid, **{'Scrape Strategy': ['html'], 'inline_detail': True, 'no_network': True})
+    return html, company
+
+
+def ics_calendar(n=200, seed=1, cid='bench-ics'):
+    """The card_page(seed=1) season as a calendar: every 3rd night spelled out, or one RRULE per run."""
+    rng = random.Random(seed)
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//ShakesFind//bench//EN']
+    for i in range(n):
+        title, start, end = _show(rng, i)
+        common = [f'SUMMARY:{title}', 'LOCATION:Festival Stage', f'URL:https://{cid}.example.org/shows/{i}',
+                  'DESCRIPTION:' + 'Lorem ipsum dolor sit amet\\, consectetur. ' * 3]
+        if i % 2:
+            lines += ['BEGIN:VEVENT', f'UID:{cid}-{i}@example.org', f'DTSTART:{start:%Y%m%d}T193000',
+                      f'DTEND:{start:%Y%m%d}T220000', f'RRULE:FREQ=DAILY;INTERVAL=3;UNTIL={end:%Y%m%d}T235959', *common, 'END:VEVENT']
+            continue
+        day = start
+        while day <= end:
+            lines += ['BEGIN:VEVENT', f'UID:{cid}-{i}-{day:%Y%m%d}@example.org', f'DTSTART:{day:%Y%m%d}T193000',
+                      f'DTEND:{day:%Y%m%d}T220000', *common, 'END:VEVENT']
+            day += datetime.timedelta(days=3)
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(lines) + '\r\n', _company(cid, **{'Scrape Strategy': ['ics']})
+
+
+def rss_feed(n=200, seed=1, cid='bench-rss'):
+    """The card_page(seed=1) season as RSS 2.0: half the items carry ev:startdate/ev:enddate, half only text."""
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        title, start, end = _show(rng, i)
+        dated = (f'<ev:startdate>{start.isoformat()}</ev:startdate><ev:enddate>{end.isoformat()}</ev:enddate>'
+                 if i % 2 == 0 else '')
+        items.append(
+            f'<item><title>{title}</title><link>https://{cid}.example.org/shows/{i}</link>{dated}'
+            f'<description>&lt;p&gt;{_range_text(start, end)} By William Shakespeare&lt;/p&gt;'
+            f'&lt;p&gt;Festival Stage | Ages 12+&lt;/p&gt;{"Lorem ipsum dolor sit amet. " * 6}</description></item>'
+        )
+    xml = ('<?xml version="1.0" encoding="utf-8"?><rss version="2.0" xmlns:ev="http://purl.org/rss/1.0/modules/event/">'
+           f'<channel><title>Synthetic {cid}</title>{"".join(items)}</channel></rss>')
+    return xml, _company(cid, **{'Scrape Strategy': ['rss']})
+
+
+def date_strings(n=500, seed=4):
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        _, start, end = _show(rng, i)
+        kind = i % 5
+        if kind == 0:
+            out.append(_range_text(start, end))
+        elif kind == 1:
+            out.append(f"{MONTHS[start.month - 1]} {start.day}, {start.year} – {MONTHS[end.month - 1]} {end.day}, {end.year}")
+        elif kind == 2:
+            out.append(f"{MONTHS[start.month - 1][:3]} {start.day} - {MONTHS[end.month - 1][:3]} {end.day}")
+        elif kind == 3:
+            out.append('Festival Stage | Ages 12+')
+        else:
+            out.append(f"{MONTHS[start.month - 1]}{start.day} – {MONTHS[end.month - 1]}{end.day}, {end.year}")
+    return out
+
+
+def titles(n=500, seed=5):
+    rng = random.Random(seed)
+    return [_show(rng, i)[0] for i in range(n)]
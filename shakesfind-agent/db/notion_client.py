@@ -30,6 +30,7 @@ class NotionDB:
                 'Name': props['Name']['title'][0]['plain_text'] if props['Name']['title'] else '',
                 'Homepage URL': props.get('Homepage URL', {}).get('url'),
                 'Productions URL': props.get('Productions URL', {}).get('url'),
+                'Feed URL': props.get('Feed URL', {}).get('url'),
                 'Timezone': props.get('Timezone', {}).get('rich_text', [{}])[0].get('plain_text'),
                 'HTML List Selector': props.get('HTML List Selector', {}).get('rich_text', [{}])[0].get('plain_text'),
                 'HTML Field Map': props.get('HTML Field Map', {}).get('rich_text', [{}])[0].get('plain_text'),
@@ -1,17 +1,23 @@
-import os, asyncio, hashlib, json, pathlib
+import os, asyncio, hashlib, json, pathlib, time
 from dotenv import load_dotenv
-from db.notion_client import NotionDB
-from scraper.extractors.jsonld import extract_events_from_jsonld
-from scraper.extractors.html import extract_events_from_html
 from scraper.normalize import normalize_event, parse_dates
 from scraper.resolve import resolve_play, match_shakespeare_local
-from scraper.utils import fetch_text, now_utc
+from scraper.utils import fetch_text, now_utc, current_date, archive_page, record_rows
+from scraper.archive import latest_page, apply_retention
+from scraper.heavy import heavy_fetch, close_pool
 from registry import load_registry
 from scraper.staleness import analyze_staleness
-from writers.file_export import export_data
+from scraper.dedup import dedup_rows, source_hash
+from scraper.probe import probe_url, summarize_probes
+from scraper.state import load_state, merge_state
+from scraper.shard import parse_shard, select as select_shard, load_part, merge_parts
+from scraper import metrics, log, strategy
+from writers.file_export import export_data, export_partitioned
 
 load_dotenv()
 
+PAGE_STRATEGIES = ('jsonld', 'html')  # static preference order for HTML pages
+
 def _strategy_enabled(company, name):
     strat = company.get('Scrape Strategy') or company.get('strategy') or company.get('Strategy')
     if not strat:
@@ -20,109 +26,234 @@ def _strategy_enabled(company, name):
         strat = [s.strip() for s in strat.split(',')]
     return name in strat
 
-DEBUG = os.getenv('SF_DEBUG') == '1'
+def _heavy_mode(company):
+    """Registry opt-in for the headless tier: 'always' skips httpx, anything truthy is a fallback."""
+    mode = company.get('heavy') or company.get('Heavy')
+    if not mode or company.get('no_network'):
+        return None
+    return 'always' if str(mode).lower() == 'always' else 'fallback'
 
-async def process_company(notion, company, local_only=False, debug: bool=False):
-    if company.get('Status') == 'paused':
-        return []
-    url = company.get('Productions URL') or company.get('Homepage URL')
-    if not url:
-        return []
-    offline_html_path = company.get('offline_html') or company.get('Offline HTML')
-    offline_detail_dir = company.get('offline_detail_dir') or company.get('Offline Detail Dir')
-    if company.get('id') == 'sta' and company.get('no_network') and company.get('inline_detail'):
-        from scraper.offline_tavern import load_offline_tavern_events
-        return load_offline_tavern_events(company)
+def _observe_fetch(info, seconds, html):
+    tier = info.get('tier') or 'unknown'
+    metrics.record_span('fetch', seconds, strategy=tier)
+    metrics.FETCH_SECONDS.observe(seconds, tier=tier)
+    metrics.FETCH_BYTES.observe(info.get('bytes') or len(html or ''), tier=tier)
+    if tier == 'requests_cache':
+        metrics.CACHE_REQUESTS.inc(cache='http', result='hit' if info.get('from_cache') else 'miss')
+    elif tier == 'httpx':
+        metrics.CACHE_REQUESTS.inc(cache='http', result='miss')
+
+async def _fetch_page(company, url, meta, offline_html_path=None, probed=None):
+    """Body of `url` from the archive (replay), the offline snapshot, the probe (`probed`) or the network; None when unavailable."""
     html = None
-    if company.get('no_network') and offline_html_path and os.path.exists(offline_html_path):
+    if company.get('replay'):
+        html = latest_page(company.get('id'), url)
+        meta['fetch'] = {'tier': 'archive'}
+        if html is None:
+            log.warning('replay.missing', url=url)
+    elif company.get('no_network') and offline_html_path and os.path.exists(offline_html_path):
         html = pathlib.Path(offline_html_path).read_text(encoding='utf-8')
-        print(f"[OFFLINE] Bypassed network; loaded {offline_html_path}")
+        log.info('fetch.offline', path=offline_html_path)
+    elif probed is not None:
+        html = probed
+        meta['fetch'] = {'tier': 'probe', 'bytes': len(probed.encode('utf-8'))}
+        meta['fetch']['sha256'] = archive_page(company.get('id'), url, html)
     else:
+        fetch_info = meta.setdefault('fetch', {})
+        heavy = _heavy_mode(company)
+        t_fetch = time.perf_counter()
         try:
-            html = await fetch_text(url, allow_heavy=not company.get('no_network'))
+            if heavy == 'always':
+                html = await heavy_fetch(url, info=fetch_info)
+            else:
+                stop_after = company.get('HTML List Selector') if company.get('stop_after_list') else None
+                html = await fetch_text(url, allow_heavy=heavy is not None, info=fetch_info, stop_after=stop_after)
+            _observe_fetch(fetch_info, time.perf_counter() - t_fetch, html)
+            fetch_info['sha256'] = archive_page(company.get('id'), url, html)
         except Exception as e:
-            print(f"[ERR] fetch {company.get('Name')} {url}: {e}")
+            metrics.record_span('fetch', time.perf_counter() - t_fetch, strategy='error')
+            log.error('fetch.failed', url=url, error=e)
+            fetch_info['error'] = str(e)[:200]
             if offline_html_path and os.path.exists(offline_html_path):
                 try:
                     html = pathlib.Path(offline_html_path).read_text(encoding='utf-8')
-                    print(f"[OFFLINE] Loaded snapshot {offline_html_path}")
+                    log.info('fetch.snapshot_fallback', path=offline_html_path)
                 except Exception as se:
-                    print(f"[ERR] offline snapshot read failed {offline_html_path}: {se}")
-            else:
-                return []
+                    log.error('fetch.snapshot_failed', path=offline_html_path, error=se)
+    return html
 
-    events = []
-    if _strategy_enabled(company, 'jsonld'):
-        events = extract_events_from_jsonld(html, base_url=url)
-    if not events and _strategy_enabled(company, 'html'):
-        inline_detail = company.get('inline_detail')
-        # Fast path for offline + inline_detail: parse figcaptions directly here to avoid heavier extractor
-        if company.get('no_network') and inline_detail:
-            from bs4 import BeautifulSoup
-            import re, datetime
-            soup = BeautifulSoup(html, 'html.parser')
-            shows = []
-            for fc in soup.select('figcaption'):
-                title_el = fc.select_one('h1,h2,h3')
-                dates_el = fc.select_one('.prod-dates,.dates,.date')
-                if not title_el:
-                    continue
-                title = title_el.get_text(strip=True)
-                dates_text = dates_el.get_text(strip=True) if dates_el else None
-                if dates_text and not re.search(r'\d{4}', dates_text):
-                    # append current year
-                    dates_text = f"{dates_text} {datetime.date.today().year}"
-                shows.append({'title': title, 'dates_text': dates_text, 'url': None, 'venue': None})
-            events = shows
-        else:
-            maybe = extract_events_from_html(html, company)
+async def process_company(notion, company, local_only=False, debug: bool=False, meta: dict=None, learned=None, probed=None):
+    meta = meta if meta is not None else {}
+    if company.get('Status') == 'paused':
+        return []
+    url = company.get('Productions URL') or company.get('Homepage URL')
+    if not url:
+        return []
+    offline_html_path = company.get('offline_html') or company.get('Offline HTML')
+    if company.get('id') == 'sta' and company.get('no_network') and company.get('inline_detail'):
+        from scraper.offline_tavern import load_offline_tavern_events
+        return load_offline_tavern_events(company)
+    feed_url = company.get('feed_url') or company.get('Feed URL')
+    if feed_url and (_strategy_enabled(company, 'ics') or _strategy_enabled(company, 'rss')):
+        # a calendar/feed is far cheaper than the page; the page is only fetched when it yields nothing
+        feed_meta = {}
+        body = await _fetch_page(company, feed_url, feed_meta, company.get('offline_feed'))
+        events = await extract_company_events(company, body, feed_url, debug=debug) if body else []
+        if events:
+            meta.update(feed_meta)
+            meta['feed'] = feed_url
+            return _finish_rows(company, events, feed_url, notion, local_only, debug, meta)
+        log.info('feed.empty', url=feed_url)
+    html = await _fetch_page(company, url, meta, offline_html_path, probed=probed)
+    if html is None:
+        return []
+    events = await extract_company_events(company, html, url, debug=debug, learned=learned, meta=meta)
+    return _finish_rows(company, events, url, notion, local_only, debug, meta)
+
+def _finish_rows(company, events, url, notion, local_only, debug, meta):
+    rows = build_rows(company, events, url, notion=notion, local_only=local_only, debug=debug)
+    with metrics.span('dedup'):
+        rows, collapsed = dedup_rows(rows)
+    meta['dedup'] = {'collapsed': collapsed}
+    if collapsed:
+        log.info('dedup.collapsed', rows=collapsed)
+    if meta.get('fetch', {}).get('sha256'):
+        record_rows(company.get('id'), meta['fetch']['sha256'], rows)
+    return rows
+
+def _inline_figcaption_events(html):
+    # Fast path for offline + inline_detail: parse figcaptions directly to avoid the heavier extractor
+    from bs4 import BeautifulSoup
+    import re
+    soup = BeautifulSoup(html, 'html.parser')
+    shows = []
+    for fc in soup.select('figcaption'):
+        title_el = fc.select_one('h1,h2,h3')
+        dates_el = fc.select_one('.prod-dates,.dates,.date')
+        if not title_el:
+            continue
+        title = title_el.get_text(strip=True)
+        dates_text = dates_el.get_text(strip=True) if dates_el else None
+        if dates_text and not re.search(r'\d{4}', dates_text):
+            # append current year
+            dates_text = f"{dates_text} {current_date().year}"
+        shows.append({'title': title, 'dates_text': dates_text, 'url': None, 'venue': None})
+    return shows
+
+async def extract_company_events(company, html, url, debug: bool=False, learned=None, meta=None):
+    """Run the enabled extraction strategies over a fetched page; returns raw event dicts.
+
+    Order: JSON-LD, then ICS/RSS, then HTML selectors. A calendar or feed body
+    only goes through its own extractor. With `learned` (the company's entry in
+    the 'strategies' state) the page strategies follow the learned order and the
+    entry is updated; `meta['strategy']` gets this run's order and costs.
+    """
+    from scraper.extractors.feed import sniff_feed
+    kind = sniff_feed(html)
+    if kind:
+        events = []
+        if _strategy_enabled(company, kind):
+            with metrics.span('parse', strategy=kind):
+                if kind == 'ics':
+                    from scraper.extractors.ics import extract_events_from_ics
+                    events = extract_events_from_ics(html, base_url=url, tz=company.get('Timezone'))
+                else:
+                    from scraper.extractors.feed import extract_events_from_feed
+                    events = extract_events_from_feed(html, base_url=url)
+        if not events:
+            log.debug('extract.empty', name=company.get('Name'), kind=kind)
+        return events
+    enabled = [name for name in PAGE_STRATEGIES if _strategy_enabled(company, name)]
+    order, reprobe, skipped = strategy.plan(enabled, learned)
+    events, tried, winner = [], {}, None
+    for name in order + skipped:
+        if name in skipped and events:
+            break  # known-empty strategies only run when nothing else produced events
+        if events and name not in reprobe:
+            continue
+        t0 = time.perf_counter()
+        found = await _page_strategy(name, company, html, url, learned)
+        tried[name] = {'events': len(found), 'ms': (time.perf_counter() - t0) * 1000}
+        if found and not events:
+            events, winner = found, name
+    if learned is not None:
+        strategy.record(learned, tried, winner)
+    if meta is not None:
+        meta['strategy'] = strategy.summary(order, skipped, tried, winner)
+    if not events:
+        log.debug('extract.empty', name=company.get('Name'))
+    return events
+
+async def _page_strategy(name, company, html, url, learned=None):
+    """Events from one strategy over an HTML page ('jsonld' or 'html', the latter incl. inline and offline-detail paths)."""
+    if name == 'jsonld':
+        from scraper.extractors.jsonld import extract_events_from_jsonld
+        with metrics.span('parse', strategy='jsonld'):
+            return extract_events_from_jsonld(html, base_url=url)
+    from scraper.extractors.html import extract_events_from_html
+    offline_detail_dir = company.get('offline_detail_dir') or company.get('Offline Detail Dir')
+    inline_detail = company.get('inline_detail')
+    if company.get('no_network') and inline_detail:
+        with metrics.span('parse', strategy='inline'):
+            events = _inline_figcaption_events(html)
+    else:
+        with metrics.span('parse', strategy='html'):
+            maybe = extract_events_from_html(html, company, learned)
             if asyncio.isfuture(maybe):
                 events = await maybe
             else:
                 events = maybe
-        # If still empty and offline detail dir provided, try parsing each detail file as its own page
-        if not events and offline_detail_dir and os.path.isdir(offline_detail_dir):
-            detail_events = []
-            for f in pathlib.Path(offline_detail_dir).glob('*.html'):
-                try:
-                    page_html = f.read_text(encoding='utf-8')
-                except Exception:
-                    continue
-                # Minimal reuse: create pseudo company clone with single-page html selectors
-                # We rely on existing detail selectors (registry) so push through extractor again
-                # by simulating list omission but detail map active
-                sub = extract_events_from_html(page_html, company)
-                if asyncio.isfuture(sub):
-                    sub = await sub
-                detail_events.extend(sub)
-            # de-duplicate by title
-            seen_titles = set()
-            merged = []
-            for e in detail_events:
-                t = e.get('title')
-                if t and t not in seen_titles:
-                    seen_titles.add(t)
-                    merged.append(e)
-            if merged:
-                print(f"[OFFLINE] Added {len(merged)} events from offline detail snapshots")
-                events = merged
-    if not events and (debug or DEBUG):
-        print(f"[WARN] no events parsed for {company.get('Name')} ({company.get('id')})")
+    # If still empty and offline detail dir provided, try parsing each detail file as its own page
+    if not events and offline_detail_dir and os.path.isdir(offline_detail_dir):
+        detail_events = []
+        for f in pathlib.Path(offline_detail_dir).glob('*.html'):
+            try:
+                page_html = f.read_text(encoding='utf-8')
+            except Exception:
+                continue
+            # Minimal reuse: create pseudo company clone with single-page html selectors
+            # We rely on existing detail selectors (registry) so push through extractor again
+            # by simulating list omission but detail map active
+            sub = extract_events_from_html(page_html, company)
+            if asyncio.isfuture(sub):
+                sub = await sub
+            detail_events.extend(sub)
+        # de-duplicate by title
+        seen_titles = set()
+        merged = []
+        for e in detail_events:
+            t = e.get('title')
+            if t and t not in seen_titles:
+                seen_titles.add(t)
+                merged.append(e)
+        if merged:
+            log.info('extract.offline_detail', events=len(merged))
+            events = merged
+    return events
 
+def build_rows(company, events, url, notion=None, local_only=False, debug: bool=False):
+    """Normalize, date-parse and resolve raw events into output rows."""
     tz = company.get('Timezone') or os.getenv('TIMEZONE_DEFAULT', 'UTC')
     rows = []
+    # per-row stage times are summed and recorded as one span per stage per company
+    t_norm = t_dates = t_resolve = 0.0
+    clock = time.perf_counter
     for e in events:
+        t0 = clock()
         clean = normalize_event(e, tz)
+        t1 = clock()
         start, end, date_conf = parse_dates(
             clean.get('dates_text'), tz, clean.get('start_date'), clean.get('end_date')
         )
+        t2 = clock()
+        t_norm += t1 - t0
+        t_dates += t2 - t1
         title_display = clean.get('title')
         venue = clean.get('venue')
         show_url = clean.get('url')
-        source_hash = hashlib.sha1(
-            f"{company['id']}|{title_display}|{start}|{end}|{venue}".encode('utf-8')
-        ).hexdigest()
+        row_hash = source_hash(company['id'], title_display, start, end, venue)
 
+        t3 = clock()
         if notion and not local_only:
             play_id, confidence = resolve_play(title_display, notion)
             canonical_title = None
@@ -131,11 +262,10 @@ async def process_company(notion, company, local_only=False, debug: bool=False):
             play_id = None
             confidence = m['confidence']
             canonical_title = m['canonical_title']
+        t_resolve += clock() - t3
 
-        if (not start or not end) and (debug or DEBUG):
-            print(
-                f"[DATE?] Missing start/end for '{title_display}' raw='{clean.get('dates_text')}'"
-            )
+        if not start or not end:
+            log.debug('dates.missing', title=title_display, raw=clean.get('dates_text'))
         rows.append(
             {
                 'company_id': company['id'],
@@ -146,9 +276,10 @@ async def process_company(notion, company, local_only=False, debug: bool=False):
                 'start_date': start,
                 'end_date': end,
                 'venue': venue,
+                'description': clean.get('description'),
                 'show_url': show_url,
                 'source_page': url,
-                'source_hash': source_hash,
+                'source_hash': row_hash,
                 'match_confidence': confidence,
                 'raw_dates_text': clean.get('dates_text'),
                 'date_confidence': date_conf,
@@ -156,20 +287,92 @@ async def process_company(notion, company, local_only=False, debug: bool=False):
                 'play_id': play_id,
             }
         )
+    if events:
+        resolver = 'notion' if notion and not local_only else 'local'
+        metrics.record_span('normalize', t_norm, company=company.get('id'))
+        metrics.record_span('date_parse', t_dates, company=company.get('id'))
+        metrics.record_span('resolve', t_resolve, company=company.get('id'), strategy=resolver)
     return rows
 
-async def scrape_all(registry_path=None, notion_enabled=True, debug: bool=False, only_ids=None):
+def company_config_hash(company) -> str:
+    """sha1 of everything in a company's config that shapes its rows."""
+    blob = json.dumps(company, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()
+
+async def _probe_company(company, probe_state, run_meta):
+    """Probe the company page; return the previous rows when it is unchanged, else None."""
+    url = company.get('Productions URL') or company.get('Homepage URL')
+    if not url or company.get('no_network') or company.get('Status') == 'paused':
+        return None, None
+    prev = probe_state.get(company['id']) or {}
+    if prev.get('url') != url or prev.get('config') != company_config_hash(company):
+        prev = {}  # moved, or selectors/field map/strategy/timezone edited: the stored rows are not reusable
+    pr = await probe_url(url, prev.get('validators'), section=company.get('HTML List Selector'))
+    reuse = pr['changed'] is False and prev.get('rows') is not None
+    result = 'hit' if reuse else ('error' if pr['changed'] is None else 'miss')
+    run_meta['probe'] = {'result': result, 'method': pr['method']}
+    metrics.CACHE_REQUESTS.inc(cache='probe', result=result)
+    return (prev['rows'] if reuse else None), pr
+
+async def _scrape_company(c, notion, notion_enabled, debug, probe, probe_state, strategy_state=None):
+    run_meta = {}
+    t_company = time.perf_counter()
+    rows, pr = (await _probe_company(c, probe_state, run_meta)) if probe else (None, None)
+    if rows is None:
+        rows = await process_company(
+            notion if notion_enabled else None,
+            c,
+            local_only=not notion_enabled,
+            debug=debug,
+            meta=run_meta,
+            learned=strategy_state.setdefault(c['id'], {}) if strategy_state is not None else None,
+            # the probe already read the page on a body-hash miss; browser-rendered companies still fetch
+            probed=pr.get('body') if pr is not None and _heavy_mode(c) is None else None
+        )
+        if pr is not None and pr['changed'] is not None and not run_meta.get('fetch', {}).get('error'):
+            probe_state[c['id']] = {
+                'url': c.get('Productions URL') or c.get('Homepage URL'),
+                'config': company_config_hash(c),
+                'validators': pr['validators'],
+                'rows': rows,
+                'checked_at': now_utc().isoformat(),
+            }
+    run_meta['elapsed_ms'] = round((time.perf_counter() - t_company) * 1000, 1)
+    with metrics.span('staleness'):
+        stale_data = analyze_staleness(c, rows)
+    if stale_data['stale']:
+        log.info('staleness.stale', name=c.get('Name'), reasons=','.join(stale_data['reasons']))
+    metrics.COMPANY_EVENTS.observe(len(rows))
+    metrics.EVENTS_TOTAL.inc(len(rows))
+    return {
+        'company': {
+            'id': c['id'],
+            'name': c.get('Name'),
+            'url': c.get('Productions URL') or c.get('Homepage URL')
+        },
+        'events': rows,
+        'meta': {**stale_data, **run_meta}
+    }
+
+async def scrape_all(registry_path=None, notion_enabled=True, debug: bool=False, only_ids=None, probe: bool=False, replay: bool=False, on_company=None, shard=None, finish: bool=True, learn: bool=True):
+    """Scrape every registry/Notion company (or one shard's share); `on_company(entry)` is called as each one completes.
+
+    `finish=False` leaves the metrics run open so the caller's own spans (export) are counted in it.
+    `learn=False` (always for replay) still follows the learned strategies and probe validators
+    but writes neither back, for one-off runs such as `--only` or a profile.
+    """
     notion = None
     companies = []
     if registry_path:
         companies.extend(load_registry(registry_path))
     if notion_enabled:
         try:
+            from db.notion_client import NotionDB  # never imported for --no-notion runs
             notion = NotionDB()
             companies.extend(notion.list_companies())
         except KeyError:
             if not companies:
-                print("No Notion credentials; registry only mode.")
+                log.warning('notion.no_credentials', mode='registry_only')
     uniq_map = {c['id']: c for c in companies}
     if only_ids:
         subset = {}
@@ -179,30 +382,24 @@ async def scrape_all(registry_path=None, notion_enabled=True, debug: bool=False,
         uniq = subset.values()
     else:
         uniq = uniq_map.values()
+    uniq = select_shard(uniq, shard)
+    if replay:
+        # serve every company from the snapshot archive; no network, no probes
+        uniq = [{**c, 'replay': True} for c in uniq]
+        probe = learn = False
     results = []
     tavern_company = None
+    probe_state = load_state('probes') if probe else {}
+    strategy_state = load_state('strategies')
+    metrics.start_run()
     for c in uniq:
         if c.get('id') == 'sta':
             tavern_company = c
             continue  # skip for now; we'll append offline
-        rows = await process_company(
-            notion if notion_enabled else None,
-            c,
-            local_only=not notion_enabled,
-            debug=debug
-        )
-        stale_data = analyze_staleness(c, rows)
-        if stale_data['stale']:
-            print(f"[STALE] {c.get('Name')} reasons={','.join(stale_data['reasons'])}")
-        results.append({
-            'company': {
-                'id': c['id'],
-                'name': c.get('Name'),
-                'url': c.get('Productions URL') or c.get('Homepage URL')
-            },
-            'events': rows,
-            'meta': stale_data
-        })
+        with metrics.company_scope(c['id']):
+            results.append(await _scrape_company(c, notion, notion_enabled, debug, probe, probe_state, strategy_state))
+        if on_company:
+            on_company(results[-1])
     # Append offline tavern events at end
     if tavern_company and tavern_company.get('no_network'):
         try:
@@ -218,36 +415,101 @@ async def scrape_all(registry_path=None, notion_enabled=True, debug: bool=False,
                 'events': tavern_rows,
                 'meta': stale_data
             })
+            if on_company:
+                on_company(results[-1])
         except Exception as e:
-            print(f"[STA-OFFLINE-MERGE-ERR] {e}")
+            log.error('sta.offline_merge_failed', error=e)
+    if not replay:
+        try:
+            apply_retention()
+        except Exception as e:
+            log.error('archive.retention_failed', error=e)
+    # shards on one host share the state dir: only overwrite the companies this run scraped
+    ran = [c['id'] for c in uniq]
+    if learn:
+        merge_state('strategies', {cid: strategy_state[cid] for cid in ran if cid in strategy_state})
+    if probe and learn:
+        merge_state('probes', {cid: probe_state[cid] for cid in ran if cid in probe_state})
+    if probe:
+        for dom, counts in summarize_probes(results).items():
+            log.info('probe.summary', domain=dom, **counts)
+    if finish:
+        _finish_run()
     return results
 
-async def main(registry_path=None, notion_enabled=True, export_path=None, export_fmt='json', pretty=False, debug=False, stale_report_path=None, only_ids=None):
-    all_results = await scrape_all(registry_path=registry_path, notion_enabled=notion_enabled, debug=debug, only_ids=only_ids)
+def _finish_run():
+    timings = metrics.finish_run()
+    log.info('run.timing', wall_ms=round(timings['wall_ms']), **{f"{k}_ms": round(v['total_ms']) for k, v in timings['stages'].items()})
+    return timings
+
+def build_summary(all_results, probe: bool=False, shard=None):
+    """Export `_summary`: event/stale counts, probe results and the current (or last) run's stage timings."""
+    total_events = sum(len(c['events']) for c in all_results)
+    total_shakes = sum(sum(1 for e in c['events'] if e.get('is_shakespeare')) for c in all_results)
+    stale_companies = [c for c in all_results if c.get('meta', {}).get('stale')]
+    # severity weighting
+    sev_weights = {'high':3,'medium':2,'low':1,None:0}
+    sev_counts = {'high':0,'medium':0,'low':0}
+    weighted_total = 0
+    for c in stale_companies:
+        sev = c.get('meta', {}).get('severity')
+        if sev in sev_counts:
+            sev_counts[sev] += 1
+        weighted_total += sev_weights.get(sev, 0)
+    summary = {
+        'total_events': total_events,
+        'shakespeare_events': total_shakes,
+        'stale_companies': len(stale_companies),
+        'stale_severity_counts': sev_counts,
+        'stale_severity_weighted': weighted_total
+    }
+    if probe:
+        summary['probes'] = summarize_probes(all_results)
+    timings = metrics.run_timings() or metrics.last_run()
+    if timings:
+        summary['timings'] = timings
+    if shard:
+        summary['shard'] = {'index': shard[0], 'count': shard[1]}
+    return summary
+
+def merge_results(paths):
+    """Load shard exports and rebuild one `(companies, _summary)` as an unsharded run would."""
+    parts = [load_part(p) for p in paths]
+    companies, shards, missing = merge_parts(parts)
+    summary = build_summary(companies, probe=any('probes' in (p.get('_summary') or {}) for p in parts))
+    summary['shards'] = shards
+    if missing:
+        summary['missing_shards'] = missing
+        log.warning('merge.missing_shards', missing=missing, count=shards[0]['count'])
+    return companies, summary
+
+async def main(registry_path=None, notion_enabled=True, export_path=None, export_fmt='json', pretty=False, debug=False, stale_report_path=None, only_ids=None, probe=False, replay=False, profile=None, profile_out='profile', publish=False, shard=None, merge_paths=None, export_dir=None):
+    if debug:
+        log.configure(level='debug')
+    if merge_paths:
+        all_results, summary = merge_results(merge_paths)
+        wall_ms = max((s['wall_ms'] or 0 for s in summary['shards']), default=0)
+    else:
+        run = lambda: scrape_all(registry_path=registry_path, notion_enabled=notion_enabled, debug=debug, only_ids=only_ids, probe=probe, replay=replay, shard=shard, finish=False, learn=not (only_ids or profile))
+        try:
+            if profile:
+                from scraper.profiling import profile_async, format_top, save_report
+                all_results, report = await profile_async(run, mode=profile)
+                print(format_top(report), end='')
+                log.info('profile.written', paths=','.join(save_report(report, profile_out)))
+            else:
+                all_results = await run()
+        finally:
+            await close_pool()
+        summary = build_summary(all_results, probe=probe, shard=shard)  # timings so far; files can't time their own write
+    if export_dir:
+        with metrics.span('export'):
+            out = export_partitioned({'companies': all_results, '_summary': summary}, export_dir, fmt=export_fmt, pretty=pretty)
+        print(f"[OUT] Wrote {out['manifest']} (partitions={out['partitions']}, written={out['written']}, unchanged={out['unchanged']}, removed={out['removed']})")
     if export_path:
-        # compute summary
-        total_events = sum(len(c['events']) for c in all_results)
-        total_shakes = sum(sum(1 for e in c['events'] if e.get('is_shakespeare')) for c in all_results)
-        stale_companies = [c for c in all_results if c.get('meta', {}).get('stale')]
-        stale_count = len(stale_companies)
-        # severity weighting
-        sev_weights = {'high':3,'medium':2,'low':1,None:0}
-        sev_counts = {'high':0,'medium':0,'low':0}
-        weighted_total = 0
-        for c in stale_companies:
-            sev = c.get('meta', {}).get('severity')
-            if sev in sev_counts:
-                sev_counts[sev] += 1
-            weighted_total += sev_weights.get(sev, 0)
-        summary = {
-            'total_events': total_events,
-            'shakespeare_events': total_shakes,
-            'stale_companies': stale_count,
-            'stale_severity_counts': sev_counts,
-            'stale_severity_weighted': weighted_total
-        }
-        export_data({'companies': all_results, '_summary': summary}, export_path, fmt=export_fmt, pretty=pretty)
-        print(f"[OUT] Wrote {export_path} (events={total_events}, shakespeare={total_shakes}, stale_companies={stale_count}, severity_weight={weighted_total})")
+        with metrics.span('export'):
+            export_data({'companies': all_results, '_summary': summary}, export_path, fmt=export_fmt, pretty=pretty)
+        print(f"[OUT] Wrote {export_path} (events={summary['total_events']}, shakespeare={summary['shakespeare_events']}, stale_companies={summary['stale_companies']}, severity_weight={summary['stale_severity_weighted']})")
         if stale_report_path:
             stale_only = [
                 {
@@ -260,8 +522,8 @@ async def main(registry_path=None, notion_enabled=True, export_path=None, export
             payload = {
                 'generated_at': now_utc().isoformat(),
                 'count': len(stale_only),
-                'severity_counts': sev_counts,
-                'severity_weighted': weighted_total,
+                'severity_counts': summary['stale_severity_counts'],
+                'severity_weighted': summary['stale_severity_weighted'],
                 'stale': stale_only
             }
             p = pathlib.Path(stale_report_path)
@@ -272,6 +534,13 @@ async def main(registry_path=None, notion_enabled=True, export_path=None, export
             else:
                 p.write_text(json.dumps(payload), encoding='utf-8')
             print(f"[OUT] Wrote stale report {p} (count={len(stale_only)})")
+    if not merge_paths:
+        summary['timings'] = _finish_run()  # exports included, for the published summary and /metrics
+        wall_ms = summary['timings']['wall_ms']
+    if publish:
+        from scraper.results import publish as publish_results
+        version = publish_results(all_results, duration_sec=wall_ms / 1000, summary=summary)
+        print(f"[OUT] Published results version {version}")
 
 if __name__ == '__main__':
     import argparse
@@ -279,13 +548,25 @@ if __name__ == '__main__':
     parser.add_argument('--registry', help='Path to registry YAML')
     parser.add_argument('--no-notion', action='store_true')
     parser.add_argument('--export', help='Output file path (json or yaml)')
+    parser.add_argument('--export-dir', help='Partitioned export: one file per company plus manifest.json; only changed companies are rewritten')
     parser.add_argument('--format', default='json', choices=['json','yaml'])
     parser.add_argument('--pretty', action='store_true')
     parser.add_argument('--debug', action='store_true')
     parser.add_argument('--stale-report', help='Optional path to write stale companies report JSON')
     parser.add_argument('--only', help='Comma-separated company IDs to process')
+    parser.add_argument('--probe', action='store_true', help='HEAD/range probe each page first; reuse last rows when unchanged')
+    parser.add_argument('--replay', action='store_true', help='Re-run extraction on the latest archived snapshot of each page (no network)')
+    parser.add_argument('--profile', nargs='?', const='sample', choices=['sample', 'cprofile'], help='Profile the run (default: sampling); combine with --only for one company')
+    parser.add_argument('--publish', action='store_true', help='Store the results where the API loads them on boot (SF_RESULTS_DB)')
+    parser.add_argument('--shard', help='Scrape only shard i of N (0-based, e.g. 2/4); companies are assigned by a hash of their id')
+    parser.add_argument('--merge', nargs='+', metavar='PART', help='Combine shard exports instead of scraping (use with --export/--publish)')
+    parser.add_argument('--profile-out', default='profile', help='Path prefix for the profile files (.collapsed/.pstats and .top.txt)')
     args = parser.parse_args()
     only_ids = [s.strip() for s in args.only.split(',')] if args.only else None
+    try:
+        shard = parse_shard(args.shard) if args.shard else None
+    except ValueError as e:
+        parser.error(str(e))
     asyncio.run(main(
         registry_path=args.registry,
         notion_enabled=not args.no_notion,
@@ -294,5 +575,13 @@ if __name__ == '__main__':
         pretty=args.pretty,
         debug=args.debug,
         stale_report_path=args.stale_report,
-        only_ids=only_ids
+        only_ids=only_ids,
+        probe=args.probe,
+        replay=args.replay,
+        profile=args.profile,
+        profile_out=args.profile_out,
+        publish=args.publish,
+        shard=shard,
+        merge_paths=args.merge,
+        export_dir=args.export_dir
     ))
@@ -1,38 +1,137 @@
-import json, pathlib, yaml
+import hashlib, json, pathlib, threading, time, yaml
 
 # Load YAML registry describing companies/sites.
 # Returns list of company dicts shaped like Notion-derived rows used by scraper.
+#
+# Each path is served by one cached Registry: a call only stats the file and
+# re-reads it when (mtime, size) moved, or when the mtime is too recent to
+# trust; unchanged bytes (same sha1) skip parsing. On a real change the YAML
+# is parsed with libyaml when available, only entries whose content changed
+# are rebuilt, and the added/changed/removed ids are reported so the API can
+# re-scrape just those companies.
+#
+# Of an entry's `html:` block, list/fields map onto the Notion-style selector
+# columns and HTML_PASSTHROUGH keys are handed to the HTML extractor as
+# company['html']: `detail_links` + `detail.fields` make it fetch and merge
+# each linked detail page, `inline_detail` parses figcaption cards. Entries
+# without those keys get an empty dict and no detail crawl.
+
+_Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+HTML_PASSTHROUGH = ("detail_links", "detail", "inline_detail")
+RACY_SEC = 2.0  # files modified this recently are re-hashed even if (mtime, size) look unchanged
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def _company(entry: dict) -> dict:
+    html_cfg = entry.get("html") or {}
+    fields = html_cfg.get("fields") or {}
+    return {
+        "id": entry.get("id"),
+        "Name": entry.get("name"),
+        "Homepage URL": entry.get("url"),
+        "Productions URL": entry.get("url"),
+        "Feed URL": entry.get("feed_url"),
+        "Timezone": entry.get("timezone"),
+        "HTML List Selector": html_cfg.get("list"),
+        "HTML Field Map": json.dumps({
+            k: v for k, v in {
+                "title": fields.get("title"),
+                "dates": fields.get("dates"),
+                "url": fields.get("url"),
+                "venue": fields.get("venue")
+            }.items() if v
+        }),
+        "Scrape Strategy": entry.get("strategy") or [],
+        "Status": entry.get("status") or "active",
+        "inline_detail": html_cfg.get("inline_detail"),
+        "stop_after_list": html_cfg.get("stop_after_list"),
+        "offline_html": entry.get("offline_html"),
+        "offline_detail_dir": entry.get("offline_detail_dir"),
+        "offline_feed": entry.get("offline_feed"),
+        "no_network": entry.get("no_network"),
+        "heavy": entry.get("heavy"),
+        "html": {k: html_cfg[k] for k in HTML_PASSTHROUGH if k in html_cfg},
+        "_source": "registry",
+    }
+
+
+def _entry_hash(entry) -> str:
+    return hashlib.sha1(json.dumps(entry, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def diff_hashes(old: dict, new: dict) -> dict:
+    """{'added', 'changed', 'removed'} company ids between two {id: entry hash} maps."""
+    old, new = old or {}, new or {}
+    return {
+        'added': [i for i in new if i not in old],
+        'changed': [i for i in new if i in old and old[i] != new[i]],
+        'removed': [i for i in old if i not in new],
+    }
+
+
+class Registry:
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.companies = []
+        self.by_id = {}
+        self.hashes = {}  # id -> sha1 of its YAML entry
+        self.version = 0  # bumped on every content change
+        self.last_changes = None
+        self.stats = {'checks': 0, 'reads': 0, 'parses': 0}
+        self._stat = None
+        self._sha1 = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Re-validate against the file; returns the id diff when its content changed, else None."""
+        with self._lock:
+            self.stats['checks'] += 1
+            try:
+                st = self.path.stat()
+            except FileNotFoundError:
+                raise FileNotFoundError(str(self.path)) from None
+            stamp = (st.st_mtime_ns, st.st_size)
+            if stamp == self._stat and time.time() - st.st_mtime > RACY_SEC:
+                return None
+            raw = self.path.read_bytes()
+            self.stats['reads'] += 1
+            self._stat = stamp
+            sha1 = hashlib.sha1(raw).hexdigest()
+            if sha1 == self._sha1:
+                return None
+            self.stats['parses'] += 1
+            data = yaml.load(raw.decode('utf-8'), Loader=_Loader) or []
+            companies, hashes = [], {}
+            for entry in data:
+                h = _entry_hash(entry)
+                old = self.by_id.get(entry.get('id'))
+                reuse = old is not None and self.hashes.get(entry.get('id')) == h
+                companies.append(old if reuse else _company(entry))
+                hashes[entry.get('id')] = h
+            changes = diff_hashes(self.hashes, hashes)
+            self.companies, self.hashes, self._sha1 = companies, hashes, sha1
+            self.by_id = {c['id']: c for c in companies}
+            self.version += 1
+            self.last_changes = changes
+            return changes
+
+    def info(self):
+        return {**self.stats, 'path': str(self.path), 'version': self.version, 'companies': len(self.companies)}
+
+
+def registry_for(path) -> Registry:
+    """The shared Registry for a path (one per resolved file)."""
+    key = str(pathlib.Path(path).expanduser().resolve())
+    with _registries_lock:
+        reg = _registries.get(key)
+        if reg is None:
+            reg = _registries[key] = Registry(key)
+        return reg
+
 
 def load_registry(path: str):
-    fp = pathlib.Path(path)
-    if not fp.exists():
-        raise FileNotFoundError(path)
-    data = yaml.safe_load(fp.read_text(encoding="utf-8")) or []
-    companies = []
-    for entry in data:
-        html_cfg = entry.get("html") or {}
-        fields = html_cfg.get("fields") or {}
-        companies.append({
-            "id": entry.get("id"),
-            "Name": entry.get("name"),
-            "Homepage URL": entry.get("url"),
-            "Productions URL": entry.get("url"),
-            "Timezone": entry.get("timezone"),
-            "HTML List Selector": html_cfg.get("list"),
-            "HTML Field Map": json.dumps({
-                k: v for k, v in {
-                    "title": fields.get("title"),
-                    "dates": fields.get("dates"),
-                    "url": fields.get("url"),
-                    "venue": fields.get("venue")
-                }.items() if v
-            }),
-            "Scrape Strategy": entry.get("strategy") or [],
-            "Status": entry.get("status") or "active",
-            "inline_detail": html_cfg.get("inline_detail"),
-            "offline_html": entry.get("offline_html"),
-            "offline_detail_dir": entry.get("offline_detail_dir"),
-            "no_network": entry.get("no_network"),
-            "_source": "registry",
-        })
-    return companies
+    reg = registry_for(path)
+    reg.refresh()
+    return [dict(c) for c in reg.companies]
@@ -0,0 +1,177 @@
+"""Re-run archived snapshots through the current extraction pipeline.
+
+Every job is one stored page (an archive blob or a file under snapshots/)
+pushed through extract_company_events -> build_rows with today's registry
+and code, fully offline, in a process pool. Each job's rows are diffed
+against what was originally recorded: the rows stored with the archive blob
+at fetch time, or the company's rows in a --baseline export. "Today" is
+pinned with --today (default: the baseline's export date), as SF_TODAY does
+for any run.
+
+    python reprocess.py --registry registry.yaml --baseline out.json --today 2025-09-13
+    python reprocess.py --history --out diff.jsonl     # every archived page, not just the latest
+"""
+import argparse, asyncio, json, os, pathlib, sys, time
+from concurrent.futures import ProcessPoolExecutor
+
+from registry import load_registry
+from scraper.archive import archive_dir, iter_pages, load_blob, recorded_rows
+from scraper.changes import diff_rows
+
+_LOOP = None
+
+
+def _init_worker(today, archive):
+    global _LOOP
+    sys.stdout = sys.stderr  # extractor chatter must not interleave with the JSON-lines diff
+    os.environ['SF_TODAY'] = today
+    if archive:
+        os.environ['SF_ARCHIVE_DIR'] = archive
+    _LOOP = asyncio.new_event_loop()
+
+
+def _run_job(job):
+    # imported here so the parent process stays light; workers pay it once
+    from main import extract_company_events, build_rows
+    company = {**job['company'], 'replay': True}
+    url = job['url']
+    t0 = time.perf_counter()
+    try:
+        if job['source'] == 'archive':
+            html = load_blob(job['key'])
+        else:
+            html = pathlib.Path(job['key']).read_text(encoding='utf-8')
+        events = _LOOP.run_until_complete(extract_company_events(company, html, url))
+        rows = build_rows(company, events, url, local_only=True)
+    except Exception as e:
+        return {'company': company['id'], 'source': job['source'], 'key': job['key'], 'error': str(e)[:200]}
+    out = {
+        'company': company['id'],
+        'source': job['source'],
+        'key': job['key'],
+        'fetched_at': job.get('fetched_at'),
+        'rows': len(rows),
+        'ms': round((time.perf_counter() - t0) * 1000, 1),
+    }
+    if job.get('baseline') is None:
+        out['baseline'] = False
+    else:
+        out['baseline'] = True
+        out.update(diff_rows(job['baseline'], rows))
+    return out
+
+
+def _baseline_rows(path):
+    data = json.loads(pathlib.Path(path).read_text(encoding='utf-8'))
+    return {c['company']['id']: c.get('events', []) for c in data.get('companies', [])}, data
+
+
+def collect_jobs(companies, snapshots_root='snapshots', history=False, baseline=None):
+    """List reprocess jobs: the latest page per company, plus all history when asked."""
+    baseline = baseline or {}
+    by_id = {c['id']: c for c in companies}
+    latest = {}
+    archived = []
+    for p in iter_pages():
+        c = by_id.get(p['company'])
+        if not c or p['url'] != (c.get('Productions URL') or c.get('Homepage URL')):
+            continue  # detail pages are served to workers through replay lookups
+        archived.append(p)
+        latest[p['company']] = p
+    jobs = []
+    used = set()
+    for c in companies:
+        url = c.get('Productions URL') or c.get('Homepage URL')
+        p = latest.get(c['id'])
+        offline = c.get('offline_html')
+        if p:
+            job = {'company': c, 'url': url, 'source': 'archive', 'key': p['sha256'], 'fetched_at': p['fetched_at']}
+            job['baseline'] = baseline.get(c['id'], recorded_rows(c['id'], p['sha256']))
+        elif offline and pathlib.Path(offline).exists():
+            job = {'company': c, 'url': url, 'source': 'snapshot', 'key': str(pathlib.Path(offline))}
+            job['baseline'] = baseline.get(c['id'])
+        else:
+            continue
+        used.add((c['id'], job['key']))
+        jobs.append(job)
+    if not history:
+        return jobs
+    for p in archived:
+        if (p['company'], p['sha256']) in used:
+            continue
+        used.add((p['company'], p['sha256']))
+        c = by_id[p['company']]
+        jobs.append({
+            'company': c, 'url': p['url'], 'source': 'archive', 'key': p['sha256'],
+            'fetched_at': p['fetched_at'], 'baseline': recorded_rows(c['id'], p['sha256']),
+        })
+    root = pathlib.Path(snapshots_root)
+    if root.is_dir():
+        for f in sorted(root.rglob('*.html')):
+            cid = f.relative_to(root).parts[0]
+            if cid not in by_id or (cid, str(f)) in used:
+                continue
+            used.add((cid, str(f)))
+            c = by_id[cid]
+            jobs.append({
+                'company': c, 'url': c.get('Productions URL') or c.get('Homepage URL'),
+                'source': 'snapshot', 'key': str(f), 'baseline': None,
+            })
+    return jobs
+
+
+def reprocess(jobs, today, workers=None, out=sys.stdout):
+    """Run jobs in a process pool, streaming one JSON line per job to `out`. Returns totals."""
+    totals = {'jobs': len(jobs), 'errors': 0, 'rows': 0, 'added': 0, 'removed': 0, 'changed': 0, 'today': today}
+    t0 = time.perf_counter()
+    archive = str(archive_dir()) if archive_dir() else None
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(today, archive)) as pool:
+        chunk = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 8))
+        for res in pool.map(_run_job, jobs, chunksize=chunk):
+            if res.get('error'):
+                totals['errors'] += 1
+            else:
+                totals['rows'] += res['rows']
+                for k in ('added', 'removed', 'changed'):
+                    totals[k] += len(res.get(k, []))
+            out.write(json.dumps(res, ensure_ascii=False, sort_keys=True) + '\n')
+    totals['seconds'] = round(time.perf_counter() - t0, 2)
+    totals['pages_per_sec'] = round(len(jobs) / totals['seconds'], 1) if totals['seconds'] else None
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Reprocess archived snapshots through current extractors')
+    parser.add_argument('--registry', default='registry.yaml')
+    parser.add_argument('--baseline', help='Previous export (json) to diff the latest page of each company against')
+    parser.add_argument('--history', action='store_true', help='Also reprocess every older archived page and loose snapshots/ file')
+    parser.add_argument('--snapshots', default='snapshots')
+    parser.add_argument('--only', help='Comma-separated company IDs')
+    parser.add_argument('--today', help='Pin "today" (YYYY-MM-DD); defaults to the baseline export date')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--out', help='Write JSON-lines diff here instead of stdout')
+    args = parser.parse_args(argv)
+
+    companies = load_registry(args.registry)
+    if args.only:
+        wanted = {s.strip() for s in args.only.split(',')}
+        companies = [c for c in companies if c['id'] in wanted]
+    baseline, today = None, args.today
+    if args.baseline:
+        baseline, data = _baseline_rows(args.baseline)
+        stamp = (data.get('_meta') or {}).get('generated_at_utc')
+        today = today or (stamp[:10] if stamp else None)
+    today = today or time.strftime('%Y-%m-%d')
+    jobs = collect_jobs(companies, snapshots_root=args.snapshots, history=args.history, baseline=baseline)
+    out = open(args.out, 'w', encoding='utf-8') if args.out else sys.stdout
+    try:
+        totals = reprocess(jobs, today, workers=args.workers, out=out)
+    finally:
+        if args.out:
+            out.close()
+    print(f"[REPROCESS] {json.dumps(totals)}", file=sys.stderr)
+    return totals
+
+
+if __name__ == '__main__':
+    main()
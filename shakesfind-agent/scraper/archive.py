@@ -0,0 +1,238 @@
+import contextlib, contextvars, datetime as dt, gzip, hashlib, json, mmap, os, pathlib, sqlite3, tempfile, time, zlib
+
+# Content-addressed, gzip-compressed archive of every fetched page.
+#   <SF_ARCHIVE_DIR>/blobs/ab/abcd....html.gz   one blob per distinct body (sha256)
+#   <SF_ARCHIVE_DIR>/index.sqlite               (company, url, fetched_at) -> sha256
+# Identical bodies across runs share a blob; replay reads blobs via mmap.
+# A blob is written (or touched) before its index row, so retention only
+# deletes unreferenced blobs untouched for SF_ARCHIVE_GRACE_SEC.
+# SF_ARCHIVE_DIR defaults to archive/ in the project directory (not the cwd),
+# so runs started from elsewhere share one archive. Set it to off to disable,
+# or wrap a run in suspended() to keep it (and only it) out of the archive.
+
+ARCHIVE_KEEP_PER_URL = int(os.getenv('SF_ARCHIVE_KEEP', '30'))
+ARCHIVE_MAX_AGE_DAYS = int(os.getenv('SF_ARCHIVE_MAX_AGE_DAYS', '180'))
+ARCHIVE_GRACE_SEC = float(os.getenv('SF_ARCHIVE_GRACE_SEC', '3600'))
+DEFAULT_ARCHIVE_DIR = pathlib.Path(__file__).resolve().parent.parent / 'archive'
+_suspended = contextvars.ContextVar('sf_archive_suspended', default=False)
+
+__all__ = ["archive_dir", "suspended", "store_page", "store_rows", "recorded_rows", "load_blob", "latest_page", "iter_pages", "apply_retention"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    company TEXT NOT NULL,
+    url TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_company_url ON pages(company, url, fetched_at);
+CREATE INDEX IF NOT EXISTS pages_sha ON pages(sha256);
+CREATE TABLE IF NOT EXISTS outputs (
+    company TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    PRIMARY KEY (company, sha256)
+);
+"""
+
+
+def archive_dir():
+    if _suspended.get():
+        return None
+    raw = os.getenv('SF_ARCHIVE_DIR')
+    if raw is None:
+        return DEFAULT_ARCHIVE_DIR
+    if not raw or raw.lower() in ('off', '0', 'none'):
+        return None
+    return pathlib.Path(raw)
+
+
+@contextlib.contextmanager
+def suspended():
+    """Archiving is off for everything run inside the block (this task and what it starts)."""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def _blob_path(root: pathlib.Path, sha: str) -> pathlib.Path:
+    return root / 'blobs' / sha[:2] / f"{sha}.html.gz"
+
+
+@contextlib.contextmanager
+def _index(root: pathlib.Path):
+    root.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(root / 'index.sqlite', timeout=30)
+    try:
+        conn.executescript(_SCHEMA)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def store_page(company_id: str, url: str, html: str, fetched_at: str = None, root: pathlib.Path = None):
+    """Archive a fetched body; returns its sha256 (None when archiving is off)."""
+    root = root or archive_dir()
+    if root is None or html is None:
+        return None
+    body = html.encode('utf-8')
+    sha = hashlib.sha256(body).hexdigest()
+    fp = _blob_path(root, sha)
+    try:
+        os.utime(fp)  # refresh the mtime so a concurrent gc leaves it alone until the row lands
+    except FileNotFoundError:
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=fp.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(gzip.compress(body, compresslevel=6, mtime=0))
+        os.replace(tmp, fp)
+    fetched_at = fetched_at or dt.datetime.now(dt.timezone.utc).isoformat()
+    with _index(root) as conn:
+        conn.execute(
+            "INSERT INTO pages(company, url, fetched_at, sha256, size) VALUES (?,?,?,?,?)",
+            (company_id or '', url, fetched_at, sha, len(body)),
+        )
+    return sha
+
+
+def store_rows(company_id: str, sha: str, rows: list, root: pathlib.Path = None):
+    """Record the rows the pipeline produced from blob `sha` (latest wins)."""
+    root = root or archive_dir()
+    if root is None or not sha:
+        return
+    with _index(root) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO outputs(company, sha256, recorded_at, rows) VALUES (?,?,?,?)",
+            (company_id or '', sha, dt.datetime.now(dt.timezone.utc).isoformat(), json.dumps(rows, ensure_ascii=False)),
+        )
+
+
+def recorded_rows(company_id: str, sha: str, root: pathlib.Path = None):
+    """Rows recorded for (company, blob) at fetch time, or None."""
+    root = root or archive_dir()
+    if root is None or not (root / 'index.sqlite').exists():
+        return None
+    with _index(root) as conn:
+        row = conn.execute(
+            "SELECT rows FROM outputs WHERE company=? AND sha256=?", (company_id or '', sha)
+        ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def load_blob(sha: str, root: pathlib.Path = None) -> str:
+    """Decompress a blob straight out of a read-only memory map."""
+    root = root or archive_dir()
+    fp = _blob_path(root, sha)
+    with fp.open('rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return zlib.decompress(mm, wbits=31).decode('utf-8')
+
+
+def latest_page(company_id: str, url: str = None, root: pathlib.Path = None):
+    """Most recent archived body for a company (optionally a specific URL) or None."""
+    root = root or archive_dir()
+    if root is None or not (root / 'index.sqlite').exists():
+        return None
+    with _index(root) as conn:
+        if url:
+            row = conn.execute(
+                "SELECT sha256 FROM pages WHERE company=? AND url=? ORDER BY fetched_at DESC LIMIT 1",
+                (company_id or '', url),
+            ).fetchone()
+        else:
+            row = conn.execute(
+                "SELECT sha256 FROM pages WHERE company=? ORDER BY fetched_at DESC LIMIT 1",
+                (company_id or '',),
+            ).fetchone()
+    if not row or not _blob_path(root, row[0]).exists():
+        return None
+    return load_blob(row[0], root)
+
+
+def iter_pages(company_id: str = None, root: pathlib.Path = None):
+    """Yield index rows as dicts (company, url, fetched_at, sha256, size), oldest first."""
+    root = root or archive_dir()
+    if root is None or not (root / 'index.sqlite').exists():
+        return
+    q = "SELECT company, url, fetched_at, sha256, size FROM pages"
+    args = ()
+    if company_id:
+        q += " WHERE company=?"
+        args = (company_id,)
+    q += " ORDER BY company, url, fetched_at"
+    with _index(root) as conn:
+        rows = conn.execute(q, args).fetchall()
+    for company, url, fetched_at, sha, size in rows:
+        yield {'company': company, 'url': url, 'fetched_at': fetched_at, 'sha256': sha, 'size': size}
+
+
+def apply_retention(keep_per_url: int = None, max_age_days: int = None, root: pathlib.Path = None, now: dt.datetime = None,
+                    grace_sec: float = None):
+    """Drop index rows past the retention policy, then delete unreferenced blobs.
+
+    Keeps at most `keep_per_url` snapshots per (company, url) and nothing older
+    than `max_age_days`, except that the newest snapshot of each URL is always kept.
+    Unreferenced blobs modified within `grace_sec` may belong to a store_page
+    whose index row is not in yet and are left for the next pass.
+    Returns {'rows_removed': n, 'blobs_removed': n}.
+    """
+    root = root or archive_dir()
+    if root is None or not (root / 'index.sqlite').exists():
+        return {'rows_removed': 0, 'blobs_removed': 0}
+    keep = keep_per_url if keep_per_url is not None else ARCHIVE_KEEP_PER_URL
+    max_age = max_age_days if max_age_days is not None else ARCHIVE_MAX_AGE_DAYS
+    cutoff = ((now or dt.datetime.now(dt.timezone.utc)) - dt.timedelta(days=max_age)).isoformat()
+    with _index(root) as conn:
+        rows = conn.execute(
+            "SELECT rowid, company, url, fetched_at FROM pages ORDER BY company, url, fetched_at DESC"
+        ).fetchall()
+        doomed = []
+        rank = {}
+        for rowid, company, url, fetched_at in rows:
+            n = rank.get((company, url), 0)
+            rank[(company, url)] = n + 1
+            if n == 0:
+                continue
+            if n >= keep or fetched_at < cutoff:
+                doomed.append((rowid,))
+        conn.executemany("DELETE FROM pages WHERE rowid=?", doomed)
+        live = {r[0] for r in conn.execute("SELECT DISTINCT sha256 FROM pages")}
+        conn.execute("DELETE FROM outputs WHERE sha256 NOT IN (SELECT DISTINCT sha256 FROM pages)")
+    settled = time.time() - (grace_sec if grace_sec is not None else ARCHIVE_GRACE_SEC)
+    blobs_removed = 0
+    for fp in (root / 'blobs').glob('*/*.html.gz'):
+        if fp.name[:-len('.html.gz')] in live:
+            continue
+        try:
+            if fp.stat().st_mtime > settled:
+                continue
+            fp.unlink()
+        except FileNotFoundError:
+            continue
+        blobs_removed += 1
+    return {'rows_removed': len(doomed), 'blobs_removed': blobs_removed}
+
+
+if __name__ == '__main__':
+    import argparse, json
+    parser = argparse.ArgumentParser(description='Snapshot archive maintenance')
+    parser.add_argument('command', choices=['stats', 'gc'])
+    parser.add_argument('--keep', type=int, help='Snapshots kept per (company, url)')
+    parser.add_argument('--max-age-days', type=int)
+    args = parser.parse_args()
+    if args.command == 'gc':
+        print(json.dumps(apply_retention(args.keep, args.max_age_days)))
+    else:
+        pages = list(iter_pages())
+        root = archive_dir()
+        blobs = list((root / 'blobs').glob('*/*.html.gz')) if root and (root / 'blobs').exists() else []
+        print(json.dumps({
+            'pages': len(pages),
+            'blobs': len(blobs),
+            'raw_bytes': sum(p['size'] for p in pages),
+            'stored_bytes': sum(b.stat().st_size for b in blobs),
+        }))
@@ -0,0 +1,66 @@
+import asyncio, itertools, json, os
+
+from .changes import company_delta
+
+# Fan-out of scrape progress to many stream subscribers (SSE).
+# Every subscriber has its own bounded queue. publish() never blocks the
+# scraper: a subscriber whose queue is full is marked lagged, its backlog is
+# dropped and a single 'resync' event tells it to re-fetch /productions.
+
+BUFFER = int(os.getenv('SF_STREAM_BUFFER', '256'))
+MAX_SUBSCRIBERS = int(os.getenv('SF_STREAM_MAX_SUBSCRIBERS', '1000'))
+
+
+class Subscriber:
+    def __init__(self, maxsize):
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def offer(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # slow consumer: drop its backlog rather than grow memory or stall the producer
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait((item[0], 'resync', {'reason': 'lagged', 'dropped': self.dropped}))
+
+
+class Broker:
+    def __init__(self, buffer=None, max_subscribers=None):
+        self.buffer = buffer or BUFFER
+        self.max_subscribers = max_subscribers or MAX_SUBSCRIBERS
+        self.subscribers = set()
+        self._ids = itertools.count(1)
+        self.published = 0
+
+    def subscribe(self):
+        """New Subscriber, or None when the subscriber limit is reached."""
+        if len(self.subscribers) >= self.max_subscribers:
+            return None
+        sub = Subscriber(self.buffer)
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        self.subscribers.discard(sub)
+
+    def publish(self, event: str, data: dict):
+        item = (next(self._ids), event, data)
+        self.published += 1
+        for sub in list(self.subscribers):
+            sub.offer(item)
+        return item[0]
+
+    def info(self):
+        return {'subscribers': len(self.subscribers), 'published': self.published,
+                'lagged_drops': sum(s.dropped for s in self.subscribers)}
+
+
+def sse_format(item) -> bytes:
+    event_id, event, data = item
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n".encode('utf-8')
+
+
+company_changes = company_delta  # per-company delta streamed as 'productions'
@@ -0,0 +1,60 @@
+import os
+from collections import OrderedDict
+
+# Bounded LRU of encoded query responses for one result generation.
+# Keys are normalized query parameters (see productions_key); the API swaps
+# in a fresh cache when it installs a new generation, so stale entries can
+# never be served and invalidation is a single assignment.
+
+QUERY_CACHE_SIZE = int(os.getenv('SF_QUERY_CACHE_SIZE', '256'))
+QUERY_CACHE_MAX_BYTES = int(os.getenv('SF_QUERY_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+
+def productions_key(company=None, play=None, fmt='json', encoding=None):
+    """Normalize /productions parameters the same way the filter compares them."""
+    company = (company or '').strip() or None
+    play = (play or '').replace(' ', '').lower() or None
+    return ('productions', company, play, fmt, encoding)
+
+
+class QueryCache:
+    def __init__(self, maxsize=None, max_bytes=None, version=None, stats=None):
+        self.maxsize = maxsize or QUERY_CACHE_SIZE
+        self.max_bytes = max_bytes or QUERY_CACHE_MAX_BYTES
+        self.version = version
+        self._data = OrderedDict()
+        self._bytes = 0
+        # stats survive generation swaps so /health shows lifetime numbers
+        self.stats = stats if stats is not None else {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, key):
+        hit = self._data.get(key)
+        if hit is None:
+            self.stats['misses'] += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats['hits'] += 1
+        return hit[0]
+
+    def put(self, key, value, size: int):
+        if size > self.max_bytes:
+            return
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._data[key] = (value, size)
+        self._bytes += size
+        while len(self._data) > self.maxsize or self._bytes > self.max_bytes:
+            _, (_, dropped) = self._data.popitem(last=False)
+            self._bytes -= dropped
+            self.stats['evictions'] += 1
+
+    def renew(self, version):
+        """Empty cache for a new generation, carrying the stats over."""
+        self.stats['invalidations'] += 1
+        return QueryCache(self.maxsize, self.max_bytes, version=version, stats=self.stats)
+
+    def info(self):
+        total = self.stats['hits'] + self.stats['misses']
+        return {**self.stats, 'entries': len(self._data), 'bytes': self._bytes, 'maxsize': self.maxsize,
+                'version': self.version, 'hit_ratio': round(self.stats['hits'] / total, 3) if total else None}
@@ -0,0 +1,124 @@
+import datetime, email.utils, hashlib, time
+
+from shakespeare_plays import SHAKESPEARE_PLAYS
+
+# Subscribable iCalendar feeds, rendered when a generation is installed:
+#   ('play', slug)     every dated production of one play, all companies
+#   ('company', id)    every dated production of one company
+# Each row becomes one all-day VEVENT (UID = source_hash), rendered with the
+# `ics` package once per distinct row content and shared by the row's play
+# and company feeds. A feed is only re-assembled when its rows' content
+# changed; otherwise the previous body, ETag and Last-Modified carry over.
+# Like search.SearchIndex, a FeedSet is immutable once built.
+
+PLAY_SLUGS = {p['title']: p['slug'] for p in SHAKESPEARE_PLAYS}
+_SLUG_LOOKUP = {p['slug'].lower(): p['slug'] for p in SHAKESPEARE_PLAYS}
+_ROW_FIELDS = ('source_hash', 'title_display', 'company_name', 'start_date', 'end_date', 'venue', 'show_url', 'description')
+
+__all__ = ["FeedSet", "render_event", "PLAY_SLUGS"]
+
+
+def _row_key(row):
+    return tuple(row.get(f) for f in _ROW_FIELDS)
+
+
+def _stamp(generated_at=None) -> str:
+    when = _parse_time(generated_at) or datetime.datetime.now(datetime.timezone.utc)
+    return when.strftime('%Y%m%dT%H%M%SZ')
+
+
+def _parse_time(value):
+    try:
+        return datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00')).astimezone(datetime.timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+def render_event(row, stamp: str) -> str:
+    """One VEVENT for a dated row (the run as an all-day span), or None for undated rows."""
+    from ics import Event  # pulls in arrow: only paid when feeds are rendered
+    from ics.grammar.parse import ContentLine
+    if not row.get('start_date'):
+        return None
+    notes = [row.get('company_name'), row.get('description'), row.get('show_url')]
+    event = Event(
+        name=row.get('title_display') or row.get('canonical_title') or 'Untitled',
+        begin=row['start_date'],
+        end=row.get('end_date') if (row.get('end_date') or '') >= row['start_date'] else None,
+        uid=f"{row.get('source_hash') or hashlib.sha1(repr(_row_key(row)).encode()).hexdigest()}@shakesfind",
+        location=row.get('venue') or None,
+        url=row.get('show_url') or None,
+        description='\n'.join(n for n in notes if n) or None,
+    )
+    event.make_all_day()  # DTEND becomes the exclusive day after the last performance
+    event.extra.append(ContentLine(name='DTSTAMP', value=stamp))
+    return event.serialize()
+
+
+def _calendar(name: str, events) -> bytes:
+    from ics.utils import escape_string
+    head = ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//ShakesFind//Feeds//EN', 'CALSCALE:GREGORIAN',
+            f'X-WR-CALNAME:{escape_string(name)}']
+    return ('\r\n'.join(head + list(events) + ['END:VCALENDAR']) + '\r\n').encode('utf-8')
+
+
+class FeedSet:
+    """Rendered feeds of one generation; updated() returns the next set, re-rendering only changed feeds."""
+
+    def __init__(self, feeds=None, events=None, version=None, stats=None):
+        self.feeds = feeds or {}
+        self._events = events or {}  # row key -> rendered VEVENT
+        self.version = version
+        self.stats = stats if stats is not None else {'builds': 0, 'feeds_rendered': 0, 'feeds_reused': 0,
+                                                      'events_rendered': 0, 'last_build_ms': None}
+
+    def updated(self, companies, generated_at=None, version=None):
+        t0 = time.perf_counter()
+        groups = {('play', slug): (f'{title} (ShakesFind)', []) for title, slug in PLAY_SLUGS.items()}
+        for c in companies:
+            stub = c['company']
+            mine = groups[('company', stub['id'])] = (f"{stub.get('name') or stub['id']} (ShakesFind)", [])
+            for row in c['events']:
+                if not row.get('start_date'):
+                    continue
+                mine[1].append(row)
+                slug = PLAY_SLUGS.get(row.get('canonical_title'))
+                if slug:
+                    groups[('play', slug)][1].append(row)
+        stamp = _stamp(generated_at)
+        last_modified = email.utils.format_datetime(_parse_time(generated_at) or datetime.datetime.now(datetime.timezone.utc), usegmt=True)
+        feeds, events, rendered = {}, {}, 0
+        for fid, (name, rows) in groups.items():
+            key = tuple(_row_key(r) for r in rows)
+            old = self.feeds.get(fid)
+            if old is not None and old['key'] == key:
+                feeds[fid] = old
+                for k in key:
+                    events[k] = self._events[k]
+                continue
+            texts = []
+            for k, row in zip(key, rows):
+                text = events.get(k) or self._events.get(k)
+                if text is None:
+                    text = render_event(row, stamp)
+                    self.stats['events_rendered'] += 1
+                events[k] = text
+                texts.append(text)
+            feeds[fid] = {'key': key, 'events': len(rows), 'body': _calendar(name, texts),
+                          'etag': 'W/"%s"' % hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:24],
+                          'last_modified': last_modified}
+            rendered += 1
+        self.stats['builds'] += 1
+        self.stats['feeds_rendered'] += rendered
+        self.stats['feeds_reused'] += len(feeds) - rendered
+        self.stats['last_build_ms'] = round((time.perf_counter() - t0) * 1000, 2)
+        return FeedSet(feeds, events, version, self.stats)
+
+    def get(self, kind: str, ident: str):
+        """Feed dict for ('play', slug) (slug case-insensitive) or ('company', id), or None."""
+        if kind == 'play':
+            ident = _SLUG_LOOKUP.get((ident or '').lower())
+        return self.feeds.get((kind, ident))
+
+    def info(self):
+        return {**self.stats, 'version': self.version, 'feeds': len(self.feeds), 'events': len(self._events)}
@@ -0,0 +1,100 @@
+# Row-level diffs keyed by source_hash.
+# A row is "changed" when its source_hash survives but other fields differ
+# (e.g. canonical_title after a resolver fix); fetch timestamps are ignored.
+# Company deltas ({'company', 'added': rows, 'changed', 'removed': hashes})
+# are what /events streams and what results.publish stores per version;
+# compose_deltas folds consecutive versions into one delta for /changes.
+
+IGNORED_FIELDS = {'fetched_at_utc'}
+
+__all__ = ["diff_rows", "company_delta", "generation_delta", "compose_deltas", "IGNORED_FIELDS"]
+
+
+def _strip(row: dict) -> dict:
+    return {k: v for k, v in row.items() if k not in IGNORED_FIELDS}
+
+
+def diff_rows(old_rows: list, new_rows: list) -> dict:
+    """Return {'added': [rows], 'removed': [rows], 'changed': [{'source_hash', 'fields'}]}."""
+    old = {r.get('source_hash'): r for r in old_rows or []}
+    new = {r.get('source_hash'): r for r in new_rows or []}
+    added = [new[h] for h in new if h not in old]
+    removed = [old[h] for h in old if h not in new]
+    changed = []
+    for h in new:
+        if h not in old:
+            continue
+        a, b = _strip(old[h]), _strip(new[h])
+        if a == b:
+            continue
+        fields = {k: [a.get(k), b.get(k)] for k in sorted(set(a) | set(b)) if a.get(k) != b.get(k)}
+        changed.append({'source_hash': h, 'fields': fields})
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def company_delta(company: dict, old_rows: list, new_rows: list) -> dict:
+    """Compact per-company delta: full added rows, changed fields, removed hashes."""
+    d = diff_rows(old_rows, new_rows)
+    return {
+        'company': company,
+        'added': d['added'],
+        'changed': d['changed'],
+        'removed': [r.get('source_hash') for r in d['removed']],
+    }
+
+
+def generation_delta(old_companies: list, new_companies: list) -> list:
+    """Non-empty company deltas between two generations' company entries (dropped companies lose all rows)."""
+    old = {c['company']['id']: c for c in old_companies or []}
+    out = []
+    for c in new_companies:
+        prev = old.pop(c['company']['id'], None)
+        d = company_delta(c['company'], prev['events'] if prev else [], c['events'])
+        if d['added'] or d['changed'] or d['removed']:
+            out.append(d)
+    for c in old.values():
+        if c['events']:
+            out.append(company_delta(c['company'], c['events'], []))
+    return out
+
+
+def compose_deltas(deltas) -> list:
+    """Fold generation deltas (oldest first) into one list of company deltas.
+
+    Apply as: drop `removed`, upsert `added`, patch `changed` fields. A row
+    removed and re-added within the span comes back under `added`.
+    """
+    companies = {}
+    for delta in deltas:
+        for d in delta:
+            acc = companies.setdefault(d['company']['id'], {'company': d['company'], 'added': {}, 'changed': {}, 'removed': {}})
+            acc['company'] = d['company']
+            for h in d['removed']:
+                if acc['added'].pop(h, None) is None:
+                    acc['removed'][h] = None
+                acc['changed'].pop(h, None)
+            for row in d['added']:
+                h = row.get('source_hash')
+                acc['removed'].pop(h, None)
+                acc['added'][h] = row
+            for ch in d['changed']:
+                h = ch['source_hash']
+                if h in acc['added']:
+                    acc['added'][h] = {**acc['added'][h], **{k: v[1] for k, v in ch['fields'].items()}}
+                    continue
+                fields = acc['changed'].setdefault(h, {})
+                for k, (before, after) in ch['fields'].items():
+                    before = fields[k][0] if k in fields else before
+                    if before == after:
+                        fields.pop(k, None)
+                    else:
+                        fields[k] = [before, after]
+                if not fields:
+                    del acc['changed'][h]
+    out = []
+    for acc in companies.values():
+        if acc['added'] or acc['changed'] or acc['removed']:
+            out.append({'company': acc['company'], 'added': list(acc['added'].values()),
+                        'changed': [{'source_hash': h, 'fields': f} for h, f in acc['changed'].items()],
+                        'removed': list(acc['removed'])})
+    return out
@@ -0,0 +1,120 @@
+import datetime, hashlib, os
+
+from .resolve import _tokenize
+
+# Collapse duplicate rows of one company (list card + inline pass + detail
+# page, or the same show listed twice with drifting titles/dates).
+# Identity is the canonical play when the resolver found one, else the
+# normalized title; two rows match when their start (and end, when both have
+# one) dates are within DATE_TOLERANCE_DAYS and their venues do not conflict.
+# Rows are bucketed by (identity, start ordinal), so each row only probes
+# 2 * tolerance + 1 buckets: linear in the number of rows. An undated row only
+# folds into a dated one when its identity has a single dated run; with two
+# runs of the same play there is no telling which one a bare card belongs to.
+# A merged row's source_hash is recomputed from its final fields, so it
+# matches the row's content whatever order the duplicates arrived in.
+
+DATE_TOLERANCE_DAYS = int(os.getenv('SF_DEDUP_DATE_TOLERANCE_DAYS', '1'))
+
+__all__ = ["dedup_rows", "identity", "source_hash", "DATE_TOLERANCE_DAYS"]
+
+
+def source_hash(company_id, title, start, end, venue) -> str:
+    """Row identity used by diffs, calendar UIDs and Notion upserts."""
+    return hashlib.sha1(f"{company_id}|{title}|{start}|{end}|{venue}".encode('utf-8')).hexdigest()
+
+
+def identity(row: dict):
+    if row.get('canonical_title'):
+        return ('play', row['canonical_title'])
+    return ('title', ' '.join(_tokenize(row.get('title_display') or '')))
+
+
+def _ordinal(value):
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(str(value)[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+def _compatible(a: dict, b: dict, tolerance: int) -> bool:
+    if a.get('venue') and b.get('venue') and a['venue'].casefold() != b['venue'].casefold():
+        return False
+    ea, eb = _ordinal(a.get('end_date')), _ordinal(b.get('end_date'))
+    return ea is None or eb is None or abs(ea - eb) <= tolerance
+
+
+def _dated(row: dict) -> bool:
+    return bool(row.get('start_date') and row.get('end_date'))
+
+
+def _merge(keep: dict, other: dict) -> dict:
+    """Field-by-field merge: parsed dates beat unparsed, detail URLs beat list/page URLs, else first non-empty."""
+    if (_dated(other), other.get('date_confidence') or 0) > (_dated(keep), keep.get('date_confidence') or 0):
+        for k in ('start_date', 'end_date', 'raw_dates_text', 'date_confidence'):
+            keep[k] = other.get(k)
+    own_page = keep.get('source_page')
+    if other.get('show_url') and (not keep.get('show_url') or (keep['show_url'] == own_page and other['show_url'] != own_page)):
+        keep['show_url'] = other['show_url']
+    if (other.get('match_confidence') or 0) > (keep.get('match_confidence') or 0):
+        for k in ('canonical_title', 'is_shakespeare', 'match_confidence', 'play_id'):
+            keep[k] = other.get(k)
+    for k, v in other.items():
+        if keep.get(k) in (None, '') and v not in (None, ''):
+            keep[k] = v
+    return keep
+
+
+def dedup_rows(rows, tolerance=None):
+    """(rows, collapsed): duplicates merged into one row placed at the show's first occurrence."""
+    tol = DATE_TOLERANCE_DAYS if tolerance is None else tolerance
+    merged, owner = [], [None] * len(rows)
+    buckets, first_dated, first_undated, runs = {}, {}, {}, {}
+    # dated rows: probe the neighbouring start-date buckets of the same identity
+    for i, row in enumerate(rows):
+        ident = identity(row)
+        start = _ordinal(row.get('start_date'))
+        if not ident[1] or start is None:
+            continue
+        for d in range(-tol, tol + 1):
+            owner[i] = next((t for t in buckets.get((ident, start + d), ()) if _compatible(merged[t], row, tol)), None)
+            if owner[i] is not None:
+                _merge(merged[owner[i]], row)
+                break
+        else:
+            owner[i] = len(merged)
+            merged.append(dict(row))
+            buckets.setdefault((ident, start), []).append(owner[i])
+            first_dated.setdefault(ident, owner[i])
+            runs[ident] = runs.get(ident, 0) + 1
+    # undated rows (e.g. a card whose dates only live on the detail page) fold into the show's only dated row
+    for i, row in enumerate(rows):
+        if owner[i] is not None:
+            continue
+        ident = identity(row)
+        target = None
+        if ident[1]:
+            target = first_dated[ident] if runs.get(ident) == 1 else first_undated.get(ident)
+        if target is not None and _compatible(merged[target], row, tol):
+            owner[i] = target
+            _merge(merged[target], row)
+        else:
+            owner[i] = len(merged)
+            merged.append(dict(row))
+            if ident[1]:
+                first_undated.setdefault(ident, owner[i])
+    out, seen, absorbed = [], set(), set()
+    for t in owner:
+        if t in seen:
+            absorbed.add(t)
+        else:
+            seen.add(t)
+            out.append(merged[t])
+    for t in absorbed:
+        r = merged[t]
+        if r.get('company_id') is not None:
+            r['source_hash'] = source_hash(r['company_id'], r.get('title_display'), r.get('start_date'),
+                                           r.get('end_date'), r.get('venue'))
+    return out, len(rows) - len(out)
@@ -0,0 +1,97 @@
+import re
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin
+from dateutil.parser import parse as dtparse
+
+from .runs import collapse_runs
+
+# RSS 2.0 / RSS 1.0 / Atom reader on a pull parser fed in chunks: each
+# <item>/<entry> is handled when it closes and then cleared, so memory stays
+# flat on big feeds.
+# Items carrying mod_event dates (ev:startdate/ev:enddate) become performances
+# and collapse into runs; other items keep their text as dates_text so
+# parse_dates can find a range in it.
+
+_TAG_RX = re.compile(r"<[^>]+>")
+_WS_RX = re.compile(r"\s+")
+CHUNK = 64 * 1024
+
+
+def sniff_feed(text: str):
+    """'ics' for iCalendar bodies, 'rss' for RSS/Atom, None for anything else (HTML)."""
+    head = (text or '')[:512].lstrip('\ufeff \t\r\n')
+    if head[:15].upper() == 'BEGIN:VCALENDAR':
+        return 'ics'
+    if head.startswith('<'):
+        lowered = head.lower()
+        if '<rss' in lowered or '<feed' in lowered or '<rdf:rdf' in lowered:
+            return 'rss'
+    return None
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1].lower()
+
+
+def _plain(markup: str) -> str:
+    return _WS_RX.sub(' ', _TAG_RX.sub(' ', markup or '')).strip()
+
+
+def _date(value):
+    if not value:
+        return None
+    try:
+        return dtparse(value).date()
+    except (ValueError, OverflowError):
+        return None
+
+
+def _entry(elem, base_url):
+    fields = {}
+    for child in elem:
+        name = _local(child.tag)
+        if name == 'link':
+            href = child.get('href')
+            if href and child.get('rel', 'alternate') == 'alternate':
+                fields.setdefault('link', href)
+            elif child.text and child.text.strip():
+                fields.setdefault('link', child.text.strip())
+        elif name in ('title', 'description', 'summary', 'content', 'startdate', 'enddate', 'location'):
+            fields.setdefault(name, ''.join(child.itertext()).strip())
+    link = fields.get('link')
+    return {
+        'title': _plain(fields.get('title')),
+        'url': urljoin(base_url, link) if base_url and link else link or base_url,
+        'venue': fields.get('location') or None,
+        'start': _date(fields.get('startdate')),
+        'end': _date(fields.get('enddate')),
+        'text': _plain(fields.get('description') or fields.get('summary') or fields.get('content')),
+    }
+
+
+def _items(text: str):
+    parser = ET.XMLPullParser(events=('end',))
+    for i in range(0, len(text), CHUNK):
+        parser.feed(text[i:i + CHUNK])  # str input: the body is already decoded
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def extract_events_from_feed(text: str, base_url: str = None):
+    dated, undated = [], []
+    try:
+        for _, elem in _items(text):
+            if _local(elem.tag) not in ('item', 'entry'):
+                continue
+            e = _entry(elem, base_url)
+            elem.clear()
+            if not e['title']:
+                continue
+            if e['start']:
+                dated.append(e)
+            else:
+                undated.append({'title': e['title'], 'url': e['url'], 'venue': e['venue'], 'dates_text': e['text'] or None})
+    except ET.ParseError:
+        pass  # keep whatever was read before the malformed part
+    return collapse_runs(dated) + undated
@@ -1,7 +1,9 @@
 from selectolax.parser import HTMLParser
 from bs4 import BeautifulSoup
 import re, datetime, json, asyncio
-from ..utils import fetch_text
+from ..utils import fetch_text, archive_page, current_date
+from ..archive import latest_page
+from .. import log
 
 def _sel(node, selector):
     # support attribute selector like 'a@href'
@@ -98,7 +100,71 @@ def _infer_year_short_range(text: str, today: datetime.date):
         year = today.year - 1
     return f"{text} {year}"
 
-async def extract_events_from_html_async(html: str, company: dict):
+# Fallback plan discovery for companies without a list selector / field map.
+# Every container x title x dates combination below is scored on one parsed
+# tree; the best becomes {'list', 'title', 'dates', 'url', 'venue'} and is
+# kept by the caller (learned strategy state) so later runs skip discovery.
+PLAN_CONTAINERS = ['article', 'figure', '.event', '.show', '.production', 'li']
+PLAN_TITLES = ['h1', 'h2', 'h3', 'figcaption h1', 'h1, h2, h3']
+PLAN_DATES = ['.date', '.dates', '.prod-dates', 'time']
+PLAN_MAX_CARDS = 1000
+_DIGIT_RX = re.compile(r"\d")
+
+def _discover_plan(tree):
+    """Best-scoring selector plan for a page, or None. Score: titled cards + 2 x titled cards with dates."""
+    best, best_score = None, 0
+    for container in PLAN_CONTAINERS:
+        cards = tree.css(container)
+        if not cards or len(cards) > PLAN_MAX_CARDS:
+            continue
+        titled = {t: {i for i, c in enumerate(cards) if _sel(c, t)} for t in PLAN_TITLES}
+        dated = {d: {i for i, c in enumerate(cards) if _DIGIT_RX.search(_sel(c, d) or '')} for d in PLAN_DATES}
+        for t, has_title in titled.items():
+            for d, has_dates in dated.items():
+                score = len(has_title) + 2 * len(has_title & has_dates)
+                if score > best_score:
+                    best_score = score
+                    best = {'list': container, 'title': t, 'dates': d if has_title & has_dates else None,
+                            'url': 'a@href', 'venue': '.venue'}
+    return best
+
+def _apply_plan(tree, plan):
+    out = []
+    for card in tree.css(plan['list']):
+        title = _sel(card, plan['title'])
+        if title:
+            out.append({'title': title, 'dates_text': _sel(card, plan['dates']), 'url': _sel(card, plan['url']),
+                        'venue': _sel(card, plan['venue'])})
+    return out
+
+def _fallback_events(html, learned=None):
+    """Events via the cached plan in `learned['html_plan']`; rediscovers (and stores) when it yields nothing."""
+    tree = HTMLParser(html)
+    plan = (learned or {}).get('html_plan')
+    if plan:
+        events = _apply_plan(tree, plan)
+        if events:
+            return events
+        log.info('html.plan_stale', plan=plan['list'])
+    plan = _discover_plan(tree)
+    if plan is None:
+        return []
+    log.debug('html.plan_discovered', plan=plan)
+    if learned is not None:
+        learned['html_plan'] = plan
+    return _apply_plan(tree, plan)
+
+async def _fetch_detail(url: str, company: dict):
+    if company.get('replay'):
+        page = latest_page(company.get('id'), url)
+        if page is None:
+            raise LookupError(f'no archived page for {url}')
+        return page
+    page = await fetch_text(url)
+    archive_page(company.get('id'), url, page)
+    return page
+
+async def extract_events_from_html_async(html: str, company: dict, learned=None):
     list_sel = company.get('HTML List Selector')
     fmap_json = company.get('HTML Field Map') or '{}'
     try:
@@ -122,26 +188,12 @@ async def extract_events_from_html_async(html: str, company: dict):
         inline_detail = True
     if not list_sel or not fmap:
         # fallback: collect rough base results but do NOT return; allow detail_links crawl
-        soup = BeautifulSoup(html, 'html.parser')
-        candidates = soup.select('article, figure, .event, .show, .production, li')
-        fmap_guess = {'title': 'h1, h2, h3, figcaption h1', 'dates': '.date, .dates, figcaption .prod-dates', 'url': 'a@href', 'venue': '.venue'}
-        for c in candidates[:40]:
-            node = HTMLParser(str(c))
-            title = _sel(node, fmap_guess['title'])
-            if title:
-                base_results.append({'title': title, 'dates_text': _sel(node, fmap_guess['dates']), 'url': _sel(node, fmap_guess['url']), 'venue': _sel(node, fmap_guess['venue'])})
+        base_results.extend(_fallback_events(html, learned))
     else:
         tree = HTMLParser(html)
         cards = tree.css(list_sel)
-        if len(cards) == 0:
-            print(f"[DEBUG] list selector '{list_sel}' matched 0 nodes")
-        else:
-            print(f"[DEBUG] list selector '{list_sel}' matched {len(cards)} nodes")
-            try:
-                preview = cards[0].html[:200].replace('\n',' ')
-                print(f"[DEBUG] first card preview: {preview}...")
-            except Exception:
-                pass
+        log.debug('html.list_selector', selector=list_sel, matched=len(cards),
+                  preview=lambda: cards[0].html[:200].replace('\n', ' ') if cards else None)
         results = []
         for card in cards:
             title = _sel(card, fmap.get('title', ''))
@@ -182,61 +234,6 @@ async def extract_events_from_html_async(html: str, company: dict):
             })
         base_results.extend([r for r in results if r.get('title')])
 
-    tree = HTMLParser(html)
-    cards = tree.css(list_sel)
-    if len(cards) == 0:
-        print(f"[DEBUG] list selector '{list_sel}' matched 0 nodes")
-    else:
-        print(f"[DEBUG] list selector '{list_sel}' matched {len(cards)} nodes")
-        # show snippet of first card for debugging selectors
-        try:
-            preview = cards[0].html[:200].replace('\n',' ')
-            print(f"[DEBUG] first card preview: {preview}...")
-        except Exception:
-            pass
-    results = []
-    for card in cards:
-        title = _sel(card, fmap.get('title', ''))
-        dates_block = _sel(card, fmap.get('dates', ''))
-        # Attempt to isolate first paragraph or line containing a month for cleaner dates_text
-        dates_text = None
-        if dates_block:
-            spaced = re.sub(r"(?P<m>[A-Z]{3,9})(\d)", lambda m: m.group('m')+" "+m.group(2), dates_block)
-            # Keep only up to first 'By ' sentence boundary after a year to avoid swallowing description
-            boundary = re.search(r"(\d{4})(.*)$", spaced)
-            if boundary:
-                year_idx = boundary.start(1) + 4
-                # Trim after year if a 'By ' appears soon after
-                by_pos = spaced.find('By ', year_idx)
-                if by_pos != -1 and by_pos - year_idx < 40:
-                    spaced = spaced[:by_pos]
-            dates_text = spaced.strip()[:140]
-        start_date, end_date = _parse_date_range(dates_text or dates_block or '')
-        # Attempt to split out description (after first strong or after first period following date line)
-        description = None
-        try:
-            soup = BeautifulSoup(card.html, 'html.parser')
-            ps = soup.find_all('p')
-            venue_val = None
-            if ps:
-                if len(ps) > 1:
-                    description = ' '.join(p.get_text(strip=True) for p in ps[1:])[:1000]
-                first_p = ps[0].get_text(" ", strip=True)
-                venue_val = _extract_stage(first_p, company)
-            # If not found, attempt within full card text
-            if not venue_val:
-                venue_val = _extract_stage(soup.get_text(" ", strip=True)[:300], company)
-        except Exception:
-            venue_val = None
-        results.append({
-            'title': title,
-            'dates_text': dates_text,
-            'start_date': start_date,
-            'end_date': end_date,
-            'description': description,
-            'url': _sel(card, fmap.get('url', '')),
-            'venue': _sel(card, fmap.get('venue', '')) or venue_val,
-        })
     # base_results already built above
     # Inline detail fallback: directly parse figcaption blocks for title & dates if configured
     if inline_detail:
@@ -249,7 +246,7 @@ async def extract_events_from_html_async(html: str, company: dict):
             title = title_el.get_text(strip=True) if title_el else None
             dates_text = dates_el.get_text(strip=True) if dates_el else None
             if dates_text and re.search(r"\d{4}", dates_text) is None:
-                inferred = _infer_year_short_range(dates_text, datetime.date.today())
+                inferred = _infer_year_short_range(dates_text, current_date())
                 if inferred:
                     dates_text = inferred
             start_date, end_date = _parse_date_range(dates_text or '')
@@ -268,7 +265,6 @@ async def extract_events_from_html_async(html: str, company: dict):
         enriched = []
         tree = HTMLParser(html)
         detail_nodes = tree.css(detail_links_sel) or []
-        tasks = []
         url_map = {}
         from urllib.parse import urljoin
         base_url = company.get('Productions URL') or company.get('Homepage URL') or ''
@@ -285,8 +281,7 @@ async def extract_events_from_html_async(html: str, company: dict):
                 continue
             seen.add(full)
             url_map[full] = dn
-            tasks.append(fetch_text(full))
-        pages = await asyncio.gather(*[fetch_text(u) for u in seen], return_exceptions=True) if seen else []
+        pages = await asyncio.gather(*[_fetch_detail(u, company) for u in seen], return_exceptions=True) if seen else []
         for page_html, page_url in zip(pages, seen):
             if isinstance(page_html, Exception):
                 continue
@@ -294,7 +289,7 @@ async def extract_events_from_html_async(html: str, company: dict):
             title = _sel(ptree, detail_map.get('title')) or None
             dates_text = _sel(ptree, detail_map.get('dates')) or None
             if dates_text and re.search(r"\d{4}", dates_text) is None:
-                inferred = _infer_year_short_range(dates_text, datetime.date.today())
+                inferred = _infer_year_short_range(dates_text, current_date())
                 if inferred:
                     dates_text = inferred
             start_date, end_date = _parse_date_range(dates_text or '')
@@ -326,15 +321,15 @@ async def extract_events_from_html_async(html: str, company: dict):
     return base_results
 
 # Backwards compatibility wrapper
-def extract_events_from_html(html: str, company: dict):
+def extract_events_from_html(html: str, company: dict, learned=None):
     try:
         loop = asyncio.get_running_loop()
         # If already running (our main scraper loop), schedule and wait
-        return loop.create_task(extract_events_from_html_async(html, company))  # caller isn't awaiting -> adjust caller
+        return loop.create_task(extract_events_from_html_async(html, company, learned))  # caller isn't awaiting -> adjust caller
     except RuntimeError:
         # No running loop; create temporary
         loop = asyncio.new_event_loop()
         try:
-            return loop.run_until_complete(extract_events_from_html_async(html, company))
+            return loop.run_until_complete(extract_events_from_html_async(html, company, learned))
         finally:
             loop.close()
@@ -0,0 +1,144 @@
+import datetime
+from dateutil.tz import gettz, UTC
+
+from .runs import collapse_runs
+
+# Line-oriented iCalendar (RFC 5545) reader.
+# VEVENTs are yielded one at a time while the text is scanned, so a large
+# calendar never becomes an object tree. Only what the pipeline needs is read:
+# SUMMARY, LOCATION, URL, DTSTART/DTEND, RRULE (DAILY/WEEKLY), EXDATE, STATUS.
+
+MAX_OCCURRENCES = 500
+OPEN_RULE_DAYS = 366  # horizon for RRULEs with neither COUNT nor UNTIL
+_WEEKDAYS = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+
+
+def _lines(text: str):
+    pos, size = 0, len(text)
+    while pos < size:
+        nl = text.find('\n', pos)
+        nl = size if nl < 0 else nl
+        yield text[pos:nl].rstrip('\r')
+        pos = nl + 1
+
+
+def _unfolded(text: str):
+    """Logical content lines: continuation lines (leading space/tab) are joined."""
+    pending = None
+    for line in _lines(text):
+        if line[:1] in (' ', '\t') and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending
+        pending = line
+    if pending is not None:
+        yield pending
+
+
+def _split(line: str):
+    """'NAME;K=V:value' -> (NAME, {K: V}, value); colons inside quoted params are kept."""
+    i = line.find(':')
+    if i < 0:
+        return None, {}, None
+    if '"' in line[:i]:
+        quoted = False
+        for i, ch in enumerate(line):
+            if ch == '"':
+                quoted = not quoted
+            elif ch == ':' and not quoted:
+                break
+    head, value = line[:i], line[i + 1:]
+    if ';' not in head:
+        return head.upper(), {}, value
+    name, *params = head.split(';')
+    return name.upper(), dict(p.split('=', 1) for p in params if '=' in p), value
+
+
+def _text(value: str) -> str:
+    return (value.replace('\\n', '\n').replace('\\N', '\n').replace('\\,', ',')
+            .replace('\\;', ';').replace('\\\\', '\\').strip())
+
+
+def _date(value: str, params: dict, tz=None):
+    """DATE or DATE-TIME -> local date. UTC times are moved into the company timezone."""
+    value = (value or '').strip()
+    try:
+        day = datetime.date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+        if len(value) == 8 or params.get('VALUE') == 'DATE' or not (value.endswith('Z') and tz):
+            return day
+        stamp = datetime.datetime(day.year, day.month, day.day, int(value[9:11]), int(value[11:13]), tzinfo=UTC)
+    except ValueError:
+        return None
+    return stamp.astimezone(gettz(tz)).date()
+
+
+def iter_vevents(text: str):
+    """Yield each VEVENT as {NAME: (params, value)}; repeated EXDATEs are collected in a list."""
+    event = None
+    for line in _unfolded(text):
+        name, params, value = _split(line)
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            event = {'EXDATE': []}
+        elif name == 'END' and value.upper() == 'VEVENT' and event is not None:
+            yield event
+            event = None
+        elif event is not None and name:
+            if name == 'EXDATE':
+                event['EXDATE'].extend((params, v) for v in value.split(','))
+            elif name not in event:
+                event[name] = (params, value)
+
+
+def _occurrences(start, rule: str, exdates):
+    """Dates produced by a DAILY/WEEKLY RRULE starting at `start` (others: just `start`)."""
+    parts = dict(p.split('=', 1) for p in rule.upper().split(';') if '=' in p)
+    freq = parts.get('FREQ')
+    if freq not in ('DAILY', 'WEEKLY'):
+        return [start]
+    interval = max(int(parts.get('INTERVAL', '1') or 1), 1)
+    count = int(parts['COUNT']) if parts.get('COUNT', '').isdigit() else None
+    until = _date(parts['UNTIL'], {}) if parts.get('UNTIL') else None
+    if until is None and count is None:
+        until = start + datetime.timedelta(days=OPEN_RULE_DAYS)
+    days = sorted(_WEEKDAYS[d[-2:]] for d in parts.get('BYDAY', '').split(',') if d[-2:] in _WEEKDAYS)
+    out = []
+    day = start
+    step = datetime.timedelta(days=1)
+    while len(out) < MAX_OCCURRENCES and (count is None or len(out) < count) and (until is None or day <= until):
+        weeks = (day - start).days // 7
+        if freq == 'DAILY':
+            hit = (day - start).days % interval == 0
+        else:
+            hit = weeks % interval == 0 and (day.weekday() in days if days else day.weekday() == start.weekday())
+        if hit:
+            out.append(day)
+        day += step
+    return [d for d in out if d not in exdates]
+
+
+def extract_events_from_ics(text: str, base_url: str = None, tz: str = None):
+    performances = []
+    for ev in iter_vevents(text):
+        if (ev.get('STATUS') or ({}, ''))[1].strip().upper() == 'CANCELLED':
+            continue
+        if 'DTSTART' not in ev or 'SUMMARY' not in ev:
+            continue
+        start = _date(ev['DTSTART'][1], ev['DTSTART'][0], tz)
+        if start is None:
+            continue
+        end = _date(ev['DTEND'][1], ev['DTEND'][0], tz) if 'DTEND' in ev else None
+        if end and 'DTEND' in ev and len(ev['DTEND'][1].strip()) == 8 and end > start:
+            end -= datetime.timedelta(days=1)  # all-day DTEND is exclusive
+        base = {
+            'title': _text(ev['SUMMARY'][1]),
+            'venue': (_text(ev['LOCATION'][1]) or None) if 'LOCATION' in ev else None,
+            'url': ev['URL'][1].strip() if 'URL' in ev else base_url,
+        }
+        if 'RRULE' in ev:
+            exdates = {_date(v, p, tz) for p, v in ev['EXDATE']}
+            length = (end - start) if end else datetime.timedelta(0)
+            performances.extend({**base, 'start': d, 'end': d + length} for d in _occurrences(start, ev['RRULE'][1], exdates))
+        else:
+            performances.append({**base, 'start': start, 'end': end})
+    return collapse_runs(performances)
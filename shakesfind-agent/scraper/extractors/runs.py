@@ -0,0 +1,40 @@
+import datetime, os
+
+# Collapse individual performances (one calendar entry / feed item per night)
+# into production runs: same title at the same venue, consecutive dates no
+# more than RUN_GAP_DAYS apart. A revival months later stays a separate run.
+
+RUN_GAP_DAYS = int(os.getenv('SF_RUN_GAP_DAYS', '21'))
+
+
+def collapse_runs(performances, gap_days=None):
+    """[{title, url, venue, start: date, end: date|None}] -> event dicts for normalize_event."""
+    gap = datetime.timedelta(days=RUN_GAP_DAYS if gap_days is None else gap_days)
+    groups = {}
+    for p in performances:
+        if p.get('title') and p.get('start'):
+            groups.setdefault(((p['title'] or '').strip().casefold(), p.get('venue')), []).append(p)
+    runs = []
+    for perfs in groups.values():
+        perfs.sort(key=lambda p: p['start'])
+        current = None
+        for p in perfs:
+            end = max(p['start'], p.get('end') or p['start'])
+            if current and p['start'] - current['end'] <= gap:
+                current['end'] = max(current['end'], end)
+                current['performances'] += 1
+                current['url'] = current['url'] or p.get('url')
+                continue
+            current = {'title': p['title'].strip(), 'url': p.get('url'), 'venue': p.get('venue'),
+                       'start': p['start'], 'end': end, 'performances': 1}
+            runs.append(current)
+    runs.sort(key=lambda r: (r['start'], r['title']))
+    return [{
+        'title': r['title'],
+        'url': r['url'],
+        'venue': r['venue'],
+        'start_date': r['start'].isoformat(),
+        'end_date': r['end'].isoformat(),
+        'dates_text': f"{r['start'].isoformat()} – {r['end'].isoformat()}",
+        'performances': r['performances'],
+    } for r in runs]
@@ -0,0 +1,197 @@
+import asyncio, os, time
+from collections import deque
+from . import log
+
+# Heavy (headless browser) fetch tier for JS-rendered pages.
+# One long-lived Chromium per process with a small pool of reusable
+# contexts/pages; images, fonts and media are aborted at the network layer.
+# The browser shuts down after HEAVY_IDLE_SEC without work. Registry entries
+# opt in with heavy: fallback (after plain fetches fail) or heavy: always; each
+# fetch's cost lands in the company's meta.fetch.heavy.
+
+HEAVY_CONCURRENCY = int(os.getenv('SF_HEAVY_CONCURRENCY', '2'))
+HEAVY_IDLE_SEC = float(os.getenv('SF_HEAVY_IDLE_SEC', '60'))
+HEAVY_TIMEOUT_SEC = float(os.getenv('SF_HEAVY_TIMEOUT_SEC', '30'))
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media'}
+
+__all__ = ["BrowserPool", "get_pool", "heavy_fetch", "heavy_costs", "close_pool"]
+
+
+class BrowserPool:
+    """Pool of reusable Playwright pages backed by a single browser.
+
+    `size` caps concurrent heavy fetches independently of the httpx tier.
+    Every fetch appends a cost record (wall ms, bytes, blocked requests,
+    whether it paid the browser launch) to `costs`.
+    """
+
+    def __init__(self, size: int = HEAVY_CONCURRENCY, idle_sec: float = HEAVY_IDLE_SEC, headless: bool = True):
+        self.size = max(1, size)
+        self.idle_sec = idle_sec
+        self.headless = headless
+        self.costs = deque(maxlen=500)
+        self._pw = None
+        self._browser = None
+        self._contexts = []
+        self._pages = None
+        self._sem = asyncio.Semaphore(self.size)
+        self._lock = asyncio.Lock()
+        self._in_flight = 0
+        self._idle_task = None
+        self._blocked = {}
+
+    @property
+    def running(self) -> bool:
+        return self._browser is not None
+
+    async def _ensure(self) -> bool:
+        """Launch browser + contexts if needed. Returns True when this call paid the launch."""
+        async with self._lock:
+            if self._browser is not None:
+                return False
+            from playwright.async_api import async_playwright
+            self._pw = await async_playwright().start()
+            self._browser = await self._pw.chromium.launch(headless=self.headless)
+            self._pages = asyncio.Queue()
+            for _ in range(self.size):
+                ctx = await self._browser.new_context(user_agent='ShakesFindBot/0.1 (headless)')
+                await ctx.route('**/*', self._route)
+                self._contexts.append(ctx)
+                page = await ctx.new_page()
+                self._blocked[id(page)] = 0
+                self._pages.put_nowait(page)
+            return True
+
+    async def _route(self, route):
+        req = route.request
+        if req.resource_type in BLOCKED_RESOURCE_TYPES:
+            frame_page = req.frame.page if req.frame else None
+            if frame_page is not None and id(frame_page) in self._blocked:
+                self._blocked[id(frame_page)] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def _cancel_idle(self):
+        if self._idle_task and not self._idle_task.done():
+            self._idle_task.cancel()
+        self._idle_task = None
+
+    def _schedule_idle(self):
+        self._cancel_idle()
+        if self.idle_sec and self.idle_sec > 0:
+            self._idle_task = asyncio.ensure_future(self._idle_shutdown())
+
+    async def _idle_shutdown(self):
+        try:
+            await asyncio.sleep(self.idle_sec)
+        except asyncio.CancelledError:
+            return
+        # past the timer the close must run to completion: a fetch arriving now waits on
+        # the lock and relaunches instead of cancelling us half way (contexts gone, browser set)
+        self._idle_task = None
+        await asyncio.shield(self._shutdown(idle=True))
+
+    async def fetch(self, url: str, timeout: float = HEAVY_TIMEOUT_SEC) -> str:
+        async with self._sem:
+            self._in_flight += 1
+            self._cancel_idle()
+            t0 = time.perf_counter()
+            page = None
+            status = None
+            html = ''
+            try:
+                cold = await self._ensure()
+                page = await self._pages.get()
+                self._blocked[id(page)] = 0
+                resp = await page.goto(url, wait_until='domcontentloaded', timeout=timeout * 1000)
+                status = resp.status if resp else None
+                try:
+                    await page.wait_for_load_state('networkidle', timeout=min(timeout, 5.0) * 1000)
+                except Exception:
+                    pass  # long-polling pages never go idle; DOM is usually ready
+                html = await page.content()
+            finally:
+                blocked = self._blocked.get(id(page), 0) if page is not None else 0
+                if page is not None and self._pages is not None:
+                    self._pages.put_nowait(page)
+                self._in_flight -= 1
+                if self._in_flight == 0:
+                    self._schedule_idle()
+            cost = {
+                'url': url,
+                'ms': round((time.perf_counter() - t0) * 1000, 1),
+                'bytes': len(html.encode('utf-8')),
+                'blocked': blocked,
+                'cold_start': cold,
+                'status': status,
+            }
+            self.costs.append(cost)
+            log.debug('heavy.fetch', url=url, status=status, ms=cost['ms'], blocked=blocked, cold=cold)
+            if status and status >= 400:
+                raise Exception(f'heavy fetch {status} for {url}')
+            return html
+
+    async def close(self):
+        self._cancel_idle()
+        await asyncio.shield(self._shutdown())
+
+    async def _shutdown(self, idle: bool = False):
+        async with self._lock:
+            # an idle close re-checks under the lock: a fetch that took a page after the
+            # timer fired keeps the browser (its finally re-arms the timer)
+            if idle and self._in_flight:
+                return
+            for ctx in self._contexts:
+                try:
+                    await ctx.close()
+                except Exception:
+                    pass
+            self._contexts = []
+            self._pages = None
+            self._blocked = {}
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception:
+                    pass
+            if self._pw is not None:
+                try:
+                    await self._pw.stop()
+                except Exception:
+                    pass
+            self._browser = None
+            self._pw = None
+
+
+_pool = None
+_pool_loop = None
+
+
+def get_pool() -> BrowserPool:
+    """Process-wide pool bound to the running event loop."""
+    global _pool, _pool_loop
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool_loop is not loop:
+        _pool = BrowserPool()
+        _pool_loop = loop
+    return _pool
+
+
+async def heavy_fetch(url: str, info: dict = None) -> str:
+    pool = get_pool()
+    html = await pool.fetch(url)
+    if info is not None:
+        info['tier'] = 'heavy'
+        info['heavy'] = pool.costs[-1]
+    return html
+
+
+def heavy_costs():
+    return list(_pool.costs) if _pool is not None else []
+
+
+async def close_pool():
+    """Shut the browser down now instead of waiting for the idle timer (CLI runs)."""
+    if _pool is not None and _pool.running:
+        await _pool.close()
@@ -0,0 +1,90 @@
+import datetime, json, os, sys, threading
+
+from .metrics import current_company
+
+# Structured logger for hot paths.
+# Each record is one event name + fields, tagged with the company bound by
+# metrics.company_scope(). Calls below the threshold return after a single
+# int compare; field values may be zero-arg callables, which are only invoked
+# when the record is actually written (card previews, selector stats).
+#
+#   SF_LOG_LEVEL   debug | info | warning | error   (default info; SF_DEBUG=1 implies debug)
+#   SF_LOG_FORMAT  text | json                      (default text; json writes JSON lines)
+#   SF_LOG_FILE    append records here instead of stdout
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING, 'error': ERROR}
+_NAMES = {v: k for k, v in LEVELS.items()}
+
+_lock = threading.Lock()
+_cfg = {'level': INFO, 'json': False, 'stream': None, 'path': None}
+
+
+def configure(level=None, fmt=None, path=None):
+    """(Re)read settings; explicit arguments win over the environment."""
+    if level is None:
+        level = os.getenv('SF_LOG_LEVEL') or ('debug' if os.getenv('SF_DEBUG') == '1' else 'info')
+    fmt = fmt or os.getenv('SF_LOG_FORMAT', 'text')
+    path = path if path is not None else os.getenv('SF_LOG_FILE')
+    with _lock:
+        if _cfg['path'] and _cfg['stream'] is not None:
+            _cfg['stream'].close()
+        _cfg['level'] = LEVELS.get(str(level).lower(), INFO) if not isinstance(level, int) else level
+        _cfg['json'] = fmt == 'json'
+        _cfg['path'] = path or None
+        _cfg['stream'] = open(path, 'a', encoding='utf-8', buffering=1) if path else None
+
+
+def enabled(level=DEBUG) -> bool:
+    return level >= _cfg['level']
+
+
+def _render(level, event, fields):
+    for k, v in fields.items():
+        if callable(v):
+            try:
+                fields[k] = v()
+            except Exception as e:
+                fields[k] = f'<error: {e}>'
+    company = current_company()
+    if _cfg['json']:
+        rec = {'ts': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='milliseconds'),
+               'level': _NAMES.get(level, str(level)), 'event': event}
+        if company:
+            rec['company'] = company
+        rec.update(fields)
+        return json.dumps(rec, ensure_ascii=False, default=str)
+    parts = [f"[{_NAMES.get(level, str(level)).upper()}] {event}"]
+    if company:
+        parts.append(f"company={company}")
+    parts.extend(f"{k}={v}" for k, v in fields.items())
+    return ' '.join(parts)
+
+
+def log(level, event, **fields):
+    if level < _cfg['level']:
+        return
+    line = _render(level, event, fields)
+    with _lock:
+        stream = _cfg['stream'] or sys.stdout  # resolved per call so redirect_stdout still works
+        stream.write(line + '\n')
+
+
+def debug(event, **fields):
+    if DEBUG >= _cfg['level']:
+        log(DEBUG, event, **fields)
+
+
+def info(event, **fields):
+    log(INFO, event, **fields)
+
+
+def warning(event, **fields):
+    log(WARNING, event, **fields)
+
+
+def error(event, **fields):
+    log(ERROR, event, **fields)
+
+
+configure()
@@ -0,0 +1,238 @@
+import bisect, contextlib, contextvars, threading, time
+
+# In-process metrics + timing spans.
+# Counters/gauges/histograms render in Prometheus text format for /metrics.
+# span() times a pipeline stage, feeds the stage histogram and, while a run is
+# active (start_run/finish_run), keeps the span so the export _summary can say
+# where the run spent its time. Histograms carry stage/strategy labels only;
+# the company tag stays on the run spans to keep series cardinality bounded.
+# The active run lives in a context variable, so overlapping runs in other
+# tasks (an API scrape during a profile) each keep their own spans; muted()
+# keeps a diagnostic run out of every metric.
+
+__all__ = [
+    "Counter", "Gauge", "Histogram", "span", "record_span", "company_scope", "current_company",
+    "start_run", "run_timings", "finish_run", "last_run", "muted", "render_prometheus",
+    "FETCH_SECONDS", "FETCH_BYTES", "CACHE_REQUESTS", "STAGE_SECONDS", "COMPANY_EVENTS", "EVENTS_TOTAL",
+]
+
+_lock = threading.Lock()
+_registry = []
+_company = contextvars.ContextVar('sf_company', default=None)
+_muted = contextvars.ContextVar('sf_metrics_muted', default=False)
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 5e6)
+
+
+def _fmt_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    esc = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{esc(v)}"' for k, v in pairs) + '}'
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        with _lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    def clear(self):
+        with _lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1.0, **labels):
+        if _muted.get():
+            return
+        k = self._key(labels)
+        with _lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        for k, v in sorted(self._values.items()):
+            yield f"{self.name}{_fmt_labels(self.labelnames, k)} {v:g}"
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        if _muted.get():
+            return
+        with _lock:
+            self._values[self._key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        if _muted.get():
+            return
+        k = self._key(labels)
+        with _lock:
+            slot = self._values.get(k)
+            if slot is None:
+                slot = self._values[k] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            slot['counts'][bisect.bisect_left(self.buckets, value)] += 1
+            slot['sum'] += value
+            slot['count'] += 1
+
+    def _samples(self):
+        for k, slot in sorted(self._values.items()):
+            acc = 0
+            for b, n in zip(self.buckets, slot['counts']):
+                acc += n
+                yield f"{self.name}_bucket{_fmt_labels(self.labelnames, k, [('le', f'{b:g}')])} {acc}"
+            yield f"{self.name}_bucket{_fmt_labels(self.labelnames, k, [('le', '+Inf')])} {slot['count']}"
+            yield f"{self.name}_sum{_fmt_labels(self.labelnames, k)} {slot['sum']:g}"
+            yield f"{self.name}_count{_fmt_labels(self.labelnames, k)} {slot['count']}"
+
+
+FETCH_SECONDS = Histogram('sf_fetch_seconds', 'Page fetch latency', ('tier',))
+FETCH_BYTES = Histogram('sf_fetch_bytes', 'Fetched body size', ('tier',), buckets=BYTES_BUCKETS)
+CACHE_REQUESTS = Counter('sf_cache_requests_total', 'Cache lookups by cache and result', ('cache', 'result'))
+STAGE_SECONDS = Histogram('sf_stage_seconds', 'Pipeline stage duration', ('stage', 'strategy'))
+COMPANY_EVENTS = Histogram('sf_company_events', 'Events found per company scrape', buckets=(0, 1, 5, 10, 25, 50, 100, 250))
+EVENTS_TOTAL = Counter('sf_events_total', 'Events produced across runs')
+RUNS_TOTAL = Counter('sf_scrape_runs_total', 'Completed scrape runs')
+RUN_SECONDS = Gauge('sf_scrape_last_run_seconds', 'Wall time of the last completed scrape run')
+
+
+def render_prometheus() -> str:
+    lines = []
+    with _lock:
+        metrics = list(_registry)
+    for m in metrics:
+        lines.append(f"# HELP {m.name} {m.help}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        lines.extend(m._samples())
+    return '\n'.join(lines) + '\n'
+
+
+# ---- spans -------------------------------------------------------------------
+
+_run = contextvars.ContextVar('sf_run', default=None)  # {'spans': [...], 't0': perf_counter}
+_last = None
+
+
+def current_company():
+    return _company.get()
+
+
+@contextlib.contextmanager
+def company_scope(company_id):
+    """Tag spans (and log lines) emitted inside the block with a company id."""
+    token = _company.set(company_id)
+    try:
+        yield
+    finally:
+        _company.reset(token)
+
+
+@contextlib.contextmanager
+def muted():
+    """Counters, histograms and run spans ignore everything recorded inside the block."""
+    token = _muted.set(True)
+    try:
+        yield
+    finally:
+        _muted.reset(token)
+
+
+def record_span(stage, seconds, company=None, strategy=None):
+    if _muted.get():
+        return
+    STAGE_SECONDS.observe(seconds, stage=stage, strategy=strategy or '')
+    run = _run.get()
+    if run is not None:
+        run['spans'].append((stage, strategy, company or _company.get(), seconds))
+
+
+@contextlib.contextmanager
+def span(stage, company=None, strategy=None):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(stage, time.perf_counter() - t0, company=company, strategy=strategy)
+
+
+def start_run():
+    """Open a run in the current context; tasks and threads started from it share its spans."""
+    _run.set({'spans': [], 't0': time.perf_counter()})
+
+
+def _pct(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(round((len(sorted_vals) - 1) * p / 100)))]
+
+
+def run_timings(top_n=5):
+    """Summary of the active run so far, or None when no run is active."""
+    run = _run.get()
+    if run is None:
+        return None
+    return _summarize(run['spans'], time.perf_counter() - run['t0'], top_n)
+
+
+def finish_run(top_n=5) -> dict:
+    """Close the active run and summarize its spans per stage and per company."""
+    global _last
+    run = _run.get()
+    spans = run['spans'] if run is not None else []
+    wall = time.perf_counter() - run['t0'] if run is not None else 0.0
+    _run.set(None)
+    RUNS_TOTAL.inc()
+    RUN_SECONDS.set(wall)
+    _last = out = _summarize(spans, wall, top_n)
+    return out
+
+
+def _summarize(spans, wall, top_n):
+    stages = {}
+    per_company = {}
+    for stage, strategy, company, secs in spans:
+        stages.setdefault(stage, []).append(secs)
+        if company:
+            per_company[company] = per_company.get(company, 0.0) + secs
+    out = {'wall_ms': round(wall * 1000, 1), 'stages': {}}
+    for stage, vals in stages.items():
+        vals.sort()
+        out['stages'][stage] = {
+            'count': len(vals),
+            'total_ms': round(sum(vals) * 1000, 1),
+            'p50_ms': round(_pct(vals, 50) * 1000, 2),
+            'p95_ms': round(_pct(vals, 95) * 1000, 2),
+            'max_ms': round(vals[-1] * 1000, 2),
+        }
+    slow = sorted(per_company.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
+    out['slowest_companies'] = [{'company': c, 'ms': round(s * 1000, 1)} for c, s in slow]
+    return out
+
+
+def last_run():
+    """Timing summary of the most recently finished run (None before the first)."""
+    return _last
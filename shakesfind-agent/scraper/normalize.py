@@ -1,7 +1,9 @@
-import re, dateparser
+import re
 from dateutil.parser import parse as dtparse
 from dateutil.tz import gettz
 
+from .utils import current_date
+
 CLEAN_PATTERNS = [
     (re.compile(r"^The (Folger|RSC|Globe) Presents[:\s]+", re.I), ""),
     # Marketing prefixes like WILLIAM SHAKESPEARE'S MUCH ADO ABOUT NOTHING
@@ -19,6 +21,7 @@ def normalize_event(evt: dict, tz: str):
         'url': evt.get('url'),
         'venue': evt.get('venue'),
         'dates_text': evt.get('dates_text') or '',
+        'description': evt.get('description'),
     'start_date': evt.get('start_date'),  # keep if extractor already parsed
     'end_date': evt.get('end_date'),
     }
@@ -75,7 +78,11 @@ def parse_dates(dates_text: str, tz: str, start_hint=None, end_hint=None):
         except Exception:
             pass
     parts = re.split(r"\s*[–-]\s*", text)
-    s = dateparser.parse(parts[0], settings={'TIMEZONE': tz, 'RETURN_AS_TIMEZONE_AWARE': False}) if parts else None
-    e = dateparser.parse(parts[1], settings={'TIMEZONE': tz, 'RETURN_AS_TIMEZONE_AWARE': False}) if len(parts)>1 else None
+    import dateparser  # ~0.3s to import; only free-form dates that miss the regexes get here
+    # relative and year-less dates resolve against current_date(), so SF_TODAY pins them too
+    settings = {'TIMEZONE': tz, 'RETURN_AS_TIMEZONE_AWARE': False,
+                'RELATIVE_BASE': datetime.datetime.combine(current_date(), datetime.time())}
+    s = dateparser.parse(parts[0], settings=settings) if parts else None
+    e = dateparser.parse(parts[1], settings=settings) if len(parts)>1 else None
     conf = 0.7 if (s and e) else 0.4 if (s or e) else 0.0
     return (s and s.date().isoformat()), (e and e.date().isoformat()), conf
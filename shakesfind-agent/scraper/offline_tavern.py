@@ -2,7 +2,7 @@ import pathlib, re, datetime as _dt, hashlib
 from bs4 import BeautifulSoup
 from scraper.normalize import normalize_event, parse_dates as _parse_dates
 from scraper.resolve import match_shakespeare_local
-from scraper.utils import now_utc
+from scraper.utils import now_utc, current_date
 
 __all__ = ["load_offline_tavern_events"]
 
@@ -50,7 +50,7 @@ def load_offline_tavern_events(company: dict):
             continue
         title = title_el.get_text(strip=True)
         dates_text = dates_el.get_text(strip=True) if dates_el else None
-        year = _dt.date.today().year
+        year = current_date().year
         if dates_text and not re.search(r'\d{4}', dates_text):
             dates_text = f"{dates_text} {year}"
         start_date, end_date = parse_range_dates(dates_text)
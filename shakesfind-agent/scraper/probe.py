@@ -0,0 +1,129 @@
+import hashlib, os
+from urllib.parse import urlsplit
+from .stream import CONTENT_TYPE_ALLOW, MAX_BODY_BYTES
+
+# Cheap "has this page changed?" checks run before a full fetch + extraction.
+# 1) HEAD with stored validators (If-None-Match / If-Modified-Since)
+# 2) if the server exposes no validators, a streamed read of the body (capped
+#    at PROBE_BYTES) whose hash is compared with the stored one. With a list
+#    selector only the matched listing markup is hashed, so rotating banners
+#    elsewhere on the page do not count as changes. A body over the cap can
+#    not be vouched for and always reports changed.
+# A miss that read the whole body hands it back as result['body'], so the
+# scrape that follows extracts from it instead of downloading the page again.
+
+PROBE_BYTES = int(os.getenv('SF_PROBE_BYTES', str(2 * 1024 * 1024)))
+PROBE_TIMEOUT = float(os.getenv('SF_PROBE_TIMEOUT', '10'))
+_UA = {'User-Agent': 'ShakesFindBot/0.1'}
+
+__all__ = ["probe_url", "probe_domain", "summarize_probes"]
+
+
+def probe_domain(url: str) -> str:
+    return (urlsplit(url or '').hostname or '').lower()
+
+
+def _section_hash(body: bytes, section: str = None) -> str:
+    if section:
+        from selectolax.parser import HTMLParser
+        try:
+            nodes = HTMLParser(body.decode('utf-8', 'replace')).css(section)
+        except Exception:
+            nodes = []
+        if nodes:
+            h = hashlib.sha1()
+            for node in nodes:
+                h.update(node.html.encode('utf-8'))
+            return 'list:' + h.hexdigest()
+    return hashlib.sha1(body).hexdigest()  # no selector, or it matched nothing
+
+
+async def _body_hash(client, url, section=None):
+    """(hash, text) of the (list section of the) body.
+
+    The hash is '' when the body exceeds PROBE_BYTES and None on HTTP errors;
+    text is the decoded page when the regular fetch would have accepted it, else None.
+    """
+    buf = bytearray()
+    async with client.stream('GET', url, headers=_UA) as resp:
+        if resp.status_code >= 400:
+            return None, None
+        async for chunk in resp.aiter_bytes():
+            buf += chunk
+            if len(buf) > PROBE_BYTES:
+                return '', None
+        ctype = (resp.headers.get('content-type') or '').split(';')[0].strip().lower()
+        usable = (not ctype or ctype in CONTENT_TYPE_ALLOW) and len(buf) <= MAX_BODY_BYTES
+        text = bytes(buf).decode(resp.encoding or 'utf-8', errors='replace') if usable else None
+    return _section_hash(bytes(buf), section), text
+
+
+async def probe_url(url: str, prev: dict = None, client=None, section: str = None) -> dict:
+    """Return {'changed': True|False|None, 'method': str, 'validators': dict}.
+
+    `changed` is None when the probe itself failed; callers treat that as a miss.
+    A body-hash miss also carries the page it read as 'body' (when usable).
+    `prev` holds validators from the last probe (etag, last_modified, body_hash);
+    `section` is the company's list selector, if any.
+    """
+    prev = prev or {}
+    own = client is None
+    if client is None:
+        import httpx
+    client = client or httpx.AsyncClient(timeout=PROBE_TIMEOUT, follow_redirects=True)
+    try:
+        headers = dict(_UA)
+        if prev.get('etag'):
+            headers['If-None-Match'] = prev['etag']
+        if prev.get('last_modified'):
+            headers['If-Modified-Since'] = prev['last_modified']
+        resp = None
+        try:
+            resp = await client.head(url, headers=headers)
+        except Exception:
+            resp = None
+        if resp is not None and resp.status_code == 304:
+            kept = {k: prev.get(k) for k in ('etag', 'last_modified', 'body_hash') if prev.get(k)}
+            return {'changed': False, 'method': 'head', 'validators': kept}
+        if resp is not None and resp.status_code < 400:
+            etag = resp.headers.get('etag')
+            lm = resp.headers.get('last-modified')
+            if etag or lm:
+                validators = {k: v for k, v in {'etag': etag, 'last_modified': lm}.items() if v}
+                if etag:
+                    same = etag == prev.get('etag')
+                else:
+                    same = lm == prev.get('last_modified')
+                return {'changed': not same, 'method': 'head', 'validators': validators}
+        try:
+            digest, text = await _body_hash(client, url, section)
+        except Exception:
+            digest, text = None, None
+        if digest is None:
+            return {'changed': None, 'method': 'body', 'validators': {}}
+        if not digest:
+            return {'changed': True, 'method': 'body', 'validators': {}}  # too large to compare
+        out = {
+            'changed': digest != prev.get('body_hash'),
+            'method': 'body',
+            'validators': {'body_hash': digest},
+        }
+        if out['changed'] and text is not None:
+            out['body'] = text
+        return out
+    finally:
+        if own:
+            await client.aclose()
+
+
+def summarize_probes(results: list) -> dict:
+    """Per-domain hit/miss/error counts from company `meta['probe']` entries."""
+    out = {}
+    for c in results:
+        p = (c.get('meta') or {}).get('probe')
+        if not p:
+            continue
+        dom = probe_domain(c.get('company', {}).get('url'))
+        slot = out.setdefault(dom, {'hit': 0, 'miss': 0, 'error': 0})
+        slot[p.get('result', 'miss')] = slot.get(p.get('result', 'miss'), 0) + 1
+    return out
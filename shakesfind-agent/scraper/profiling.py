@@ -0,0 +1,140 @@
+import cProfile, io, os, pstats, sys, threading, time
+
+# On-demand profiling of a pipeline run. Nothing here is imported or started
+# unless --profile / /debug/profile asks for it.
+#
+#   sample   - a background thread snapshots the event-loop thread's stack
+#              every SF_PROFILE_INTERVAL_MS (default 5) and folds the stacks
+#              into collapsed "a;b;c count" lines (flamegraph.pl, speedscope,
+#              inferno). Low overhead; good for "where does the time go".
+#   cprofile - deterministic cProfile; exact call counts, higher overhead.
+#              Saved as .pstats (snakeviz, flameprof) plus the same top table.
+
+MODES = ('sample', 'cprofile')
+INTERVAL_MS = float(os.getenv('SF_PROFILE_INTERVAL_MS', '5'))
+
+
+def _frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer; stacks are stored root-first."""
+
+    def __init__(self, thread_id=None, interval_ms=None):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = (interval_ms or INTERVAL_MS) / 1000
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if not stack:
+                continue
+            key = ';'.join(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sf-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        return ''.join(f"{k} {v}\n" for k, v in sorted(self.stacks.items(), key=lambda kv: -kv[1]))
+
+    def top(self, n=20):
+        """Functions by self samples (leaf) and total samples (anywhere on the stack)."""
+        own, total = {}, {}
+        for key, count in self.stacks.items():
+            frames = key.split(';')
+            own[frames[-1]] = own.get(frames[-1], 0) + count
+            for f in set(frames):
+                total[f] = total.get(f, 0) + count
+        ms = self.interval * 1000
+        rows = [{'function': f, 'self_ms': round(own.get(f, 0) * ms, 1), 'total_ms': round(c * ms, 1),
+                 'self_pct': round(100 * own.get(f, 0) / self.samples, 1) if self.samples else 0.0}
+                for f, c in total.items()]
+        rows.sort(key=lambda r: (r['self_ms'], r['total_ms']), reverse=True)
+        return rows[:n]
+
+
+def _pstats_top(prof, n=20):
+    st = pstats.Stats(prof)
+    rows = []
+    for (fn, line, name), (cc, nc, tt, ct, _callers) in st.stats.items():
+        rows.append({'function': f"{os.path.basename(fn)}:{name}:{line}", 'calls': nc,
+                     'self_ms': round(tt * 1000, 1), 'total_ms': round(ct * 1000, 1)})
+    rows.sort(key=lambda r: r['self_ms'], reverse=True)
+    return rows[:n]
+
+
+async def profile_async(fn, mode='sample', top=20, interval_ms=None):
+    """Await fn() under the chosen profiler. Returns (result, report).
+
+    report = {'mode', 'wall_ms', 'top': [...], 'collapsed': str (sample mode),
+    'pstats': cProfile.Profile (cprofile mode)}.
+    """
+    if mode not in MODES:
+        raise ValueError(f"profile mode must be one of {MODES}")
+    report = {'mode': mode}
+    t0 = time.perf_counter()
+    if mode == 'sample':
+        sampler = StackSampler(interval_ms=interval_ms)
+        sampler.start()
+        try:
+            result = await fn()
+        finally:
+            sampler.stop()
+        report.update(samples=sampler.samples, top=sampler.top(top), collapsed=sampler.collapsed())
+    else:
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            result = await fn()
+        finally:
+            prof.disable()
+        report.update(top=_pstats_top(prof, top), pstats=prof)
+    report['wall_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+    return result, report
+
+
+def format_top(report) -> str:
+    out = io.StringIO()
+    out.write(f"[PROFILE] mode={report['mode']} wall={report['wall_ms']:.0f}ms"
+              + (f" samples={report['samples']}" if 'samples' in report else '') + '\n')
+    out.write(f"{'self ms':>10} {'total ms':>10}  function\n")
+    for r in report['top']:
+        calls = f"  ({r['calls']} calls)" if 'calls' in r else ''
+        out.write(f"{r['self_ms']:10.1f} {r['total_ms']:10.1f}  {r['function']}{calls}\n")
+    return out.getvalue()
+
+
+def save_report(report, prefix) -> list:
+    """Write <prefix>.collapsed or <prefix>.pstats, plus <prefix>.top.txt. Returns the paths."""
+    paths = []
+    if report.get('collapsed') is not None:
+        p = f"{prefix}.collapsed"
+        with open(p, 'w', encoding='utf-8') as f:
+            f.write(report['collapsed'])
+        paths.append(p)
+    if report.get('pstats') is not None:
+        p = f"{prefix}.pstats"
+        report['pstats'].dump_stats(p)
+        paths.append(p)
+    p = f"{prefix}.top.txt"
+    with open(p, 'w', encoding='utf-8') as f:
+        f.write(format_top(report))
+    paths.append(p)
+    return paths
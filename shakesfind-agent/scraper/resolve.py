@@ -4,6 +4,7 @@ from shakespeare_plays import CANON_TITLES, ALIAS_TO_CANON
 # Precompute token sets
 _ws_re = re.compile(r"\s+")
 _token_re = re.compile(r"[^\w']+")
+_word_re = re.compile(r"[\w']+")  # the tokens _token_re.split leaves, found directly
 
 _STOP_SUFFIX_RE = re.compile(r"(?:[:\-–—]\s*(an\s+adaptation|a\s+new.*|in\s+concert|live).*)$", re.I)
 PREFIX_STRIP_RE = re.compile(r"^(?:william\s+)?shakespeare'?s[\s:\-–—]+", re.I)
@@ -35,7 +36,7 @@ def _looks_like_play(fragment: str) -> bool:
     return any(fl.startswith(h) for h in CORE_START_HINTS)
 
 def _tokenize(s: str):
-    return [w for w in _token_re.split(s.lower()) if w]
+    return _word_re.findall(s.lower())
 
 def _subset_score(core_tokens, canon_tokens):
     if not core_tokens or not canon_tokens:
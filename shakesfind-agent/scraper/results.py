@@ -0,0 +1,179 @@
+import contextlib, json, os, pathlib, sqlite3, time
+
+from .changes import generation_delta
+from .state import state_dir
+
+# Persisted scrape results shared by every API worker.
+#   <SF_RESULTS_DB default SF_STATE_DIR/results.sqlite>
+#     generations(version, generated_at, duration_sec, summary)
+#     companies(version, position, company_id, payload)   one JSON row per company entry
+#     changes(version, base, payload)   company deltas (changes.generation_delta) from base to version
+# SQLite in WAL mode: one writer (the elected leader), any number of readers.
+# The newest SF_RESULTS_KEEP generations are kept, and the deltas of the
+# newest SF_CHANGES_KEEP versions (compact, so a much longer ring).
+
+RESULTS_KEEP = int(os.getenv('SF_RESULTS_KEEP', '5'))
+CHANGES_KEEP = int(os.getenv('SF_CHANGES_KEEP', '100'))
+
+__all__ = ["results_db", "publish", "latest_version", "load_generation", "load_changes", "try_lead"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    generated_at TEXT NOT NULL,
+    duration_sec REAL,
+    summary TEXT
+);
+CREATE TABLE IF NOT EXISTS companies (
+    version INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    company_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (version, position)
+);
+CREATE TABLE IF NOT EXISTS changes (
+    version INTEGER PRIMARY KEY,
+    base INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+
+def results_db() -> pathlib.Path:
+    raw = os.getenv('SF_RESULTS_DB')
+    return pathlib.Path(raw) if raw else state_dir() / 'results.sqlite'
+
+
+@contextlib.contextmanager
+def _connect(path=None):
+    path = pathlib.Path(path or results_db())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(_SCHEMA)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _companies(conn, version):
+    return [json.loads(p[0]) for p in conn.execute('SELECT payload FROM companies WHERE version = ? ORDER BY position', (version,))]
+
+
+def publish(companies: list, generated_at: str = None, duration_sec: float = None, summary: dict = None,
+            keep: int = None, path=None, previous=None, changes_keep: int = None) -> int:
+    """Store one scrape result as a new generation, with its delta against the latest one; returns its version.
+
+    `previous` is an optional (version, companies) the caller already holds;
+    it saves reloading the base generation when it is still the latest.
+    """
+    generated_at = generated_at or time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    keep = keep or RESULTS_KEEP
+    changes_keep = changes_keep or CHANGES_KEEP
+    with _connect(path) as conn:
+        base = conn.execute('SELECT MAX(version) FROM generations').fetchone()[0]
+        if base is not None:
+            old = previous[1] if previous and previous[0] == base else _companies(conn, base)
+            delta = json.dumps(generation_delta(old, companies), ensure_ascii=False, separators=(',', ':'))
+        cur = conn.execute(
+            'INSERT INTO generations(generated_at, duration_sec, summary) VALUES (?,?,?)',
+            (generated_at, duration_sec, json.dumps(summary) if summary is not None else None),
+        )
+        version = cur.lastrowid
+        conn.executemany(
+            'INSERT INTO companies(version, position, company_id, payload) VALUES (?,?,?,?)',
+            [(version, i, c['company']['id'], json.dumps(c, ensure_ascii=False, separators=(',', ':')))
+             for i, c in enumerate(companies)],
+        )
+        if base is not None:
+            conn.execute('INSERT INTO changes(version, base, payload) VALUES (?,?,?)', (version, base, delta))
+            conn.execute('DELETE FROM changes WHERE version NOT IN (SELECT version FROM changes ORDER BY version DESC LIMIT ?)',
+                         (changes_keep,))
+        stale = [r[0] for r in conn.execute('SELECT version FROM generations ORDER BY version DESC LIMIT -1 OFFSET ?', (keep,))]
+        if stale:
+            marks = ','.join('?' * len(stale))
+            conn.execute(f'DELETE FROM companies WHERE version IN ({marks})', stale)
+            conn.execute(f'DELETE FROM generations WHERE version IN ({marks})', stale)
+    return version
+
+
+def latest_version(path=None):
+    """Cheap poll for followers: newest version number, or None when nothing was published."""
+    p = pathlib.Path(path or results_db())
+    if not p.exists():
+        return None
+    with _connect(p) as conn:
+        row = conn.execute('SELECT MAX(version) FROM generations').fetchone()
+    return row[0] if row else None
+
+
+def load_generation(version: int = None, path=None):
+    """{'version', 'generated_at', 'duration_sec', 'summary', 'companies'} for a version (default latest), or None."""
+    p = pathlib.Path(path or results_db())
+    if not p.exists():
+        return None
+    with _connect(p) as conn:
+        if version is None:
+            row = conn.execute('SELECT version, generated_at, duration_sec, summary FROM generations ORDER BY version DESC LIMIT 1').fetchone()
+        else:
+            row = conn.execute('SELECT version, generated_at, duration_sec, summary FROM generations WHERE version = ?', (version,)).fetchone()
+        if row is None:
+            return None
+        companies = _companies(conn, row[0])
+    return {
+        'version': row[0],
+        'generated_at': row[1],
+        'duration_sec': row[2],
+        'summary': json.loads(row[3]) if row[3] else None,
+        'companies': companies,
+    }
+
+
+def load_changes(since: int, upto: int = None, path=None):
+    """Deltas (oldest first) taking version `since` to `upto` (default latest), or None when the
+    chain no longer reaches back to `since` (aged out, unknown or future version)."""
+    p = pathlib.Path(path or results_db())
+    if not p.exists():
+        return None
+    with _connect(p) as conn:
+        upto = upto if upto is not None else conn.execute('SELECT MAX(version) FROM generations').fetchone()[0]
+        if upto is None or since > upto:
+            return None
+        rows = conn.execute('SELECT version, base, payload FROM changes WHERE version > ? AND version <= ? ORDER BY version',
+                            (since, upto)).fetchall()
+    expected = since
+    for version, base, _ in rows:
+        if base != expected:
+            return None
+        expected = version
+    if expected != upto:
+        return None
+    return [json.loads(payload) for _, _, payload in rows]
+
+
+def try_lead(lock_path=None):
+    """Try to become the scraping leader among API workers.
+
+    Returns an open lock file that must stay referenced while leading (the
+    OS releases the flock when the process exits), or None when another
+    worker already leads. Without fcntl (Windows) every worker leads.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return open(os.devnull)
+    p = pathlib.Path(lock_path or state_dir() / 'api-leader.lock')
+    p.parent.mkdir(parents=True, exist_ok=True)
+    fh = open(p, 'a+')
+    try:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        fh.close()
+        return None
+    fh.seek(0)
+    fh.truncate()
+    fh.write(str(os.getpid()))
+    fh.flush()
+    return fh
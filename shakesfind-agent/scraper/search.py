@@ -0,0 +1,180 @@
+import copy, heapq, math, os, time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from operator import itemgetter
+
+from .resolve import _tokenize
+
+# In-memory inverted index over the served rows (title, description, venue).
+# One segment per company: token -> array of row positions, split into title
+# and body postings, plus the segment's sorted vocabulary for prefix lookups.
+# A new generation only rebuilds the segments whose indexed text changed (row
+# order included), so one company re-scraped costs one segment; dates and
+# fetch stamps do not count, unchanged segments just take the new row dicts.
+# Indexes are immutable once built: the next one is made beside the served one.
+# Queries AND their tokens; every token also matches as a prefix (type-ahead),
+# exact hits scoring above prefix hits. Score is the sum of idf-weighted field
+# hits, a title hit counting TITLE_BOOST times a description/venue hit.
+
+TITLE_BOOST = 3.0
+PREFIX_WEIGHT = 0.6
+PREFIX_EXPANSIONS = int(os.getenv('SF_SEARCH_PREFIX_EXPANSIONS', '64'))  # per token per segment
+MIN_PREFIX = 2  # shorter tokens only match exactly
+MAX_DESCRIPTION_CHARS = 1000
+
+__all__ = ["SearchIndex", "Segment", "fields", "TITLE_BOOST", "PREFIX_WEIGHT"]
+
+
+def fields(row):
+    """The indexed text of a row: (title, body)."""
+    return (f"{row.get('title_display') or ''} {row.get('canonical_title') or ''}",
+            f"{(row.get('description') or '')[:MAX_DESCRIPTION_CHARS]} {row.get('venue') or ''}")
+
+
+def _postings(token_sets, code):
+    """token -> array of the positions whose set holds it.
+
+    Arrays are not tracked by the cyclic GC: kept as lists, millions of
+    posting lists would make every full collection (and the query that
+    triggers it) crawl.
+    """
+    out = defaultdict(list)
+    for pos, ts in enumerate(token_sets):
+        for tok in ts:
+            out[tok].append(pos)
+    return {tok: array(code, p) for tok, p in out.items()}
+
+
+class Segment:
+    """Postings for one company's rows."""
+
+    def __init__(self, stub, rows, key=None):
+        self.stub = stub
+        self.rows = rows
+        self.key = key if key is not None else tuple(fields(r) for r in rows)
+        tokens = {}  # a company's venue and show texts repeat: tokenize each text once
+        title_sets, body_sets = [], []
+        for title_text, body_text in self.key:
+            t = tokens.get(title_text)
+            if t is None:
+                t = tokens[title_text] = set(_tokenize(title_text))
+            b = tokens.get(body_text)
+            if b is None:
+                b = tokens[body_text] = set(_tokenize(body_text))
+            title_sets.append(t)
+            body_sets.append(b)
+        code = 'H' if len(rows) < 65536 else 'I'
+        self.title, self.body = _postings(title_sets, code), _postings(body_sets, code)
+        # field postings per token, for the index-wide idf
+        self.df = {tok: len(self.title.get(tok, ())) + len(self.body.get(tok, ())) for tok in self.title.keys() | self.body.keys()}
+        self.vocab = sorted(self.df)
+
+    def expand(self, token):
+        """(term, weight) pairs matching `token` exactly or, from MIN_PREFIX chars on, as a prefix."""
+        if len(token) < MIN_PREFIX:
+            return [(token, 1.0)] if token in self.df else []
+        i = bisect_left(self.vocab, token)
+        out = []
+        for term in self.vocab[i:i + PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            out.append((term, 1.0 if term == token else PREFIX_WEIGHT))
+        return out
+
+    def match(self, tokens, idf):
+        """{row position: score} for rows matching every token."""
+        scores = None
+        for tok in tokens:
+            weighted = []
+            for term, weight in self.expand(tok):
+                w = weight * idf(term)
+                if term in self.body:
+                    weighted.append((w, self.body[term]))
+                if term in self.title:
+                    weighted.append((w * TITLE_BOOST, self.title[term]))
+            weighted.sort(key=itemgetter(0))
+            hits = {}
+            for w, postings in weighted:  # ascending, so each row ends with its best hit for this token
+                hits.update(dict.fromkeys(postings, w))
+            scores = hits if scores is None else {p: scores[p] + hits[p] for p in scores.keys() & hits.keys()}
+            if not scores:
+                return {}
+        return scores
+
+
+def _count(df, seg, sign):
+    if seg is None:
+        return
+    for t, n in seg.df.items():
+        left = df.get(t, 0) + sign * n
+        if left:
+            df[t] = left
+        else:
+            df.pop(t, None)
+
+
+class SearchIndex:
+    """One generation's index. updated() returns the next one, sharing unchanged segments."""
+
+    def __init__(self, segments=None, df=None, version=None, stats=None):
+        self.segments = segments or {}
+        self.df = df or {}
+        self.rows = sum(len(seg.rows) for seg in self.segments.values())
+        self.version = version
+        self.stats = stats if stats is not None else {'builds': 0, 'segments_rebuilt': 0, 'segments_reused': 0,
+                                                      'last_build_ms': None}
+
+    def updated(self, companies, version=None):
+        """Index for a generation's company entries; only companies whose indexed text changed are re-tokenized.
+
+        Does not modify self, so it can run in a thread while self serves queries.
+        """
+        t0 = time.perf_counter()
+        segments, df, rebuilt = {}, dict(self.df), 0
+        for c in companies:
+            stub = c['company']
+            key = tuple(fields(r) for r in c['events'])
+            old = self.segments.get(stub['id'])
+            if old is not None and old.key == key:
+                seg = copy.copy(old)  # same postings, this generation's row dicts
+                seg.stub, seg.rows = stub, c['events']
+            else:
+                seg = Segment(stub, c['events'], key)
+                rebuilt += 1
+                _count(df, old, -1)
+                _count(df, seg, 1)
+            segments[stub['id']] = seg
+        for cid, old in self.segments.items():
+            if cid not in segments:
+                _count(df, old, -1)
+        # cumulative counters live on each generation: the served index's dict is never touched
+        stats = {
+            'builds': self.stats['builds'] + 1,
+            'segments_rebuilt': self.stats['segments_rebuilt'] + rebuilt,
+            'segments_reused': self.stats['segments_reused'] + len(segments) - rebuilt,
+            'last_build_ms': round((time.perf_counter() - t0) * 1000, 2),
+        }
+        return SearchIndex(segments, df, version, stats)
+
+    def idf(self, term) -> float:
+        return math.log(1.0 + self.rows / self.df.get(term, 1))
+
+    def search(self, query: str, limit: int = 20, company: str = None):
+        """(total, [(score, company stub, row)]) best first."""
+        tokens = list(dict.fromkeys(_tokenize(query or '')))
+        if not tokens:
+            return 0, []
+        segments = [self.segments[company]] if company in self.segments else [] if company else self.segments.values()
+        total, ranked, order = 0, [], 0
+        for seg in segments:
+            scores = seg.match(tokens, self.idf)
+            total += len(scores)
+            for pos, score in heapq.nlargest(limit, scores.items(), key=itemgetter(1)):
+                ranked.append((-score, order + pos, seg, pos))
+            order += len(seg.rows)
+        ranked.sort(key=itemgetter(0, 1))
+        return total, [(round(-neg, 4), seg.stub, seg.rows[pos]) for neg, _, seg, pos in ranked[:limit]]
+
+    def info(self):
+        return {**self.stats, 'version': self.version, 'companies': len(self.segments), 'rows': self.rows, 'terms': len(self.df)}
@@ -0,0 +1,142 @@
+import gzip, json, os
+
+# Response encoding for the API hot path.
+# JSON goes through orjson when it is installed (stdlib json otherwise).
+# Rows are serialized once per result generation and reused as fragments:
+# a JSON array is '[' + ','.join(fragments) + ']' and a MessagePack array is
+# a header followed by the packed elements, so any filtered selection is a
+# byte join. orjson/brotli/msgpack are pinned in requirements.txt but stay
+# optional imports: without them stdlib json and gzip are used and msgpack
+# requests get 406.
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None
+try:
+    import brotli  # type: ignore
+except Exception:  # pragma: no cover
+    brotli = None
+try:
+    import msgpack  # type: ignore
+except Exception:  # pragma: no cover
+    msgpack = None
+
+COMPRESS_MIN_BYTES = int(os.getenv('SF_COMPRESS_MIN_BYTES', '1024'))
+MEDIA_TYPES = {'json': 'application/json', 'msgpack': 'application/msgpack'}
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def _msgpack_array_header(n: int) -> bytes:
+    if n < 16:
+        return bytes([0x90 | n])
+    if n < 1 << 16:
+        return b'\xdc' + n.to_bytes(2, 'big')
+    return b'\xdd' + n.to_bytes(4, 'big')
+
+
+def join_array(fragments, fmt='json') -> bytes:
+    if fmt == 'msgpack':
+        return _msgpack_array_header(len(fragments)) + b''.join(fragments)
+    return b'[' + b','.join(fragments) + b']'
+
+
+def encode_one(obj, fmt='json') -> bytes:
+    if fmt == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError('msgpack not installed')
+        return msgpack.packb(obj, use_bin_type=True, default=str)
+    return dumps(obj)
+
+
+def negotiate_format(accept: str = None, fmt: str = None):
+    """'json' | 'msgpack' from ?format= or the Accept header; None when msgpack is asked for but unavailable."""
+    want = fmt or ('msgpack' if accept and ('application/msgpack' in accept or 'application/x-msgpack' in accept) else 'json')
+    if want == 'msgpack' and msgpack is None:
+        return None
+    return want if want in MEDIA_TYPES else 'json'
+
+
+def negotiate_encoding(accept_encoding: str = None):
+    """Best content-coding we can produce for an Accept-Encoding header (br > gzip), or None."""
+    if not accept_encoding:
+        return None
+    offered = {}
+    for part in accept_encoding.split(','):
+        token, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[token.strip().lower()] = q
+    for enc in (('br',) if brotli is not None else ()) + ('gzip',):
+        if offered.get(enc, offered.get('*', 0)) > 0:
+            return enc
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    return body
+
+
+class RowView:
+    """Pre-serialized rows of one result generation.
+
+    Each item is an event row merged with its company stub (the /productions
+    shape). Fragments are encoded lazily per format and kept for the life of
+    the generation; the unfiltered body is kept per (format, encoding).
+    """
+
+    def __init__(self, companies):
+        self.rows = []
+        self.by_company = {}
+        for c in companies:
+            start = len(self.rows)
+            stub = c['company']
+            self.rows.extend({**e, 'company': stub} for e in c['events'])
+            self.by_company[stub['id']] = range(start, len(self.rows))
+        self._fragments = {}
+        self._full = {}
+
+    def select(self, company=None, play=None):
+        """Row indices matching the /productions filters, in result order."""
+        idx = self.by_company.get(company, range(0)) if company else range(len(self.rows))
+        if not play:
+            return idx
+        want = play.replace(' ', '').lower()
+        return [i for i in idx if (self.rows[i].get('canonical_title') or '').lower().replace(' ', '') == want]
+
+    def fragments(self, fmt='json'):
+        frags = self._fragments.get(fmt)
+        if frags is None:
+            frags = self._fragments[fmt] = [encode_one(r, fmt) for r in self.rows]
+        return frags
+
+    def body(self, indices, fmt='json') -> bytes:
+        frags = self.fragments(fmt)
+        if isinstance(indices, range) and indices.step == 1:
+            return join_array(frags[indices.start:indices.stop], fmt)
+        return join_array([frags[i] for i in indices], fmt)
+
+    def encoded(self, indices, fmt='json', encoding=None):
+        """(payload, content_encoding) with compression applied above COMPRESS_MIN_BYTES."""
+        full = isinstance(indices, range) and len(indices) == len(self.rows)
+        key = (fmt, encoding)
+        if full and key in self._full:
+            return self._full[key]
+        body = self.body(indices, fmt)
+        out = (compress(body, encoding), encoding) if encoding and len(body) >= COMPRESS_MIN_BYTES else (body, None)
+        if full:
+            self._full[key] = out
+        return out
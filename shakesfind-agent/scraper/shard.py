@@ -0,0 +1,77 @@
+import hashlib, json, pathlib
+
+# Deterministic partitioning of the company list across machines.
+# A company belongs to shard sha1(id) mod N, so its assignment depends only on
+# its own id and N: adding or removing companies never moves the others.
+# Each shard exports a normal result whose _summary carries {'index', 'count'};
+# merge_parts() recombines them and checks that the shards fit together.
+
+__all__ = ["parse_shard", "shard_of", "select", "load_part", "merge_parts"]
+
+
+def parse_shard(spec: str):
+    """'i/N' (0-based index) -> (i, N)."""
+    try:
+        index, count = (int(x) for x in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {spec!r}")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"shard index must be in 0..{count - 1}, got {spec!r}")
+    return index, count
+
+
+def shard_of(company_id: str, count: int) -> int:
+    digest = hashlib.sha1(str(company_id).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count
+
+
+def select(companies, shard):
+    """Companies assigned to shard (index, count); everything when shard is None."""
+    if shard is None:
+        return list(companies)
+    index, count = shard
+    return [c for c in companies if shard_of(c['id'], count) == index]
+
+
+def load_part(path) -> dict:
+    p = pathlib.Path(path)
+    text = p.read_text(encoding='utf-8')
+    if p.suffix.lower() in ('.yaml', '.yml'):
+        import yaml
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def merge_parts(parts):
+    """Combine shard exports -> (companies, shards, missing).
+
+    `shards` lists each part's shard info and headline numbers; `missing` holds
+    shard indices that were expected but not supplied. Mixed shard counts,
+    repeated shards or a company present in two parts raise ValueError.
+    """
+    companies, shards, seen_ids = [], [], set()
+    counts, indices = set(), set()
+    for part in parts:
+        summary = part.get('_summary') or {}
+        info = summary.get('shard')
+        if info:
+            if info['index'] in indices:
+                raise ValueError(f"shard {info['index']}/{info['count']} given twice")
+            counts.add(info['count'])
+            indices.add(info['index'])
+        for c in part.get('companies', []):
+            cid = c['company']['id']
+            if cid in seen_ids:
+                raise ValueError(f"company {cid} appears in more than one part")
+            seen_ids.add(cid)
+            companies.append(c)
+        shards.append({
+            **(info or {'index': None, 'count': None}),
+            'companies': len(part.get('companies', [])),
+            'total_events': summary.get('total_events'),
+            'wall_ms': (summary.get('timings') or {}).get('wall_ms'),
+        })
+    if len(counts) > 1:
+        raise ValueError(f"parts come from different shard counts: {sorted(counts)}")
+    missing = sorted(set(range(counts.pop())) - indices) if counts else []
+    return companies, shards, missing
@@ -1,4 +1,5 @@
 import re, datetime
+from scraper.utils import current_date
 
 SEASON_TOKENS = re.compile(r"(?i)\b(spring|summer|fall|autumn|winter|holiday|holidays)\b")
 YEAR_RX = re.compile(r"(20\d{2})")
@@ -23,7 +24,7 @@ def analyze_staleness(company: dict, events: list, today: datetime.date=None):
       - url_year_mismatch: URL contains year far in past (>1 year behind current)
       - season_window_expired: season/holiday token year expired
     """
-    today = today or datetime.date.today()
+    today = today or current_date()
     reasons = []
     info = {}
     url = company.get('Productions URL') or company.get('Homepage URL') or ''
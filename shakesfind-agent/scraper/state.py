@@ -0,0 +1,56 @@
+import contextlib, json, os, pathlib, tempfile
+
+# Small JSON documents persisted between runs (probe validators, last rows, ...).
+# One file per namespace under SF_STATE_DIR; writes go through temp + rename.
+# Per-company namespaces shared by concurrent runs (shards on one host) are
+# updated with merge_state, which re-reads and writes under a flock.
+
+def state_dir() -> pathlib.Path:
+    return pathlib.Path(os.getenv('SF_STATE_DIR', '.sf_state'))
+
+def load_state(name: str) -> dict:
+    fp = state_dir() / f"{name}.json"
+    if not fp.exists():
+        return {}
+    try:
+        return json.loads(fp.read_text(encoding='utf-8')) or {}
+    except Exception:
+        return {}
+
+def save_state(name: str, data: dict):
+    d = state_dir()
+    d.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix='.tmp', dir=d)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+        os.replace(tmp, d / f"{name}.json")
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+@contextlib.contextmanager
+def _locked(name: str):
+    try:
+        import fcntl
+    except ImportError:  # Windows: no cross-process lock
+        yield
+        return
+    d = state_dir()
+    d.mkdir(parents=True, exist_ok=True)
+    with open(d / f".{name}.lock", 'a') as fh:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+def merge_state(name: str, entries: dict) -> dict:
+    """Overwrite just `entries`' keys of a namespace, keeping keys other runs wrote meanwhile."""
+    with _locked(name):
+        data = {**load_state(name), **entries}
+        save_state(name, data)
+    return data
@@ -0,0 +1,78 @@
+import os
+
+# Learned per-company extraction order, persisted in state under 'strategies'.
+#   {company_id: {'runs': n, 'winner': 'html',
+#                 'stats': {name: {'tries', 'hits', 'empty_streak', 'last_events', 'avg_ms', 'last_run'}},
+#                 'html_plan': {...}}}   selector plan found by the HTML fallback (extractors.html)
+# Strategies that produced events go first, cheapest first, and the first one
+# with events wins. One that came up empty SKIP_AFTER runs in a row is skipped.
+# Any strategy not tried for REPROBE_RUNS runs is tried again alongside the
+# winner, so a site redesign is noticed.
+
+SKIP_AFTER = int(os.getenv('SF_STRATEGY_SKIP_AFTER', '3'))
+REPROBE_RUNS = int(os.getenv('SF_STRATEGY_REPROBE_RUNS', '10'))
+_ALPHA = 0.3  # weight of the newest sample in avg_ms
+
+__all__ = ["plan", "record", "summary", "SKIP_AFTER", "REPROBE_RUNS"]
+
+
+def plan(enabled, learned=None):
+    """(order, reprobe, skipped) for the enabled strategies, `enabled` being the static preference order.
+
+    `order` is tried until one produces events; `reprobe` members of it run
+    anyway because they have not been tried for REPROBE_RUNS runs; `skipped`
+    ones only run when nothing in `order` produced events.
+    """
+    if not learned:
+        return list(enabled), [], []
+    stats = learned.get('stats') or {}
+    run = learned.get('runs', 0)
+    due = lambda name: name in stats and run - stats[name].get('last_run', 0) >= REPROBE_RUNS
+    order, skipped = [], []
+    for name in enabled:
+        s = stats.get(name)
+        if s and s.get('empty_streak', 0) >= SKIP_AFTER and not due(name):
+            skipped.append(name)
+        else:
+            order.append(name)
+
+    def rank(name):
+        s = stats.get(name)
+        if s is None:
+            return (1, 0.0)  # untried: after known producers, in static order
+        if s.get('last_events'):
+            return (0, s.get('avg_ms') or 0.0)
+        return (2, 0.0)
+    order.sort(key=rank)  # stable: ties keep the static order
+    return order, [name for name in order[1:] if due(name)], skipped
+
+
+def record(learned, tried, winner):
+    """Fold one run's {name: {'events', 'ms'}} into the learned entry (created when None); returns it."""
+    learned = learned if learned is not None else {}
+    learned['runs'] = run = learned.get('runs', 0) + 1
+    stats = learned.setdefault('stats', {})
+    for name, t in tried.items():
+        s = stats.setdefault(name, {'tries': 0, 'hits': 0, 'empty_streak': 0})
+        s['tries'] += 1
+        s['last_run'] = run
+        s['last_events'] = t['events']
+        s['avg_ms'] = round(t['ms'] if s.get('avg_ms') is None else (1 - _ALPHA) * s['avg_ms'] + _ALPHA * t['ms'], 2)
+        if t['events']:
+            s['hits'] += 1
+            s['empty_streak'] = 0
+        else:
+            s['empty_streak'] += 1
+    if winner:
+        learned['winner'] = winner
+    return learned
+
+
+def summary(order, skipped, tried, winner):
+    """Company meta view of one run."""
+    return {
+        'order': order,
+        'skipped': skipped,
+        'winner': winner,
+        'tried': {name: {'events': t['events'], 'ms': round(t['ms'], 1)} for name, t in tried.items()},
+    }
@@ -0,0 +1,140 @@
+import codecs, os, re
+from html.parser import HTMLParser as _StdHTMLParser
+from . import log
+
+# Streaming, size-capped response bodies.
+# Bodies are decoded incrementally chunk by chunk; reading stops at
+# MAX_BODY_BYTES (flagged as oversize) or, optionally, as soon as the element
+# containing the configured list selector's cards has closed.
+
+MAX_BODY_BYTES = int(os.getenv('SF_MAX_BODY_BYTES', str(5 * 1024 * 1024)))
+CONTENT_TYPE_ALLOW = {
+    'text/html', 'application/xhtml+xml', 'text/xml', 'application/xml', 'text/plain',
+    'text/calendar', 'application/rss+xml', 'application/atom+xml',
+    'application/ld+json', 'application/json',
+}
+_VOID = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+_COMPOUND_RX = re.compile(r"^(?P<tag>[a-zA-Z][\w-]*)?(?P<rest>(?:[.#][\w-]+)*)$")
+
+__all__ = ["BodyRejected", "ListContainerTracker", "read_capped", "MAX_BODY_BYTES", "CONTENT_TYPE_ALLOW"]
+
+
+class BodyRejected(Exception):
+    """Response content-type is outside the allowlist."""
+
+
+def _parse_compound(sel: str):
+    m = _COMPOUND_RX.match(sel.strip())
+    if not m or not (m.group('tag') or m.group('rest')):
+        return None
+    classes = set(re.findall(r"\.([\w-]+)", m.group('rest')))
+    ids = re.findall(r"#([\w-]+)", m.group('rest'))
+    return ((m.group('tag') or '').lower() or None, classes, ids[0] if ids else None)
+
+
+class ListContainerTracker(_StdHTMLParser):
+    """Detects when the container of a list selector has closed in a streamed page.
+
+    For a descendant selector (`section.shows .show-card`) the container is the
+    outermost compound; for a single compound (`.show-card`) it is the parent
+    of the first matching card. Only tag/.class/#id compounds are understood;
+    anything else (commas, attributes, pseudo-classes) disables early stop.
+    """
+
+    def __init__(self, list_selector: str):
+        super().__init__(convert_charrefs=False)
+        self.done = False
+        self.enabled = False
+        self._stack = []
+        self._target_depth = None
+        sel = (list_selector or '').strip()
+        if not sel or ',' in sel:
+            return
+        parts = sel.split()
+        compounds = [_parse_compound(p) for p in parts]
+        if any(c is None for c in compounds) or any(p in ('>', '+', '~') for p in parts):
+            return
+        self.enabled = True
+        self._match = compounds[0]
+        self._use_parent = len(compounds) == 1
+
+    @staticmethod
+    def _matches(compound, tag, attrs):
+        ctag, classes, cid = compound
+        if ctag and ctag != tag:
+            return False
+        a = dict(attrs)
+        if cid and a.get('id') != cid:
+            return False
+        if classes and not classes.issubset(set((a.get('class') or '').split())):
+            return False
+        return True
+
+    def handle_starttag(self, tag, attrs):
+        if self.done or tag in _VOID:
+            return
+        self._stack.append(tag)
+        if self._target_depth is None and self._matches(self._match, tag, attrs):
+            depth = len(self._stack) - (1 if self._use_parent else 0)
+            self._target_depth = depth if depth > 0 else None
+
+    def handle_endtag(self, tag):
+        if self.done or tag in _VOID:
+            return
+        if tag not in self._stack:
+            return  # stray end tag
+        while self._stack:
+            if self._stack.pop() == tag:
+                break
+        if self._target_depth is not None and len(self._stack) < self._target_depth:
+            self.done = True
+
+    def push(self, text: str) -> bool:
+        if self.enabled and not self.done:
+            self.feed(text)
+        return self.done
+
+
+def _decoder_for(encoding: str):
+    try:
+        return codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    except LookupError:
+        return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+
+async def read_capped(resp, info: dict, max_bytes: int = None, stop_after: str = None) -> str:
+    """Read a streamed httpx response into text under the configured limits.
+
+    Fills `info` with content_type, bytes and, when applicable, oversize /
+    stopped_early. Raises BodyRejected for disallowed content types.
+    """
+    max_bytes = max_bytes or MAX_BODY_BYTES
+    ctype = (resp.headers.get('content-type') or '').split(';')[0].strip().lower()
+    info['content_type'] = ctype or None
+    if ctype and ctype not in CONTENT_TYPE_ALLOW:
+        info['rejected_content_type'] = ctype
+        raise BodyRejected(f'content-type {ctype} not allowed for {resp.request.url}')
+    declared = resp.headers.get('content-length')
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        info['declared_bytes'] = int(declared)
+    decoder = _decoder_for(resp.charset_encoding)
+    tracker = ListContainerTracker(stop_after) if stop_after else None
+    parts = []
+    n = 0
+    async for chunk in resp.aiter_bytes():
+        if n + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - n]
+            info['oversize'] = True
+        n += len(chunk)
+        text = decoder.decode(chunk)
+        parts.append(text)
+        if info.get('oversize'):
+            break
+        if tracker is not None and tracker.push(text):
+            info['stopped_early'] = True
+            break
+    parts.append(decoder.decode(b'', final=True))
+    info['bytes'] = n
+    if info.get('oversize'):
+        log.warning('fetch.oversize', url=resp.request.url, max_bytes=max_bytes)
+    return ''.join(parts)
@@ -1,16 +1,57 @@
-import httpx, asyncio, datetime as dt, datetime, random, time
-from requests_cache import CachedSession
+import asyncio, datetime as dt, datetime, os, random, time
 curl_requests = None  # disabled due to instability on current runtime
+from .heavy import heavy_fetch
+from .stream import read_capped, BodyRejected, MAX_BODY_BYTES, CONTENT_TYPE_ALLOW
+from .archive import store_page, store_rows
+from . import log
 
-_session = CachedSession(cache_name='http_cache', backend='sqlite', expire_after=3600)
+_session = None
 
-async def fetch_text(url: str, allow_heavy: bool=True) -> str:
+def _get_session():
+    """The requests_cache session (and its SQLite file) is only created on first fallback use."""
+    global _session
+    if _session is None:
+        from requests_cache import CachedSession
+        _session = CachedSession(cache_name='http_cache', backend='sqlite', expire_after=3600)
+    return _session
+
+async def _get_streamed(client, url, headers, info, params=None, stop_after=None, max_bytes=None):
+    """GET with a streamed, size-capped body. Returns None on 403 (body unread)."""
+    async with client.stream('GET', url, headers=headers, params=params) as resp:
+        if resp.status_code == 403:
+            return None
+        resp.raise_for_status()
+        return await read_capped(resp, info, max_bytes=max_bytes, stop_after=stop_after)
+
+def _capped_cached_text(resp, info, max_bytes=None):
+    # requests_cache has already buffered the body; enforce the same limits on the way out
+    max_bytes = max_bytes or MAX_BODY_BYTES
+    ctype = (resp.headers.get('content-type') or '').split(';')[0].strip().lower()
+    info['content_type'] = ctype or None
+    if ctype and ctype not in CONTENT_TYPE_ALLOW:
+        info['rejected_content_type'] = ctype
+        raise BodyRejected(f'content-type {ctype} not allowed for {resp.url}')
+    body = resp.content
+    if len(body) > max_bytes:
+        info['oversize'] = True
+        body = body[:max_bytes]
+    info['bytes'] = len(body)
+    return body.decode(resp.encoding or 'utf-8', errors='replace')
+
+async def fetch_text(url: str, allow_heavy: bool=False, info: dict=None, stop_after: str=None, max_bytes: int=None) -> str:
     """Fetch URL text with a friendly default UA and fallback retry.
 
     Some theatre sites may block unknown bots with a 403. We retry once with a
     common browser UA string to reduce false negatives while still identifying
-    ourselves initially.
+    ourselves initially. When `allow_heavy` is set (per-company opt-in) a
+    failed plain fetch falls through to the pooled headless browser tier.
+    `info`, if given, is filled with the tier that produced the body.
+
+    Bodies are streamed and capped at `max_bytes` (SF_MAX_BODY_BYTES); an
+    oversize body is truncated and flagged in `info` rather than buffered.
+    `stop_after` (a list selector) ends the read once its container closes.
     """
+    info = info if info is not None else {}
     domain_specific = {}
     if 'shakespearetavern.com' in url:
         domain_specific = {
@@ -25,6 +66,7 @@ async def fetch_text(url: str, allow_heavy: bool=True) -> str:
     headers_fallback = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.1 Safari/537.36', **{k:v for k,v in domain_specific.items() if k!='User-Agent'}}
     
     # Use httpx for proper compression handling (Brotli, gzip)
+    import httpx
     async with httpx.AsyncClient(timeout=30.0) as client:
         # For tougher domains apply progressive strategy
         if 'shakespearetavern.com' in url:
@@ -43,34 +85,58 @@ async def fetch_text(url: str, allow_heavy: bool=True) -> str:
                 hdrs = {**headers_fallback, 'User-Agent': ua, 'Pragma': 'no-cache'}
                 await asyncio.sleep(random.uniform(0.25, 0.6))
                 params = {'_': int(time.time()*1000)}
-                resp = await client.get(url, headers=hdrs, params=params)
-                if resp.status_code != 403:
-                    resp.raise_for_status()
-                    return resp.text
+                text = await _get_streamed(client, url, hdrs, info, params=params, stop_after=stop_after, max_bytes=max_bytes)
+                if text is not None:
+                    info['tier'] = 'httpx'
+                    return text
             if allow_heavy:
-                # Heavy fallback (Playwright) intentionally disabled for stability; could be re-enabled behind flag.
-                try:
-                    # Placeholder: log skipped heavy fetch
-                    pass
-                except Exception:
-                    pass
+                return await heavy_fetch(url, info=info)
             raise Exception('403 Forbidden after advanced retries (heavy fallback disabled) for shakespearetavern.com')
         
         # Non-protected domains path - try primary headers first
         try:
             params = {'_': datetime.datetime.utcnow().timestamp()} if domain_specific else None
-            resp = await client.get(url, headers=headers_primary, params=params)
-            if resp.status_code == 403:
-                resp = await client.get(url, headers=headers_fallback)
-            resp.raise_for_status()
-            return resp.text
+            text = await _get_streamed(client, url, headers_primary, info, params=params, stop_after=stop_after, max_bytes=max_bytes)
+            if text is None:
+                text = await _get_streamed(client, url, headers_fallback, info, stop_after=stop_after, max_bytes=max_bytes)
+            if text is None:
+                raise Exception(f'403 Forbidden for {url}')
+            info['tier'] = 'httpx'
+            return text
+        except BodyRejected:
+            raise
         except Exception as e:
             # Fallback to requests_cache for sites that work better with it
-            resp = _session.get(url, headers=headers_primary, params={'_': datetime.datetime.utcnow().timestamp()} if domain_specific else None)
-            if resp.status_code == 403:
-                resp = _session.get(url, headers=headers_fallback)
-            resp.raise_for_status()
-            return resp.text
+            try:
+                session = _get_session()
+                resp = session.get(url, headers=headers_primary, params={'_': datetime.datetime.utcnow().timestamp()} if domain_specific else None)
+                if resp.status_code == 403:
+                    resp = session.get(url, headers=headers_fallback)
+                resp.raise_for_status()
+                info['tier'] = 'requests_cache'
+                info['from_cache'] = bool(getattr(resp, 'from_cache', False))
+                return _capped_cached_text(resp, info, max_bytes=max_bytes)
+            except BodyRejected:
+                raise
+            except Exception:
+                if not allow_heavy:
+                    raise
+            return await heavy_fetch(url, info=info)
+
+def archive_page(company_id, url, html):
+    """Best-effort snapshot of a fetched page into the content-addressed archive."""
+    try:
+        return store_page(company_id, url, html)
+    except Exception as e:
+        log.error('archive.store_failed', url=url, error=e)
+        return None
+
+def record_rows(company_id, sha, rows):
+    """Remember the rows produced from an archived page so reprocessing can diff against them."""
+    try:
+        store_rows(company_id, sha, rows)
+    except Exception as e:
+        log.error('archive.rows_failed', error=e)
 
 async def fetch_with_cache(url: str, force: bool=False) -> str:
     """Fetch a URL optionally bypassing the existing cache.
@@ -81,18 +147,26 @@ async def fetch_with_cache(url: str, force: bool=False) -> str:
     Returns:
         text content
     """
+    session = _get_session()
     if force:
         # requests-cache offers .cache.delete_url; fall back to clear()
         try:
-            _session.cache.delete_url(url)
+            session.cache.delete_url(url)
         except Exception:
             try:
-                _session.cache.clear()
+                session.cache.clear()
             except Exception:
                 pass
-    resp = _session.get(url, headers={'User-Agent': 'ShakesFindBot/0.1'})
+    resp = session.get(url, headers={'User-Agent': 'ShakesFindBot/0.1'})
     resp.raise_for_status()
     return resp.text
 
 def now_utc():
     return dt.datetime.utcnow().replace(tzinfo=dt.timezone.utc)
+
+def current_date():
+    """Today's date; SF_TODAY=YYYY-MM-DD pins it for deterministic reprocessing."""
+    raw = os.getenv('SF_TODAY')
+    if raw:
+        return dt.date.fromisoformat(raw)
+    return dt.date.today()
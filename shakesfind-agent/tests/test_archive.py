@@ -0,0 +1,62 @@
+import datetime as dt, os, pathlib, time
+
+from scraper.archive import _blob_path, archive_dir, store_page, latest_page, iter_pages, apply_retention
+
+NOW = dt.datetime(2025, 9, 13, tzinfo=dt.timezone.utc)
+
+
+def _ts(days_ago):
+    return (NOW - dt.timedelta(days=days_ago)).isoformat()
+
+
+def test_dedup_and_latest(tmp_path):
+    a = store_page('asf', 'https://asf.net/Season-54', '<p>Hamlet</p>', fetched_at=_ts(2), root=tmp_path)
+    b = store_page('asf', 'https://asf.net/Season-54', '<p>Hamlet</p>', fetched_at=_ts(1), root=tmp_path)
+    c = store_page('asf', 'https://asf.net/Season-54', '<p>Macbeth – new</p>', fetched_at=_ts(0), root=tmp_path)
+    assert a == b != c
+    assert len(list((tmp_path / 'blobs').glob('*/*.html.gz'))) == 2
+    assert len(list(iter_pages('asf', root=tmp_path))) == 3
+    assert latest_page('asf', 'https://asf.net/Season-54', root=tmp_path) == '<p>Macbeth – new</p>'
+    assert latest_page('nope', root=tmp_path) is None
+
+
+def test_retention_keeps_newest_and_collects_blobs(tmp_path):
+    url = 'https://example.org/'
+    for i, days in enumerate([400, 300, 10, 5, 1]):
+        store_page('x', url, f'<p>v{i}</p>', fetched_at=_ts(days), root=tmp_path)
+    store_page('old', url, '<p>only</p>', fetched_at=_ts(900), root=tmp_path)
+    res = apply_retention(keep_per_url=2, max_age_days=180, root=tmp_path, now=NOW, grace_sec=0)
+    assert res == {'rows_removed': 3, 'blobs_removed': 3}
+    remaining = [(p['company'], p['fetched_at']) for p in iter_pages(root=tmp_path)]
+    assert remaining == [('old', _ts(900)), ('x', _ts(5)), ('x', _ts(1))]
+
+
+def test_default_archive_dir_does_not_follow_the_cwd(tmp_path, monkeypatch):
+    monkeypatch.delenv('SF_ARCHIVE_DIR', raising=False)
+    monkeypatch.chdir(tmp_path)
+    assert archive_dir() == pathlib.Path(__file__).resolve().parent.parent / 'archive'
+    monkeypatch.setenv('SF_ARCHIVE_DIR', 'off')
+    assert archive_dir() is None
+    monkeypatch.setenv('SF_ARCHIVE_DIR', str(tmp_path / 'a'))
+    assert archive_dir() == tmp_path / 'a'
+
+
+def test_retention_leaves_recently_written_unreferenced_blobs(tmp_path):
+    url = 'https://example.org/'
+    for i, days in enumerate([300, 1]):
+        store_page('x', url, f'<p>v{i}</p>', fetched_at=_ts(days), root=tmp_path)
+    old = store_page('x', url, '<p>v0</p>', fetched_at=_ts(300), root=tmp_path)
+    stale = _blob_path(tmp_path, old)
+    os.utime(stale, (time.time() - 7200,) * 2)
+    # a concurrent store_page that has written its blob but not yet its index row
+    pending = _blob_path(tmp_path, 'f' * 64)
+    pending.parent.mkdir(parents=True, exist_ok=True)
+    pending.write_bytes(b'')
+    res = apply_retention(keep_per_url=1, max_age_days=180, root=tmp_path, now=NOW, grace_sec=3600)
+    assert res == {'rows_removed': 2, 'blobs_removed': 1}
+    assert not stale.exists() and pending.exists()
+    # re-archiving an existing body refreshes its blob, so gc waits for its row
+    current = _blob_path(tmp_path, store_page('x', url, '<p>v1</p>', root=tmp_path))
+    os.utime(current, (time.time() - 7200,) * 2)
+    store_page('x', url, '<p>v1</p>', root=tmp_path)
+    assert time.time() - current.stat().st_mtime < 60
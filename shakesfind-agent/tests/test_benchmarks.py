@@ -0,0 +1,27 @@
+import asyncio
+
+from benchmarks import synthetic
+from benchmarks.run import compare
+from scraper.extractors.html import extract_events_from_html_async
+
+
+def test_synthetic_card_page_parses_every_card():
+    html, company = synthetic.card_page(25)
+    events = asyncio.run(extract_events_from_html_async(html, company))
+    assert len(events) == 25
+    assert all(e['title'] and e['start_date'] for e in events)
+
+
+def test_compare_scales_by_calibration_and_flags_regressions():
+    base = {'scale': 200, 'calibration_ms': 10.0, 'stages': {
+        'a': {'ms': 10.0, 'alloc_kib': 100.0},
+        'b': {'ms': 10.0, 'alloc_kib': 100.0},
+        'gone': {'ms': 1.0, 'alloc_kib': 1.0},
+    }}
+    cur = {'scale': 200, 'calibration_ms': 20.0, 'stages': {
+        'a': {'ms': 25.0, 'alloc_kib': 110.0},   # slower machine: 20ms expected, +25% ok
+        'b': {'ms': 35.0, 'alloc_kib': 200.0},   # +75% time and +100% alloc
+    }}
+    problems = compare(base, cur)
+    assert len(problems) == 2 and all(p.startswith('b:') for p in problems)
+    assert compare({**base, 'scale': 50}, cur)[0].startswith('scale mismatch')
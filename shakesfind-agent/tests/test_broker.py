@@ -0,0 +1,92 @@
+import asyncio, json
+
+from scraper.broker import Broker, sse_format, company_changes
+
+
+def row(h, title='Hamlet'):
+    return {'source_hash': h, 'title_display': title, 'fetched_at_utc': 'x'}
+
+
+def test_lagging_subscriber_gets_one_resync_instead_of_blocking():
+    b = Broker(buffer=3)
+    fast, slow = b.subscribe(), b.subscribe()
+    for i in range(5):
+        b.publish('company', {'i': i})
+        fast.queue.get_nowait()
+    items = []
+    while not slow.queue.empty():
+        items.append(slow.queue.get_nowait())
+    assert [e for _, e, _ in items] == ['resync', 'company']
+    assert items[0][2] == {'reason': 'lagged', 'dropped': 3}
+    assert b.info() == {'subscribers': 2, 'published': 5, 'lagged_drops': 3}
+    capped = Broker(max_subscribers=1)
+    first = capped.subscribe()
+    assert first is not None and capped.subscribe() is None  # over the limit
+    capped.unsubscribe(first)
+    assert capped.subscribe() is not None  # a freed slot can be reused
+
+
+def test_events_endpoint_refuses_subscribers_over_the_limit(monkeypatch):
+    from fastapi.testclient import TestClient
+    import api
+    full = Broker(max_subscribers=1)
+    full.subscribe()
+    monkeypatch.setattr(api, '_broker', full)
+    r = TestClient(api.app).get('/events')
+    assert r.status_code == 503 and full.info()['subscribers'] == 1
+
+
+def test_events_slot_is_freed_when_the_client_leaves_before_the_first_chunk(monkeypatch):
+    import api
+    broker = Broker(max_subscribers=1)
+    monkeypatch.setattr(api, '_broker', broker)
+
+    async def receive():
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        await asyncio.Event().wait()  # the client is gone before the headers are out
+
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+             'path': '/events', 'raw_path': b'/events', 'root_path': '', 'query_string': b'', 'headers': [],
+             'client': ('127.0.0.1', 1), 'server': ('testserver', 80)}
+    asyncio.run(api.app(scope, receive, send))
+    assert broker.info()['subscribers'] == 0 and broker.subscribe() is not None
+
+
+def test_sse_format_and_company_changes():
+    delta = company_changes({'id': 'a'}, [row('1'), row('2')], [row('2', 'Macbeth'), row('3')])
+    assert [r['source_hash'] for r in delta['added']] == ['3'] and delta['removed'] == ['1']
+    assert delta['changed'] == [{'source_hash': '2', 'fields': {'title_display': ['Hamlet', 'Macbeth']}}]
+    text = sse_format((7, 'productions', {'n': 1})).decode()
+    assert text == 'id: 7\nevent: productions\ndata: {"n":1}\n\n'
+
+
+def test_leader_scrape_streams_progress_and_deltas(tmp_path, monkeypatch):
+    import api
+    monkeypatch.setenv('SF_STATE_DIR', str(tmp_path))
+    monkeypatch.setattr(api, '_broker', Broker())
+    api._install({'companies': [{'company': {'id': 'a'}, 'events': [row('1')]},
+                                {'company': {'id': 'gone'}, 'events': [row('9')]}],
+                  'generated_at': None, 'version': None})
+
+    async def fake_scrape_all(on_company=None, **kw):
+        out = []
+        for cid, rows in (('a', [row('1'), row('2')]), ('b', [])):
+            out.append({'company': {'id': cid}, 'events': rows, 'meta': {'elapsed_ms': 1.0}})
+            on_company(out[-1])
+        return out
+
+    monkeypatch.setattr(api, 'scrape_all', fake_scrape_all)
+    sub = api._broker.subscribe()
+    assert asyncio.run(api._do_scrape('unused.yaml', False)) is True
+    items = []
+    while not sub.queue.empty():
+        items.append(sub.queue.get_nowait())
+    events = [(e, d.get('company', {}).get('id') if isinstance(d.get('company'), dict) else None) for _, e, d in items]
+    assert events == [('scrape_started', None), ('company', 'a'), ('productions', 'a'), ('company', 'b'),
+                      ('productions', 'gone'), ('scrape_finished', None)]
+    assert [r['source_hash'] for r in items[2][2]['added']] == ['2']
+    assert items[4][2]['removed'] == ['9']
+    assert items[-1][2]['events'] == 2 and items[-1][2]['version'] == api._last_result['version']
+    assert json.loads(sse_format(items[-1]).decode().split('data: ')[1])['companies'] == 2
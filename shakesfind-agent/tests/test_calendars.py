@@ -0,0 +1,62 @@
+from scraper.calendars import FeedSet
+from scraper.extractors.ics import extract_events_from_ics
+
+
+def row(h, title, canon, start='2026-06-01', end='2026-06-20', company='ASF'):
+    return {'source_hash': h, 'title_display': title, 'canonical_title': canon, 'company_name': company,
+            'start_date': start, 'end_date': end, 'venue': 'Main Stage', 'show_url': f'https://x.org/{h}',
+            'description': None, 'fetched_at_utc': '2026-03-01T00:00:00+00:00'}
+
+
+def generation(hamlet_end='2026-06-20'):
+    return [
+        {'company': {'id': 'asf', 'name': 'ASF'}, 'events': [row('a1', 'Hamlet', 'Hamlet', end=hamlet_end),
+                                                              row('a2', 'Gala Night', None, start=None, end=None)]},
+        {'company': {'id': 'park', 'name': 'Park'}, 'events': [row('p1', 'Macbeth', 'Macbeth', company='Park')]},
+    ]
+
+
+def test_feeds_render_all_day_runs_and_round_trip():
+    feeds = FeedSet().updated(generation(), '2026-03-01T00:00:00Z', 1)
+    hamlet = feeds.get('play', 'HAMLET')
+    body = hamlet['body'].decode()
+    assert body.startswith('BEGIN:VCALENDAR\r\n') and 'X-WR-CALNAME:Hamlet (ShakesFind)' in body
+    assert 'UID:a1@shakesfind' in body and 'DTEND;VALUE=DATE:20260621' in body  # exclusive end
+    assert 'DTSTAMP:20260301T000000Z' in body and hamlet['last_modified'] == 'Sun, 01 Mar 2026 00:00:00 GMT'
+    # our own ICS extractor reads it back as the same run
+    back = extract_events_from_ics(body)
+    assert [(e['title'], str(e['start_date']), str(e['end_date'])) for e in back] == [('Hamlet', '2026-06-01', '2026-06-20')]
+    assert feeds.get('company', 'asf')['events'] == 1  # undated row left out
+    assert feeds.get('play', 'tempest')['events'] == 0  # known play, empty calendar
+    assert feeds.get('play', 'nope') is None and feeds.get('company', 'nope') is None
+
+
+def test_only_changed_feeds_are_rerendered():
+    first = FeedSet().updated(generation(), '2026-03-01T00:00:00Z', 1)
+    rendered = first.stats['events_rendered']
+    same = first.updated([{**c, 'events': [{**r, 'fetched_at_utc': 'later'} for r in c['events']]} for c in generation()],
+                         '2026-03-02T00:00:00Z', 2)
+    assert same.stats['events_rendered'] == rendered
+    assert same.get('play', 'hamlet') is first.get('play', 'hamlet')  # same body, ETag and Last-Modified
+    moved = same.updated(generation(hamlet_end='2026-06-27'), '2026-03-03T00:00:00Z', 3)
+    assert moved.stats['events_rendered'] == rendered + 1  # shared by the play and the company feed
+    assert moved.get('play', 'hamlet')['etag'] != first.get('play', 'hamlet')['etag']
+    assert moved.get('play', 'hamlet')['last_modified'] == 'Tue, 03 Mar 2026 00:00:00 GMT'
+    assert moved.get('play', 'macbeth') is first.get('play', 'macbeth')
+
+
+def test_api_serves_feeds_with_validators():
+    from fastapi.testclient import TestClient
+    import api
+    client = TestClient(api.app)
+    api._install({'companies': generation(), 'generated_at': '2026-03-01T00:00:00Z', 'version': 301})
+    r = client.get('/feeds/play/hamlet.ics')
+    assert r.status_code == 200 and r.headers['content-type'].startswith('text/calendar')
+    assert client.get('/feeds/play/hamlet.ics', headers={'If-None-Match': r.headers['etag']}).status_code == 304
+    assert client.get('/feeds/play/hamlet.ics', headers={'If-Modified-Since': r.headers['last-modified']}).status_code == 304
+    ims = lambda value: client.get('/feeds/play/hamlet.ics', headers={'If-Modified-Since': value}).status_code
+    assert ims('Mon, 02 Mar 2026 08:00:00 GMT') == 304  # a later copy is still fresh
+    assert ims('Sun Mar  1 00:00:00 2026') == 304 and ims('Sunday, 01-Mar-26 00:00:00 GMT') == 304  # other HTTP date formats
+    assert ims('Sat, 28 Feb 2026 23:59:59 GMT') == 200 and ims('yesterday') == 200
+    assert client.get('/feeds/company/park.ics').text.count('BEGIN:VEVENT') == 1
+    assert client.get('/feeds/company/nope.ics').status_code == 404
@@ -0,0 +1,67 @@
+from scraper.changes import compose_deltas, diff_rows, generation_delta
+from scraper.results import load_changes, publish
+
+
+def row(h, **kw):
+    return {'source_hash': h, 'title_display': 'Hamlet', 'fetched_at_utc': 't0', **kw}
+
+
+def test_diff_rows_added_removed_changed():
+    old = [row('a'), row('b', canonical_title=None), row('c')]
+    new = [row('b', canonical_title='Hamlet', fetched_at_utc='t1'), row('c', fetched_at_utc='t1'), row('d')]
+    d = diff_rows(old, new)
+    assert [r['source_hash'] for r in d['added']] == ['d']
+    assert [r['source_hash'] for r in d['removed']] == ['a']
+    assert d['changed'] == [{'source_hash': 'b', 'fields': {'canonical_title': [None, 'Hamlet']}}]
+
+
+def entry(cid, *rows):
+    return {'company': {'id': cid, 'name': cid.upper()}, 'events': list(rows), 'meta': {}}
+
+
+def test_generation_delta_covers_new_and_dropped_companies():
+    d = generation_delta([entry('a', row('1')), entry('gone', row('9'))], [entry('a', row('1', fetched_at_utc='t1')), entry('b', row('2'))])
+    assert [(x['company']['id'], len(x['added']), x['removed']) for x in d] == [('b', 1, []), ('gone', 0, ['9'])]
+
+
+def test_compose_folds_a_span_of_versions():
+    v1 = [entry('a', row('1'), row('2'), row('3'))]
+    v2 = [entry('a', row('1', venue='Main'), row('3'), row('4'))]
+    v3 = [entry('a', row('1', venue=None), row('4', venue='Park'), row('2'))]
+    (d,) = compose_deltas([generation_delta(v1, v2), generation_delta(v2, v3)])
+    assert d['changed'] == []  # 1: venue set then reset
+    assert [r['source_hash'] for r in d['added']] == ['4', '2'] and d['added'][0]['venue'] == 'Park'  # 2 removed then back
+    assert d['removed'] == ['3']
+    assert compose_deltas([generation_delta(v1, v2), generation_delta(v2, v1)]) == [
+        {'company': v1[0]['company'], 'added': [row('2')], 'changed': [], 'removed': []}]
+
+
+def test_changes_ring_and_resync(tmp_path):
+    db = tmp_path / 'results.sqlite'
+    gens = [[entry('a', *[row(str(j)) for j in range(i + 1)])] for i in range(5)]
+    versions = [publish(g, path=db, keep=2, changes_keep=3) for g in gens]
+    assert load_changes(versions[-1], path=db) == []
+    chain = load_changes(versions[1], path=db)
+    assert len(chain) == 3 and [r['source_hash'] for r in compose_deltas(chain)[0]['added']] == ['2', '3', '4']
+    assert load_changes(versions[0], path=db) is None  # aged out of the ring
+    assert load_changes(versions[-1] + 1, path=db) is None
+    assert len(load_changes(versions[2], upto=versions[3], path=db)) == 1
+
+
+def test_api_changes_endpoint(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import api
+    monkeypatch.setenv('SF_STATE_DIR', str(tmp_path))
+    client = TestClient(api.app)
+    old = [entry('a', row('1'), row('2'))]
+    new = [entry('a', row('1', canonical_title='Hamlet'), row('3'))]
+    v1 = publish(old)
+    v2 = publish(new, previous=(v1, old))
+    api._install({'companies': new, 'generated_at': 'x', 'version': v2})
+    body = client.get(f'/changes?since={v1}').json()
+    assert body['resync'] is False and body['version'] == v2
+    (d,) = body['companies']
+    assert [r['source_hash'] for r in d['added']] == ['3'] and d['removed'] == ['2']
+    assert d['changed'] == [{'source_hash': '1', 'fields': {'canonical_title': [None, 'Hamlet']}}]
+    assert client.get(f'/changes?since={v2}').json()['companies'] == []
+    assert client.get('/changes?since=0').json()['resync'] is True
@@ -20,3 +20,8 @@ def test_parse_ranges(text, expected):
 def test_parse_none(text):
     s,e,_ = parse_dates(text, TZ)
     assert s is None and e is None
+
+def test_free_form_dates_resolve_against_pinned_today(monkeypatch):
+    monkeypatch.setenv('SF_TODAY', '2024-02-27')
+    assert parse_dates("tomorrow", TZ)[0] == "2024-02-28"
+    assert parse_dates("in 2 weeks", TZ)[0] == "2024-03-12"
@@ -0,0 +1,57 @@
+from scraper.dedup import dedup_rows, source_hash
+
+
+def row(title, start=None, end=None, canon=None, **kw):
+    return {'title_display': title, 'canonical_title': canon, 'start_date': start, 'end_date': end,
+            'source_page': 'https://ex.org/season', 'show_url': kw.pop('url', 'https://ex.org/season'),
+            'date_confidence': 1.0 if start else 0.0, 'match_confidence': 1.0 if canon else 0.0, **kw}
+
+
+def test_drifting_titles_and_dates_collapse_into_one_row():
+    rows = [
+        row('Hamlet', canon='Hamlet'),                                          # list card, no dates: two runs, stays apart
+        row("William Shakespeare's Hamlet", '2026-03-01', '2026-03-20', 'Hamlet', url='https://ex.org/hamlet', venue='Main Stage'),
+        row('HAMLET', '2026-03-02', '2026-03-20', 'Hamlet'),                    # inline pass, one day off
+        row('Hamlet', '2026-09-01', '2026-09-20', 'Hamlet'),                    # autumn revival: separate
+        row('Gala   Night!', '2026-05-01', '2026-05-01'),
+        row('gala night', '2026-05-01', '2026-05-01', venue='Ballroom'),
+        row('Hamlet', '2026-03-01', '2026-03-20', 'Hamlet', venue='Studio'),   # same dates, other venue
+    ]
+    out, collapsed = dedup_rows(rows)
+    assert collapsed == 2 and len(out) == 5
+    spring = out[1]
+    assert (spring['start_date'], spring['end_date'], spring['venue']) == ('2026-03-01', '2026-03-20', 'Main Stage')
+    assert spring['show_url'] == 'https://ex.org/hamlet' and spring['canonical_title'] == 'Hamlet'
+    assert [r['start_date'] for r in out] == [None, '2026-03-01', '2026-09-01', '2026-05-01', '2026-03-01']
+    assert out[3]['venue'] == 'Ballroom' and out[4]['venue'] == 'Studio'
+    assert rows[0]['start_date'] is None and rows[0]['show_url'] == 'https://ex.org/season'  # inputs untouched
+
+
+def test_tolerance_is_configurable():
+    rows = [row('Lear', '2026-04-01', '2026-04-10', 'King Lear'), row('Lear', '2026-04-03', '2026-04-10', 'King Lear')]
+    assert dedup_rows(rows)[1] == 0
+    assert dedup_rows(rows, tolerance=2)[1] == 1
+    assert dedup_rows(rows, tolerance=0)[1] == 0
+
+
+def built(title, start=None, end=None, venue=None, **kw):
+    r = row(title, start, end, 'Macbeth', venue=venue, company_id='co', **kw)
+    return {**r, 'source_hash': source_hash('co', title, start, end, venue)}
+
+
+def test_undated_card_merged_with_detail_row_gets_the_merged_hash():
+    card = built('Macbeth')
+    detail = built('Macbeth', '2026-06-01', '2026-06-20', 'Main Stage', url='https://ex.org/macbeth')
+    want = source_hash('co', 'Macbeth', '2026-06-01', '2026-06-20', 'Main Stage')
+    for order in ([card, detail], [detail, card]):
+        out, collapsed = dedup_rows(order)
+        assert collapsed == 1 and out[0]['source_hash'] == want  # matches its content, in either order
+    assert dedup_rows([detail])[0][0]['source_hash'] == want
+
+
+def test_undated_card_stays_apart_when_the_play_has_two_runs():
+    card = built('Macbeth')
+    spring, autumn = built('Macbeth', '2026-03-01', '2026-03-20'), built('Macbeth', '2026-09-01', '2026-09-20')
+    out, collapsed = dedup_rows([spring, autumn, card, built('Macbeth')])
+    assert collapsed == 1 and [r['start_date'] for r in out] == ['2026-03-01', '2026-09-01', None]
+    assert out[0]['source_hash'] == spring['source_hash']  # nothing folded into either run
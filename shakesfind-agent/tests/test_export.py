@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from writers.file_export import export_data, export_partitioned, load_partitioned
+
+
+def entry(cid, *titles, stamp='t0'):
+    return {'company': {'id': cid, 'name': cid.upper(), 'url': None},
+            'events': [{'source_hash': f'{cid}{t}', 'title_display': t, 'fetched_at_utc': stamp} for t in titles],
+            'meta': {'stale': False, 'elapsed_ms': 1.0}}
+
+
+def test_export_data_is_atomic(tmp_path):
+    out = tmp_path / 'out.json'
+    export_data({'companies': [entry('a', 'Hamlet')], '_summary': {}}, str(out))
+    before = out.read_text()
+    with pytest.raises(TypeError):
+        export_data({'companies': [entry('a', 'Hamlet')], '_summary': {'bad': object()}}, str(out))
+    assert out.read_text() == before  # the failed write never touched the file
+    assert [p.name for p in tmp_path.iterdir()] == ['out.json']
+
+
+def test_partitioned_export_rewrites_only_changed_companies(tmp_path):
+    gen = [entry('asf', 'Hamlet', 'Macbeth'), entry('park', 'Othello'), entry('odd/id', 'Lear')]
+    first = export_partitioned({'companies': gen, '_summary': {'total_events': 4}}, str(tmp_path))
+    assert (first['written'], first['unchanged'], first['removed']) == (3, 0, 0)
+    files = {p.name: p.stat().st_mtime_ns for p in (tmp_path / 'companies').iterdir()}
+    assert len(files) == 3 and all('/' not in n for n in files)
+
+    # new fetch stamps only: nothing is written, the manifest still is
+    again = export_partitioned({'companies': [entry(c['company']['id'], *[r['title_display'] for r in c['events']], stamp='t1') for c in gen],
+                                '_summary': {'total_events': 4, 'run': 2}}, str(tmp_path))
+    assert (again['written'], again['unchanged']) == (0, 3)
+    assert {p.name: p.stat().st_mtime_ns for p in (tmp_path / 'companies').iterdir()} == files
+    assert json.loads((tmp_path / 'manifest.json').read_text())['_summary']['run'] == 2
+
+    # one company changes, one drops out: one new file, the superseded two stay for the previous manifest
+    third = export_partitioned({'companies': [entry('asf', 'Hamlet', 'The Tempest'), entry('park', 'Othello')],
+                                '_summary': {'total_events': 3}}, str(tmp_path))
+    assert (third['written'], third['unchanged'], third['removed']) == (1, 1, 0)
+    back = load_partitioned(str(tmp_path))
+    assert [c['company']['id'] for c in back['companies']] == ['asf', 'park']
+    assert [r['title_display'] for r in back['companies'][0]['events']] == ['Hamlet', 'The Tempest']
+    assert back['_summary'] == {'total_events': 3} and back['_meta']['record_count'] == 3
+    assert len(list((tmp_path / 'companies').iterdir())) == 4
+    # once a second manifest has replaced theirs they go
+    fourth = export_partitioned({'companies': [entry('asf', 'Hamlet', 'The Tempest'), entry('park', 'Othello')],
+                                 '_summary': {'total_events': 3}}, str(tmp_path))
+    assert (fourth['written'], fourth['removed']) == (0, 2)
+    assert len(list((tmp_path / 'companies').iterdir())) == 2
+
+
+def test_reader_holding_the_old_manifest_still_reads_its_partitions(tmp_path):
+    export_partitioned({'companies': [entry('asf', 'Hamlet'), entry('park', 'Othello')], '_summary': {}}, str(tmp_path))
+    held = json.loads((tmp_path / 'manifest.json').read_text())  # a reader loads the manifest...
+    export_partitioned({'companies': [entry('asf', 'Macbeth')], '_summary': {}}, str(tmp_path))  # ...the export swaps it
+    old = [json.loads((tmp_path / p['path']).read_text()) for p in held['partitions']]
+    assert [r['title_display'] for c in old for r in c['events']] == ['Hamlet', 'Othello']
+    assert [r['title_display'] for c in load_partitioned(str(tmp_path))['companies'] for r in c['events']] == ['Macbeth']
+
+
+def test_partitioned_export_recovers_a_missing_partition(tmp_path):
+    export_partitioned({'companies': [entry('asf', 'Hamlet')], '_summary': {}}, str(tmp_path))
+    for p in (tmp_path / 'companies').iterdir():
+        p.unlink()
+    assert export_partitioned({'companies': [entry('asf', 'Hamlet')], '_summary': {}}, str(tmp_path))['written'] == 1
+    assert load_partitioned(str(tmp_path))['companies'][0]['company']['id'] == 'asf'
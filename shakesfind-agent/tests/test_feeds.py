@@ -0,0 +1,85 @@
+import asyncio
+
+from scraper.extractors.feed import extract_events_from_feed, sniff_feed
+from scraper.extractors.ics import extract_events_from_ics
+
+ICS = """BEGIN:VCALENDAR\r
+VERSION:2.0\r
+BEGIN:VEVENT\r
+SUMMARY:Hamlet\r
+LOCATION:Main Stage\\, Hall A\r
+DTSTART;TZID="America/New_York":20260305T193000\r
+RRULE:FREQ=WEEKLY;BYDAY=TH,SA;UNTIL=20260328T235959Z\r
+EXDATE;TZID="America/New_York":20260314T193000\r
+URL:https://ex.org/hamlet\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+SUMMARY:Hamlet\r
+LOCATION:Main Stage\\, Hall A\r
+DTSTART:20260910T233000Z\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+SUMMARY:Twelfth\r
+  Night\r
+DTSTART;VALUE=DATE:20260601\r
+DTEND;VALUE=DATE:20260615\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+SUMMARY:Macbeth\r
+STATUS:CANCELLED\r
+DTSTART:20260401T190000\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+
+def test_ics_collapses_recurrences_into_runs():
+    assert sniff_feed(ICS) == 'ics'
+    events = extract_events_from_ics(ICS, base_url='https://ex.org/cal.ics', tz='America/New_York')
+    got = [(e['title'], e['start_date'], e['end_date'], e['performances']) for e in events]
+    assert got == [
+        ('Hamlet', '2026-03-05', '2026-03-28', 7),       # Thu/Sat x4 weeks minus one EXDATE
+        ('Twelfth Night', '2026-06-01', '2026-06-14', 1),  # all-day DTEND is exclusive
+        ('Hamlet', '2026-09-10', '2026-09-10', 1),       # months later: a separate run; UTC moved to local date
+    ]
+    assert events[0]['venue'] == 'Main Stage, Hall A' and events[0]['url'] == 'https://ex.org/hamlet'
+    assert events[1]['url'] == 'https://ex.org/cal.ics'
+
+
+def test_rss_and_atom_items():
+    rss = ('<?xml version="1.0"?><rss xmlns:ev="http://purl.org/rss/1.0/modules/event/"><channel><title>Season</title>'
+           '<item><title>Hamlet</title><link>/shows/1</link><ev:startdate>2026-03-01</ev:startdate>'
+           '<ev:enddate>2026-03-05</ev:enddate><ev:location>Globe</ev:location></item>'
+           '<item><title>Hamlet</title><link>/shows/2</link><ev:startdate>2026-03-07T19:30:00-05:00</ev:startdate>'
+           '<ev:location>Globe</ev:location></item>'
+           '<item><title>Lear</title><description>&lt;p&gt;April 2 – 20, 2026&lt;/p&gt;</description></item>'
+           '</channel></rss>')
+    assert sniff_feed(rss) == 'rss' and sniff_feed('<!doctype html><html></html>') is None
+    events = extract_events_from_feed(rss, base_url='https://ex.org/feed')
+    assert [(e['title'], e.get('start_date'), e.get('end_date')) for e in events] == [
+        ('Hamlet', '2026-03-01', '2026-03-07'), ('Lear', None, None)]
+    assert events[0]['url'] == 'https://ex.org/shows/1' and events[0]['venue'] == 'Globe'
+    assert events[1]['dates_text'] == 'April 2 – 20, 2026'
+    atom = ('<feed xmlns="http://www.w3.org/2005/Atom"><title>x</title><entry><title>Macbeth</title>'
+            '<link rel="alternate" href="https://ex.org/m"/><summary>May 1 – 9, 2026</summary></entry></feed>')
+    assert extract_events_from_feed(atom) == [{'title': 'Macbeth', 'url': 'https://ex.org/m', 'venue': None, 'dates_text': 'May 1 – 9, 2026'}]
+
+
+def test_feed_url_is_tried_before_the_page(tmp_path, monkeypatch):
+    import main
+    monkeypatch.setenv('SF_ARCHIVE_DIR', 'off')
+    cal = tmp_path / 'season.ics'
+    cal.write_text(ICS, encoding='utf-8')
+    page = tmp_path / 'page.html'
+    page.write_text('<html><body><p>No shows yet</p></body></html>', encoding='utf-8')
+    company = {'id': 'cal', 'Name': 'Cal', 'Productions URL': 'https://ex.org/', 'Feed URL': 'https://ex.org/cal.ics',
+               'Timezone': 'America/New_York', 'no_network': True, 'offline_feed': str(cal),
+               'offline_html': str(page)}
+    meta = {}
+    rows = asyncio.run(main.process_company(None, company, local_only=True, meta=meta))
+    assert meta['feed'] == 'https://ex.org/cal.ics'
+    assert [(r['canonical_title'], r['start_date'], r['end_date']) for r in rows][:2] == [
+        ('Hamlet', '2026-03-05', '2026-03-28'), ('Twelfth Night', '2026-06-01', '2026-06-14')]
+    meta = {}
+    assert asyncio.run(main.process_company(None, {**company, 'Scrape Strategy': ['html']}, local_only=True, meta=meta)) == []
+    assert 'feed' not in meta  # feed strategies disabled: only the page is read
@@ -0,0 +1,141 @@
+import asyncio, functools, pathlib, threading, types
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import pytest
+
+from scraper.heavy import BrowserPool
+
+SNAPSHOTS = pathlib.Path(__file__).resolve().parent.parent / 'snapshots'
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def snapshot_server():
+    if not (SNAPSHOTS / 'sta' / 'on-stage.html').exists():
+        pytest.skip('snapshots/sta not present')
+    handler = functools.partial(_QuietHandler, directory=str(SNAPSHOTS))
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+
+
+def test_pool_reuses_browser(snapshot_server):
+    pytest.importorskip('playwright')
+
+    async def run():
+        pool = BrowserPool(size=1, idle_sec=0)
+        try:
+            first = await pool.fetch(f"{snapshot_server}/sta/on-stage.html")
+            second = await pool.fetch(f"{snapshot_server}/sta/on-stage.html")
+        finally:
+            await pool.close()
+        return pool, first, second
+
+    try:
+        pool, first, second = asyncio.run(run())
+    except Exception as e:  # browser binaries not installed
+        pytest.skip(f'playwright chromium unavailable: {e}')
+    assert 'Macbeth' in first and 'Macbeth' in second
+    assert [c['cold_start'] for c in pool.costs] == [True, False]
+    assert all(c['ms'] > 0 and c['bytes'] > 0 for c in pool.costs)
+    assert not pool.running
+
+
+class _FakeBrowser:
+    """Just enough of Playwright for BrowserPool; counts launches, closes slowly."""
+
+    def __init__(self, log):
+        self.log = log
+        self.closed = False
+
+    async def new_context(self, user_agent=None):
+        browser = self
+
+        class Page:
+            async def goto(self, url, wait_until=None, timeout=None):
+                await asyncio.sleep(0)
+                if browser.closed:
+                    raise RuntimeError('Target page, context or browser has been closed')
+                return types.SimpleNamespace(status=200)
+
+            async def wait_for_load_state(self, state, timeout=None):
+                pass
+
+            async def content(self):
+                return f'<p>launch {browser.log.count("launch")}</p>'
+
+        class Context:
+            async def route(self, pattern, handler):
+                pass
+
+            async def new_page(self):
+                return Page()
+
+            async def close(self):
+                browser.closed = True
+                await asyncio.sleep(0.05)  # a fetch arrives while the idle close is under way
+
+        return Context()
+
+    async def close(self):
+        self.log.append('close')
+
+
+def _fake_playwright(log):
+    async def launch(headless=True):
+        log.append('launch')
+        return _FakeBrowser(log)
+
+    async def stop():
+        log.append('stop')
+
+    async def start():
+        return types.SimpleNamespace(chromium=types.SimpleNamespace(launch=launch), stop=stop)
+
+    return lambda: types.SimpleNamespace(start=start)
+
+
+def test_pool_reuse_idle_shutdown_and_relaunch(monkeypatch):
+    import playwright.async_api
+    log = []
+    monkeypatch.setattr(playwright.async_api, 'async_playwright', _fake_playwright(log))
+
+    async def run():
+        pool = BrowserPool(size=1, idle_sec=0.01)
+        out = [await pool.fetch('https://x.org/a'), await pool.fetch('https://x.org/b')]  # reused
+        await asyncio.sleep(0.03)  # idle timer fired; its close is still running
+        assert pool._idle_task is None and log[-1] == 'launch'
+        out.append(await pool.fetch('https://x.org/c'))  # waits for the close, then relaunches
+        await asyncio.sleep(0.1)
+        assert not pool.running  # idle again after the relaunch
+        return pool, out
+
+    pool, out = asyncio.run(run())
+    assert out == ['<p>launch 1</p>', '<p>launch 1</p>', '<p>launch 2</p>']
+    assert [c['cold_start'] for c in pool.costs] == [True, False, True]
+    assert log == ['launch', 'close', 'stop', 'launch', 'close', 'stop']
+
+
+def test_idle_close_skips_a_fetch_that_started_after_the_timer(monkeypatch):
+    import playwright.async_api
+    log = []
+    monkeypatch.setattr(playwright.async_api, 'async_playwright', _fake_playwright(log))
+
+    async def run():
+        pool = BrowserPool(size=1, idle_sec=0)  # no timer of its own; driven by hand below
+        await pool.fetch('https://x.org/a')
+        idle = asyncio.ensure_future(pool._idle_shutdown())
+        await asyncio.sleep(0)  # the timer has elapsed; the idle check runs next
+        fetch = asyncio.ensure_future(pool.fetch('https://x.org/b'))  # lands before the close starts
+        await asyncio.gather(idle, fetch)
+        assert pool.running
+        await pool.close()  # an explicit close does not wait for idleness
+        return fetch.result()
+
+    assert asyncio.run(run()) == '<p>launch 1</p>'
+    assert log == ['launch', 'close', 'stop']
@@ -0,0 +1,69 @@
+import asyncio, pathlib
+
+import yaml
+
+from benchmarks import synthetic
+from scraper.extractors import html as html_extractor
+from scraper.extractors.html import extract_events_from_html_async
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+def _company():
+    html, company = synthetic.figcaption_page(30)
+    return html, {k: v for k, v in company.items() if k not in ('inline_detail', 'no_network')}
+
+
+def test_fallback_discovers_and_reuses_a_plan():
+    html, company = _company()
+    learned = {}
+    events = asyncio.run(extract_events_from_html_async(html, company, learned))
+    assert learned['html_plan'] == {'list': 'figure', 'title': 'h1', 'dates': '.prod-dates', 'url': 'a@href', 'venue': '.venue'}
+    assert len(events) == 30 and all(e['dates_text'] for e in events)
+    assert events[0]['url'] == '/tickets/0'
+    # a cached plan is used as-is (a bogus-but-working plan is not replaced)
+    learned['html_plan'] = {**learned['html_plan'], 'dates': None}
+    again = asyncio.run(extract_events_from_html_async(html, company, learned))
+    assert len(again) == 30 and again[0]['dates_text'] is None
+
+
+def test_stale_plan_triggers_rediscovery():
+    html, company = _company()
+    learned = {'html_plan': {'list': '.gone', 'title': 'h2', 'dates': None, 'url': 'a@href', 'venue': '.venue'}}
+    events = asyncio.run(extract_events_from_html_async(html, company, learned))
+    assert len(events) == 30 and learned['html_plan']['list'] == 'figure'
+    assert asyncio.run(extract_events_from_html_async('<html><body><p>nothing</p></body></html>', company, {})) == []
+
+
+def test_real_registry_entries_pass_only_their_detail_config_through():
+    from registry import HTML_PASSTHROUGH, load_registry
+    for path in ('registry.yaml', 'registry.sample.yaml'):
+        raw = {e['id']: (e.get('html') or {}) for e in yaml.safe_load((ROOT / path).read_text(encoding='utf-8'))}
+        for company in load_registry(str(ROOT / path)):
+            assert company['html'] == {k: v for k, v in raw[company['id']].items() if k in HTML_PASSTHROUGH}
+    sta = {c['id']: c for c in load_registry(str(ROOT / 'registry.yaml'))}['sta']
+    assert sta['html']['detail_links'] == 'a.buy-tickets-button' and 'list' not in sta['html']
+
+
+def test_detail_crawl_runs_only_when_the_registry_asks_for_it(tmp_path, monkeypatch):
+    from registry import load_registry
+    listing = ('<html><body><figure><figcaption><a class="buy-tickets-button" href="/shows/hamlet">Tickets</a>'
+               '<h1>Hamlet</h1></figcaption></figure></body></html>')
+    fetched = []
+
+    async def fake_detail(url, company):
+        fetched.append(url)
+        return '<main><h1>Hamlet</h1><p class="prod-dates">March 19 – April 5, 2026</p></main>'
+
+    monkeypatch.setattr(html_extractor, '_fetch_detail', fake_detail)
+    entry = {'id': 'x', 'name': 'X', 'url': 'https://x.example.org/season', 'strategy': ['html'],
+             'html': {'detail_links': 'a.buy-tickets-button',
+                      'detail': {'fields': {'title': 'h1', 'dates': 'p.prod-dates'}}}}
+    reg = tmp_path / 'reg.yaml'
+    reg.write_text(yaml.safe_dump([entry, {**entry, 'id': 'plain', 'html': {}}]), encoding='utf-8')
+    crawled, plain = load_registry(str(reg))
+    events = asyncio.run(extract_events_from_html_async(listing, crawled))
+    assert fetched == ['https://x.example.org/shows/hamlet']
+    assert [(e['title'], e['start_date']) for e in events] == [('Hamlet', '2026-03-19')]
+    asyncio.run(extract_events_from_html_async(listing, plain))
+    assert len(fetched) == 1  # no detail config, no detail fetches
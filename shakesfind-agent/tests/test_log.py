@@ -0,0 +1,39 @@
+import io, json
+
+from scraper import log, metrics
+
+
+def test_debug_payload_is_lazy_when_disabled(capsys):
+    log.configure(level='info', fmt='text', path='')
+    calls = []
+    log.debug('html.list_selector', preview=lambda: calls.append(1) or 'x')
+    assert calls == []
+    assert capsys.readouterr().out == ''
+
+
+def test_json_lines_carry_company_context(tmp_path):
+    path = tmp_path / 'sf.log'
+    log.configure(level='debug', fmt='json', path=str(path))
+    try:
+        with metrics.company_scope('abc'):
+            log.debug('html.list_selector', matched=3, preview=lambda: '<div>')
+        log.error('fetch.failed', error=ValueError('boom'))
+    finally:
+        log.configure(level='info', fmt='text', path='')
+    recs = [json.loads(l) for l in path.read_text().splitlines()]
+    assert recs[0] == {**recs[0], 'level': 'debug', 'event': 'html.list_selector', 'company': 'abc', 'matched': 3, 'preview': '<div>'}
+    assert 'company' not in recs[1] and recs[1]['error'] == 'boom'
+
+
+def test_run_timing_goes_through_the_logger(tmp_path):
+    import main
+    path = tmp_path / 'sf.log'
+    log.configure(level='info', fmt='json', path=str(path))
+    try:
+        metrics.start_run()
+        metrics.record_span('fetch', 0.25)
+        main._finish_run()
+    finally:
+        log.configure(level='info', fmt='text', path='')
+    rec = json.loads(path.read_text().splitlines()[-1])
+    assert rec['event'] == 'run.timing' and rec['fetch_ms'] == 250 and rec['wall_ms'] >= 0
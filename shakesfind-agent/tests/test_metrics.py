@@ -0,0 +1,86 @@
+import asyncio, json
+
+from scraper import metrics
+
+
+def test_histogram_and_counter_render_prometheus_text():
+    h = metrics.Histogram('sf_test_seconds', 'test histogram', ('stage',), buckets=(0.1, 1.0))
+    c = metrics.Counter('sf_test_total', 'test counter', ('result',))
+    h.observe(0.05, stage='fetch')
+    h.observe(0.5, stage='fetch')
+    c.inc(result='hit')
+    c.inc(2, result='miss')
+    text = metrics.render_prometheus()
+    assert '# TYPE sf_test_seconds histogram' in text
+    assert 'sf_test_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+    assert 'sf_test_seconds_bucket{stage="fetch",le="1"} 2' in text
+    assert 'sf_test_seconds_bucket{stage="fetch",le="+Inf"} 2' in text
+    assert 'sf_test_seconds_count{stage="fetch"} 2' in text
+    assert 'sf_test_total{result="miss"} 2' in text
+
+
+def test_spans_are_tagged_and_summarized_per_run():
+    metrics.start_run()
+    with metrics.company_scope('abc'):
+        with metrics.span('parse', strategy='jsonld'):
+            pass
+        metrics.record_span('fetch', 0.2)
+    metrics.record_span('fetch', 0.1, company='xyz')
+    out = metrics.finish_run()
+    assert out['stages']['fetch']['count'] == 2
+    assert out['stages']['fetch']['total_ms'] == 300.0
+    assert out['slowest_companies'][0]['company'] == 'abc'
+    assert metrics.last_run() is out
+
+
+def test_run_timings_snapshot_leaves_the_run_open():
+    metrics.start_run()
+    metrics.record_span('fetch', 0.1)
+    assert metrics.run_timings()['stages']['fetch']['count'] == 1
+    metrics.record_span('export', 0.2)
+    assert set(metrics.finish_run()['stages']) == {'fetch', 'export'} and metrics.run_timings() is None
+
+
+def test_overlapping_runs_in_separate_tasks_keep_their_own_spans():
+    async def scrape(stage, entered, other):
+        metrics.start_run()
+        metrics.record_span(stage, 0.1)
+        entered.set()
+        await other.wait()  # both runs are open here
+        metrics.record_span(stage, 0.1)
+        return metrics.finish_run()
+
+    async def run():
+        a, b = asyncio.Event(), asyncio.Event()
+        return await asyncio.gather(scrape('fetch', a, b), scrape('export', b, a))
+
+    first, second = asyncio.run(run())
+    assert first['stages'] == {'fetch': first['stages']['fetch']} and first['stages']['fetch']['count'] == 2
+    assert set(second['stages']) == {'export'} and second['stages']['export']['count'] == 2
+
+
+def test_scrape_all_reports_timings_in_summary(tmp_path, monkeypatch):
+    import main
+    from benchmarks import synthetic
+    html, company = synthetic.figcaption_page(5)
+    page = tmp_path / 'fig.html'
+    page.write_text(html, encoding='utf-8')
+    reg = tmp_path / 'reg.yaml'
+    reg.write_text(
+        f"- id: fig\n  name: Fig\n  url: https://fig.example.org/\n  strategy: [html]\n"
+        f"  no_network: true\n  offline_html: {page}\n  html:\n    inline_detail: true\n",
+        encoding='utf-8')
+    monkeypatch.setenv('SF_ARCHIVE_DIR', 'off')
+    monkeypatch.setenv('SF_STATE_DIR', str(tmp_path / 'state'))
+    out = tmp_path / 'out.json'
+    asyncio.run(main.main(registry_path=str(reg), notion_enabled=False, export_path=str(out)))
+    summary = json.loads(out.read_text())['_summary']
+    assert summary['total_events'] == 5
+    stages = summary['timings']['stages']
+    for stage in ('parse', 'normalize', 'date_parse', 'resolve', 'staleness'):
+        assert stages[stage]['count'] >= 1
+    assert 'export' not in stages  # the file cannot time its own write...
+    assert metrics.last_run()['stages']['export']['count'] == 1  # ...but the finished run (and /metrics) does
+    text = metrics.render_prometheus()
+    assert 'sf_stage_seconds_count{stage="export",strategy=""}' in text
+    assert 'sf_company_events_bucket{le="5"}' in text and 'company=' not in text.split('# HELP sf_company_events')[1].split('# HELP')[0]
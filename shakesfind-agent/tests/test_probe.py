@@ -0,0 +1,117 @@
+import asyncio
+import httpx
+
+from scraper import probe
+from scraper.probe import probe_url, summarize_probes
+
+
+def _run(handler, prev=None):
+    async def go():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await probe_url('https://example.org/season', prev, client=client)
+    return asyncio.run(go())
+
+
+def test_head_304_is_unchanged():
+    def handler(req):
+        assert req.headers.get('if-none-match') == '"v1"'
+        return httpx.Response(304)
+    res = _run(handler, {'etag': '"v1"'})
+    assert res['changed'] is False and res['method'] == 'head'
+    assert res['validators'] == {'etag': '"v1"'}
+
+
+def test_head_new_etag_is_changed():
+    res = _run(lambda req: httpx.Response(200, headers={'ETag': '"v2"'}), {'etag': '"v1"'})
+    assert res['changed'] is True and res['validators'] == {'etag': '"v2"'}
+
+
+def _run_section(handler, prev=None, section=None):
+    async def go():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await probe_url('https://example.org/season', prev, client=client, section=section)
+    return asyncio.run(go())
+
+
+def test_body_hash_when_no_validators():
+    def handler(req):
+        if req.method == 'HEAD':
+            return httpx.Response(200)
+        assert 'range' not in req.headers
+        return httpx.Response(200, content=b'<html>same listing</html>')
+    first = _run(handler)
+    assert first['changed'] is True and first['method'] == 'body'
+    second = _run(handler, first['validators'])
+    assert second['changed'] is False
+    assert first['body'] == '<html>same listing</html>' and 'body' not in second  # a miss hands its page on
+
+
+def test_listing_past_the_first_32k_is_compared(monkeypatch):
+    filler = b'<div class="promo">' + b'x' * 64 * 1024 + b'</div>'
+    page = lambda show, banner: b'<html><p>' + banner + b'</p>' + filler + b'<ul><li class="card">' + show + b'</li></ul></html>'
+    served = {'body': page(b'Hamlet', b'spring')}
+    handler = lambda req: httpx.Response(200, content=served['body'] if req.method == 'GET' else b'')
+    first = _run_section(handler, section='.card')
+    served['body'] = page(b'Hamlet', b'summer')  # only the banner moved
+    assert _run_section(handler, first['validators'], section='.card')['changed'] is False
+    served['body'] = page(b'Macbeth', b'summer')  # new season, deep in the page
+    assert _run_section(handler, first['validators'], section='.card')['changed'] is True
+    assert _run_section(handler, first['validators'])['changed'] is True  # whole body without a selector
+    monkeypatch.setattr(probe, 'PROBE_BYTES', 1024)
+    over = _run_section(handler, section='.card')
+    assert over['changed'] is True and over['validators'] == {} and 'body' not in over  # too large to vouch for
+
+
+def test_config_edit_invalidates_cached_rows(monkeypatch):
+    import main
+    company = {'id': 'a', 'Productions URL': 'https://example.org/season', 'HTML List Selector': '.card'}
+    state = {'a': {'url': company['Productions URL'], 'config': main.company_config_hash(company),
+                   'validators': {'etag': '"v1"'}, 'rows': [{'title': 'Hamlet'}]}}
+    calls = []
+
+    async def fake_probe(url, prev, section=None):
+        calls.append((prev, section))
+        return {'changed': False, 'method': 'head', 'validators': prev or {}}
+
+    monkeypatch.setattr(main, 'probe_url', fake_probe)
+    rows, _ = asyncio.run(main._probe_company(company, state, {}))
+    assert rows == [{'title': 'Hamlet'}] and calls[-1] == ({'etag': '"v1"'}, '.card')
+    meta = {}
+    rows, _ = asyncio.run(main._probe_company({**company, 'HTML Field Map': '{"title": "h2"}'}, state, meta))
+    assert rows is None and meta['probe']['result'] == 'miss' and calls[-1][0] is None
+
+
+def test_probe_miss_is_extracted_without_a_second_download(tmp_path, monkeypatch):
+    import main
+    from benchmarks import synthetic
+    monkeypatch.setenv('SF_ARCHIVE_DIR', 'off')
+    company = {'id': 'fig', 'Name': 'Fig', 'Productions URL': 'https://fig.example.org/', 'inline_detail': True}
+    page = synthetic.figcaption_page(3)[0]
+    fetched = []
+
+    async def fake_probe(url, prev, section=None):
+        return {'changed': True, 'method': 'body', 'validators': {'body_hash': 'h1'}, 'body': page}
+
+    async def fake_fetch(url, **kw):
+        fetched.append(url)
+        return page
+
+    monkeypatch.setattr(main, 'probe_url', fake_probe)
+    monkeypatch.setattr(main, 'fetch_text', fake_fetch)
+    state = {}
+    out = asyncio.run(main._scrape_company(company, None, False, False, True, state))
+    assert len(out['events']) == 3 and out['meta']['fetch']['tier'] == 'probe' and fetched == []
+    assert state['fig']['validators'] == {'body_hash': 'h1'}  # the page itself is not kept in state
+    asyncio.run(main._scrape_company({**company, 'heavy': True}, None, False, False, True, {}))
+    assert fetched == ['https://fig.example.org/']  # browser-rendered pages are still fetched
+
+
+def test_probe_error_and_summary():
+    res = _run(lambda req: httpx.Response(500))
+    assert res['changed'] is None
+    results = [
+        {'company': {'url': 'https://asf.net/Season-54'}, 'meta': {'probe': {'result': 'hit'}}},
+        {'company': {'url': 'https://asf.net/other'}, 'meta': {'probe': {'result': 'miss'}}},
+        {'company': {'url': 'https://delshakes.org/'}, 'meta': {}},
+    ]
+    assert summarize_probes(results) == {'asf.net': {'hit': 1, 'miss': 1, 'error': 0}}
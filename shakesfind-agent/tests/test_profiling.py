@@ -0,0 +1,57 @@
+import asyncio
+
+from scraper.profiling import profile_async, save_report
+
+
+def _busy():
+    total = 0
+    for i in range(300000):
+        total += i % 7
+    return total
+
+
+async def work():
+    for _ in range(5):
+        _busy()
+        await asyncio.sleep(0)
+    return 'done'
+
+
+def test_sampling_profile_produces_collapsed_stacks(tmp_path):
+    result, report = asyncio.run(profile_async(work, mode='sample', interval_ms=1))
+    assert result == 'done'
+    assert report['samples'] > 0
+    assert any('_busy' in line for line in report['collapsed'].splitlines())
+    assert any(r['function'].endswith(':_busy') for r in report['top'])
+    paths = save_report(report, str(tmp_path / 'prof'))
+    assert [p.rsplit('.', 1)[-1] for p in paths] == ['collapsed', 'txt']
+
+
+def test_cprofile_top_table_counts_calls(tmp_path):
+    _, report = asyncio.run(profile_async(work, mode='cprofile'))
+    busy = next(r for r in report['top'] if ':_busy:' in r['function'])
+    assert busy['calls'] == 5
+    assert (tmp_path / 'prof.pstats').name in [p.rsplit('/', 1)[-1] for p in save_report(report, str(tmp_path / 'prof'))]
+
+
+def test_debug_profile_uses_the_served_registry_and_leaves_no_trace(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import api, main
+    from benchmarks import synthetic
+    from scraper import metrics
+    reg = tmp_path / 'reg.yaml'
+    reg.write_text("- id: fig\n  name: Fig\n  url: https://fig.example.org/\n  html:\n    inline_detail: true\n", encoding='utf-8')
+    monkeypatch.setattr(api, 'DEFAULT_REGISTRY', str(reg))
+    monkeypatch.setenv('SF_DEBUG_ENDPOINTS', '1')
+    monkeypatch.setenv('SF_ARCHIVE_DIR', str(tmp_path / 'archive'))
+    monkeypatch.setenv('SF_STATE_DIR', str(tmp_path / 'state'))
+
+    async def fake_fetch(url, **kw):
+        return synthetic.figcaption_page(3)[0]
+
+    monkeypatch.setattr(main, 'fetch_text', fake_fetch)
+    before = metrics.render_prometheus()
+    r = TestClient(api.app).get('/debug/profile', params={'company': 'fig', 'registry': '/etc/passwd', 'mode': 'cprofile'})
+    assert r.status_code == 200 and r.json()['events'] == 3
+    assert not (tmp_path / 'archive').exists() and not (tmp_path / 'state').exists()
+    assert metrics.render_prometheus() == before
@@ -0,0 +1,36 @@
+from scraper.cache import QueryCache, productions_key
+
+
+def test_lru_bounds_entries_and_bytes():
+    c = QueryCache(maxsize=2, max_bytes=10)
+    c.put('a', b'aaaa', 4)
+    c.put('b', b'bbbb', 4)
+    assert c.get('a') == b'aaaa'  # a becomes most recent
+    c.put('c', b'cccc', 4)        # over both limits -> evicts b
+    assert c.get('b') is None and c.get('c') == b'cccc'
+    c.put('huge', b'x' * 11, 11)  # larger than the whole cache: not stored
+    assert c.get('huge') is None
+    info = c.info()
+    assert info['entries'] == 2 and info['evictions'] == 1 and info['hits'] == 2 and info['misses'] == 2
+
+
+def test_key_normalizes_like_the_filter():
+    assert productions_key(' asf ', 'Much Ado About Nothing') == productions_key('asf', 'muchadoaboutnothing')
+    assert productions_key('', '') == productions_key(None, None)
+
+
+def test_api_repeat_queries_hit_until_a_new_generation_is_installed():
+    from fastapi.testclient import TestClient
+    import api
+    from benchmarks.api_load import synthetic_generation
+    client = TestClient(api.app)
+    api._install({'companies': synthetic_generation(3, 4), 'generated_at': 'x', 'version': 101})
+    before = dict(api._qcache.stats)
+    first = client.get('/productions?company=syn0001', headers={'Accept-Encoding': 'identity'}).json()
+    second = client.get('/productions?company= syn0001', headers={'Accept-Encoding': 'identity'}).json()
+    assert first == second and len(first) == 4
+    assert api._qcache.stats['hits'] == before['hits'] + 1
+    api._install({'companies': synthetic_generation(3, 2), 'generated_at': 'y', 'version': 102})
+    assert len(client.get('/productions?company=syn0001', headers={'Accept-Encoding': 'identity'}).json()) == 2
+    health = client.get('/health').json()['query_cache']
+    assert health['version'] == 102 and health['entries'] == 1
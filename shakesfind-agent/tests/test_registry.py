@@ -0,0 +1,109 @@
+import asyncio, os, time
+
+import yaml
+
+import registry
+from registry import Registry, load_registry, registry_for
+
+
+def write(path, entries, age=10):
+    path.write_text(yaml.safe_dump(entries), encoding='utf-8')
+    past = time.time() - age  # older than RACY_SEC, so an unchanged stat is trusted
+    os.utime(path, (past, past))
+
+
+def entries(**names):
+    return [{'id': cid, 'name': name, 'url': f'https://{cid}.example.org', 'html': {'list': '.card', 'fields': {'title': 'h3'}}}
+            for cid, name in names.items()]
+
+
+def test_cached_registry_reparses_only_on_content_change(tmp_path):
+    path = tmp_path / 'registry.yaml'
+    write(path, entries(a='A', b='B', c='C'))
+    reg = Registry(path)
+    assert reg.refresh() == {'added': ['a', 'b', 'c'], 'changed': [], 'removed': []}
+    assert reg.by_id['a']['HTML Field Map'] == '{"title": "h3"}'
+    assert reg.refresh() is None and reg.stats == {'checks': 2, 'reads': 1, 'parses': 1}
+    os.utime(path, (time.time() - 5, time.time() - 5))  # touched, same bytes: read and hashed, not parsed
+    assert reg.refresh() is None and reg.stats['parses'] == 1
+    kept = reg.by_id['a']
+    write(path, entries(a='A', b='B2', d='D'), age=20)
+    assert reg.refresh() == {'added': ['d'], 'changed': ['b'], 'removed': ['c']}
+    assert reg.by_id['a'] is kept and reg.by_id['b']['Name'] == 'B2' and reg.version == 2
+    if hasattr(yaml, 'CSafeLoader'):
+        assert registry._Loader is yaml.CSafeLoader
+
+
+def test_load_registry_shares_one_cache_per_file(tmp_path):
+    path = tmp_path / 'registry.yaml'
+    write(path, entries(a='A'))
+    first = load_registry(str(path))
+    first[0]['Name'] = 'mutated'  # callers get copies
+    assert load_registry(str(tmp_path / '.' / 'registry.yaml'))[0]['Name'] == 'A'
+    assert registry_for(path).stats['parses'] == 1
+
+
+def test_api_rescrapes_only_edited_companies(tmp_path, monkeypatch):
+    import api
+    monkeypatch.setenv('SF_STATE_DIR', str(tmp_path))
+    path = tmp_path / 'registry.yaml'
+    write(path, entries(a='A', b='B', c='C'))
+    calls = []
+
+    async def fake_scrape_all(only_ids=None, on_company=None, **kw):
+        calls.append(only_ids)
+        ids = only_ids or [c['id'] for c in load_registry(str(path))]
+        return [{'company': {'id': cid}, 'events': [{'source_hash': f'{cid}{len(calls)}'}], 'meta': {}} for cid in ids]
+
+    monkeypatch.setattr(api, 'scrape_all', fake_scrape_all)
+    assert asyncio.run(api._do_scrape(str(path), False, changed_only=True)) is False  # nothing served from this file yet
+    assert asyncio.run(api._do_scrape(str(path), False)) is True
+    assert asyncio.run(api._do_scrape(str(path), False, changed_only=True)) is False  # unchanged
+    write(path, entries(a='A', b='B2', d='D'), age=20)
+    assert asyncio.run(api._do_scrape(str(path), False, changed_only=True)) is True
+    assert calls == [None, ['d', 'b']]
+    served = {c['company']['id']: c['events'][0]['source_hash'] for c in api._last_result['companies']}
+    assert served == {'a': 'a1', 'b': 'b2', 'd': 'd2'} and list(served) == ['a', 'b', 'd']
+
+
+def test_concurrent_scrapes_do_not_both_run(tmp_path, monkeypatch):
+    import api
+    monkeypatch.setenv('SF_STATE_DIR', str(tmp_path))
+    path = tmp_path / 'registry.yaml'
+    write(path, entries(a='A'))
+    calls = []
+
+    async def fake_scrape_all(only_ids=None, on_company=None, **kw):
+        calls.append(only_ids)
+        await asyncio.sleep(0.05)
+        return [{'company': {'id': 'a'}, 'events': [], 'meta': {}}]
+
+    async def both():
+        # the second call starts while the first is still refreshing the registry in a thread
+        return await asyncio.gather(api._do_scrape(str(path), False), api._do_scrape(str(path), False))
+
+    monkeypatch.setattr(api, 'scrape_all', fake_scrape_all)
+    assert sorted(asyncio.run(both())) == [False, True] and calls == [None]
+    assert api._running is False
+
+
+def test_registry_patch_falls_back_to_full_scrape_after_external_publish(tmp_path, monkeypatch):
+    import api
+    from scraper.results import publish
+    monkeypatch.setenv('SF_STATE_DIR', str(tmp_path))
+    path = tmp_path / 'registry.yaml'
+    write(path, entries(a='A', b='B'))
+    calls = []
+
+    async def fake_scrape_all(only_ids=None, on_company=None, **kw):
+        calls.append(only_ids)
+        ids = only_ids or [c['id'] for c in load_registry(str(path))]
+        return [{'company': {'id': cid}, 'events': [{'source_hash': f'{cid}{len(calls)}'}], 'meta': {}} for cid in ids]
+
+    monkeypatch.setattr(api, 'scrape_all', fake_scrape_all)
+    assert asyncio.run(api._do_scrape(str(path), False)) is True
+    publish([{'company': {'id': 'a'}, 'events': [{'source_hash': 'cron'}]}])  # e.g. main.py --publish
+    write(path, entries(a='A', b='B2'), age=20)
+    assert asyncio.run(api._do_scrape(str(path), False, changed_only=True)) is True
+    assert calls == [None, None]  # not a patch of the stale served generation
+    assert [c['events'][0]['source_hash'] for c in api._last_result['companies']] == ['a2', 'b2']
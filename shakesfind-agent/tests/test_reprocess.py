@@ -0,0 +1,46 @@
+import asyncio, io, json
+
+from benchmarks import synthetic
+from scraper.archive import store_page, store_rows
+
+URL = 'https://fig.example.org/'
+
+
+def test_reprocess_diffs_archived_pages_against_recorded_rows(tmp_path, monkeypatch):
+    import main, reprocess
+    from registry import load_registry
+    archive = tmp_path / 'archive'
+    monkeypatch.setenv('SF_ARCHIVE_DIR', str(archive))
+    monkeypatch.setenv('SF_TODAY', '2026-03-01')
+    reg = tmp_path / 'reg.yaml'
+    reg.write_text(f"- id: fig\n  name: Fig\n  url: {URL}\n  strategy: [html]\n  html:\n    inline_detail: true\n"
+                   f"- id: other\n  name: Other\n  url: https://other.example.org/\n", encoding='utf-8')
+    companies = load_registry(str(reg))
+    old_html, new_html = synthetic.figcaption_page(2)[0], synthetic.figcaption_page(3)[0]
+    store_page('fig', URL, old_html, fetched_at='2026-02-01T00:00:00+00:00')
+    sha = store_page('fig', URL, new_html, fetched_at='2026-02-15T00:00:00+00:00')
+    store_page('fig', URL + 'shows/1', '<p>detail</p>', fetched_at='2026-02-15T00:00:01+00:00')
+    fig = {**companies[0], 'replay': True}
+    extract = lambda html: main.build_rows(fig, asyncio.run(main.extract_company_events(fig, html, URL)), URL, local_only=True)
+    rows, old_rows = extract(new_html), extract(old_html)
+    shows = list({r['source_hash']: r for r in rows}.values())
+    assert len(shows) == 3 and rows[0]['start_date'] == '2026-01-01'  # year-less dates resolved against SF_TODAY
+    store_rows('fig', sha, shows[:-1])  # what was recorded at fetch time: one show short
+
+    jobs = reprocess.collect_jobs(companies, snapshots_root=str(tmp_path / 'none'))
+    assert [(j['company']['id'], j['key']) for j in jobs] == [('fig', sha)]  # latest listing page only
+    assert len(jobs[0]['baseline']) == 2
+    history = reprocess.collect_jobs(companies, snapshots_root=str(tmp_path / 'none'), history=True)
+    assert len(history) == 2 and history[1]['baseline'] is None
+
+    out = io.StringIO()
+    totals = reprocess.reprocess(history, '2026-03-01', workers=1, out=out)
+    assert (totals['jobs'], totals['errors'], totals['rows']) == (2, 0, len(rows) + len(old_rows))
+    assert (totals['added'], totals['removed'], totals['changed']) == (1, 0, 0)  # same code, same pinned today
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [(r['key'], r['rows'], r['baseline']) for r in lines] == [(sha, len(rows), True), (history[1]['key'], len(old_rows), False)]
+    assert [r['title_display'] for r in lines[0]['added']] == [shows[-1]['title_display']]
+
+    # a later "today" moves the inferred years, and with them every row's identity
+    later = reprocess.reprocess(jobs, '2027-09-01', workers=1, out=io.StringIO())
+    assert (later['added'], later['removed']) == (3, 2)
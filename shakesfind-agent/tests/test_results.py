@@ -0,0 +1,68 @@
+import subprocess, sys
+
+from scraper.results import latest_version, load_generation, publish, try_lead
+
+
+def entry(cid, n):
+    return {'company': {'id': cid, 'name': cid.upper(), 'url': None}, 'events': [{'title_display': f't{i}'} for i in range(n)], 'meta': {}}
+
+
+def test_publish_load_and_retention(tmp_path):
+    db = tmp_path / 'results.sqlite'
+    assert latest_version(db) is None and load_generation(path=db) is None
+    versions = [publish([entry('a', i), entry('b', 1)], duration_sec=1.5, summary={'n': i}, keep=2, path=db) for i in range(3)]
+    assert latest_version(db) == versions[-1]
+    gen = load_generation(path=db)
+    assert [c['company']['id'] for c in gen['companies']] == ['a', 'b']
+    assert len(gen['companies'][0]['events']) == 2 and gen['summary'] == {'n': 2}
+    assert load_generation(versions[0], path=db) is None  # rotated out
+    assert load_generation(versions[1], path=db)['summary'] == {'n': 1}
+
+
+def test_only_one_process_leads(tmp_path):
+    lock = tmp_path / 'leader.lock'
+    held = try_lead(lock)
+    assert held is not None
+    code = f"from scraper.results import try_lead; print(try_lead({str(lock)!r}) is None)"
+    assert subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.strip() == 'True'
+    held.close()
+    assert subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.strip() == 'False'
+
+
+def test_api_serves_persisted_result_on_boot_without_scraping(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import api
+    monkeypatch.setenv('SF_STATE_DIR', str(tmp_path))
+    publish([entry('a', 3)])
+    follower_lock = try_lead()  # another "worker" leads, so this app must not scrape
+    monkeypatch.setattr(api, '_leader_lock', None)
+    with TestClient(api.app) as client:
+        rows = client.get('/productions').json()
+        assert len(rows) == 3 and rows[0]['company']['id'] == 'a'
+        health = client.get('/health').json()
+        assert health['leader'] is False and health['version'] == 1
+        assert client.get('/scrape').json()['queued'] is True
+    follower_lock.close()
+
+
+def test_leader_installs_generations_published_elsewhere(tmp_path, monkeypatch):
+    import asyncio
+    import api
+    monkeypatch.setenv('SF_STATE_DIR', str(tmp_path))
+    monkeypatch.setattr(api, 'POLL_SEC', 0.01)
+    monkeypatch.setattr(api, '_last_result', {'companies': [], 'generated_at': None, 'version': None})
+
+    async def no_scrape(*a, **kw):
+        return False
+
+    monkeypatch.setattr(api, '_do_scrape', no_scrape)
+    version = publish([entry('cron', 2)])  # main.py --publish while this worker leads
+
+    async def lead_briefly():
+        try:
+            await asyncio.wait_for(api._lead(), 0.2)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(lead_briefly())
+    assert api._last_result['version'] == version and api._last_result['companies'][0]['company']['id'] == 'cron'
@@ -0,0 +1,22 @@
+import asyncio, os
+import yaml
+
+from benchmarks.scale import StandInServer, registry_entries, drive, LAYOUTS
+
+
+def test_every_layout_yields_events_through_403_retry(tmp_path, monkeypatch):
+    monkeypatch.setenv('SF_ARCHIVE_DIR', 'off')
+    monkeypatch.delenv('SF_STATE_DIR', raising=False)
+    monkeypatch.chdir(tmp_path)
+    server = StandInServer(latency_ms=0, jitter_ms=0, forbid_rate=1.0, shows_per_company=3)
+    base = server.start()
+    try:
+        reg = tmp_path / 'synthetic.yaml'
+        reg.write_text(yaml.safe_dump(registry_entries(len(LAYOUTS), base)))
+        report = asyncio.run(drive(str(reg)))
+    finally:
+        server.stop()
+    assert report['companies'] == report['companies_with_events'] == len(LAYOUTS)
+    assert report['fetch_errors'] == 0 and server.stats['status_403'] >= len(LAYOUTS)
+    assert report['p95_company_ms'] >= report['p50_company_ms'] > 0
+    assert 'SF_STATE_DIR' not in os.environ and not (tmp_path / '.sf_state').exists()  # learned order not kept
@@ -0,0 +1,106 @@
+from scraper.normalize import normalize_event
+from scraper.search import SearchIndex
+
+
+def row(title, description=None, venue='Main Stage', canon=None):
+    return {'title_display': title, 'canonical_title': canon, 'description': description, 'venue': venue,
+            'start_date': '2026-06-01', 'end_date': '2026-06-20'}
+
+
+def entry(cid, *rows):
+    return {'company': {'id': cid, 'name': cid.upper()}, 'events': list(rows)}
+
+
+def generation():
+    return [
+        entry('asf', row('Hamlet', 'A ghost story in the castle.', canon='Hamlet'),
+              row('The Tempest', 'Shipwreck, sprites and a hamlet by the sea.', canon='The Tempest')),
+        entry('park', row('Romeo and Juliet', 'Under the stars in Riverside Park.', venue='Riverside Park', canon='Romeo and Juliet'),
+              row('Hamlet in the Park', 'Bring a picnic.', venue='Riverside Park', canon='Hamlet')),
+    ]
+
+
+def titles(hits):
+    return [r['title_display'] for _, _, r in hits]
+
+
+def test_normalize_keeps_description():
+    assert normalize_event({'title': 'Hamlet', 'description': 'A ghost story.'}, 'UTC')['description'] == 'A ghost story.'
+
+
+def test_ranking_prefix_and_and_semantics():
+    idx = SearchIndex().updated(generation(), 1)
+    total, hits = idx.search('hamlet')
+    assert total == 3
+    assert titles(hits)[-1] == 'The Tempest'  # description-only hit ranks below title hits
+    assert titles(idx.search('ham')[1]) == titles(hits)  # prefix
+    assert idx.search('HAMLET park')[0] == 1 and titles(idx.search('hamlet riverside')[1]) == ['Hamlet in the Park']
+    assert idx.search('pic')[1][0][1]['id'] == 'park'  # body prefix, company stub attached
+    assert idx.search('hamlet', company='asf')[0] == 2
+    assert idx.search('hamlet', company='nope') == (0, [])
+    assert idx.search('zzz') == (0, []) and idx.search('  ') == (0, [])
+    assert len(idx.search('hamlet', limit=1)[1]) == 1
+
+
+def test_only_changed_companies_are_reindexed():
+    gen = generation()
+    first = SearchIndex().updated(gen, 1)
+    # new fetch stamps/dates only: segments are reused but serve the new rows
+    redated = [entry(c['company']['id'], *[{**r, 'start_date': '2026-07-01'} for r in c['events']]) for c in gen]
+    second = first.updated(redated, 2)
+    assert second.stats['segments_rebuilt'] == 2 and second.stats['segments_reused'] == 2
+    assert first.stats['builds'] == 1 and first.stats['segments_reused'] == 0  # stats swap with the generation
+    assert second.search('ghost')[1][0][2]['start_date'] == '2026-07-01'
+    assert first.search('ghost')[1][0][2]['start_date'] == '2026-06-01'  # the served index is untouched
+    # one company changes, the other drops out
+    third = second.updated([entry('asf', row('Macbeth', 'Witches.', canon='Macbeth'))], 3)
+    assert third.stats['last_build_ms'] is not None and third.stats['segments_rebuilt'] == 3
+    assert third.search('hamlet') == (0, []) and third.search('macb')[0] == 1
+    assert third.rows == 1 and set(third.df) == {'macbeth', 'witches', 'main', 'stage'}
+    assert second.search('hamlet')[0] == 3
+
+
+def test_api_search_endpoint():
+    from fastapi.testclient import TestClient
+    import api
+    client = TestClient(api.app)
+    api._install({'companies': generation(), 'generated_at': 'x', 'version': 201})
+    body = client.get('/search?q=hamlet+riv').json()
+    assert body['total'] == 1 and body['version'] == 201
+    hit = body['results'][0]
+    assert hit['title_display'] == 'Hamlet in the Park' and hit['company']['id'] == 'park' and hit['score'] > 0
+    assert client.get('/search?q=hamlet&company=asf&limit=1').json()['total'] == 2
+    assert client.get('/health').json()['search']['rows'] == 4
+
+
+def test_warm_start_serves_rows_before_the_index_is_built(tmp_path, monkeypatch):
+    import threading, time
+    from fastapi.testclient import TestClient
+    import api
+    from scraper.calendars import FeedSet
+    from scraper.results import publish, try_lead
+    monkeypatch.setenv('SF_STATE_DIR', str(tmp_path))
+    version = publish(generation())
+    follower_lock = try_lead()  # another worker leads: this one only warm-starts and follows
+    monkeypatch.setattr(api, '_leader_lock', None)
+    monkeypatch.setattr(api, '_last_result', {'companies': [], 'generated_at': None, 'version': None})
+    monkeypatch.setattr(api, '_index', SearchIndex())
+    monkeypatch.setattr(api, '_feeds', FeedSet())
+    release, derive = threading.Event(), api._derive
+
+    def slow_derive(gen):
+        release.wait(5)
+        return derive(gen)
+
+    monkeypatch.setattr(api, '_derive', slow_derive)
+    with TestClient(api.app) as client:
+        assert len(client.get('/productions').json()) == 4
+        assert client.get('/search?q=hamlet').json()['total'] == 0  # still building
+        release.set()
+        for _ in range(200):
+            if api._index.version == version:
+                break
+            time.sleep(0.01)
+        assert client.get('/search?q=hamlet').json()['total'] == 3
+        assert client.get('/feeds/company/park.ics').status_code == 200
+    follower_lock.close()
@@ -0,0 +1,67 @@
+import gzip, json
+
+import pytest
+
+from benchmarks.api_load import synthetic_generation
+from scraper.serialize import RowView, negotiate_encoding
+
+
+def legacy(companies, company=None, play=None):
+    out = []
+    for c in companies:
+        if company and c['company']['id'] != company:
+            continue
+        for e in c['events']:
+            if play and (e.get('canonical_title') or '').lower().replace(' ', '') != play.replace(' ', '').lower():
+                continue
+            out.append({**e, 'company': c['company']})
+    return out
+
+
+@pytest.mark.parametrize('company,play', [(None, None), ('syn0002', None), (None, 'hamlet'), ('nope', None)])
+def test_fragment_bodies_match_the_legacy_handler(company, play):
+    gen = synthetic_generation(5, 12)
+    view = RowView(gen)
+    body, enc = view.encoded(view.select(company, play))
+    assert enc is None
+    assert json.loads(body) == legacy(gen, company, play)
+
+
+def test_full_body_is_compressed_once_and_reused():
+    view = RowView(synthetic_generation(5, 12))
+    first, enc = view.encoded(view.select(), 'json', 'gzip')
+    again, _ = view.encoded(view.select(), 'json', 'gzip')
+    assert enc == 'gzip' and first is again
+    assert len(json.loads(gzip.decompress(first))) == 60
+
+
+def test_msgpack_array_of_fragments_round_trips():
+    msgpack = pytest.importorskip('msgpack')
+    gen = synthetic_generation(3, 20)
+    view = RowView(gen)
+    body, _ = view.encoded(view.select(), 'msgpack')
+    assert msgpack.unpackb(body, raw=False) == legacy(gen)
+
+
+def test_negotiate_encoding_honours_q_values():
+    assert negotiate_encoding('gzip;q=0, identity') is None
+    assert negotiate_encoding('gzip, deflate') == 'gzip'
+    assert negotiate_encoding(None) is None
+
+
+def test_without_optional_encoders_falls_back_to_stdlib(monkeypatch):
+    from fastapi.testclient import TestClient
+    import api
+    from scraper import serialize
+    for name in ('orjson', 'brotli', 'msgpack'):
+        monkeypatch.setattr(serialize, name, None)
+    gen = synthetic_generation(3, 5)
+    view = RowView(gen)
+    assert json.loads(view.encoded(view.select())[0]) == legacy(gen)  # stdlib json
+    assert negotiate_encoding('br, gzip') == 'gzip' and negotiate_encoding('br') is None
+    assert serialize.negotiate_format(fmt='msgpack') is None
+    api._install({'companies': gen, 'generated_at': 'x', 'version': 381})
+    client = TestClient(api.app)
+    r = client.get('/productions', headers={'Accept-Encoding': 'br, gzip'})
+    assert r.headers['content-encoding'] == 'gzip' and len(r.json()) == 15
+    assert client.get('/productions?format=msgpack').status_code == 406
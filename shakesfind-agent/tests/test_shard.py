@@ -0,0 +1,79 @@
+import json, os, subprocess, sys
+
+import pytest
+
+from scraper.shard import parse_shard, shard_of, select, merge_parts
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_assignment_is_stable_when_companies_are_added():
+    ids = [f'c{i}' for i in range(200)]
+    before = {cid: shard_of(cid, 4) for cid in ids}
+    grown = ids + [f'new{i}' for i in range(50)]
+    assert all(shard_of(cid, 4) == before[cid] for cid in grown if cid in before)
+    parts = [select([{'id': c} for c in grown], (i, 4)) for i in range(4)]
+    assert sorted(c['id'] for p in parts for c in p) == sorted(grown)
+    assert min(len(p) for p in parts) > 30  # roughly even
+    assert parse_shard('3/4') == (3, 4)
+    for bad in ('4/4', '-1/2', 'x', '1/0'):
+        with pytest.raises(ValueError):
+            parse_shard(bad)
+
+
+def test_merge_rejects_inconsistent_parts():
+    part = lambda i, n, cid: {'companies': [{'company': {'id': cid}, 'events': []}], '_summary': {'shard': {'index': i, 'count': n}}}
+    with pytest.raises(ValueError):
+        merge_parts([part(0, 2, 'a'), part(0, 2, 'b')])
+    with pytest.raises(ValueError):
+        merge_parts([part(0, 2, 'a'), part(1, 3, 'b')])
+    with pytest.raises(ValueError):
+        merge_parts([part(0, 2, 'a'), part(1, 2, 'a')])
+    assert merge_parts([part(1, 3, 'a')])[2] == [0, 2]
+
+
+def test_shard_processes_merge_into_the_unsharded_result(tmp_path):
+    from benchmarks import synthetic
+    entries = []
+    for i in range(8):
+        page = tmp_path / f'fig{i}.html'
+        page.write_text(synthetic.figcaption_page(i + 1)[0], encoding='utf-8')
+        entries.append(f"- id: fig{i}\n  name: Fig {i}\n  url: https://fig{i}.example.org/\n  strategy: [html]\n"
+                       f"  no_network: true\n  offline_html: {page}\n  html:\n    inline_detail: true\n")
+    reg = tmp_path / 'reg.yaml'
+    reg.write_text(''.join(entries), encoding='utf-8')
+    env = {**os.environ, 'SF_ARCHIVE_DIR': 'off', 'SF_STATE_DIR': str(tmp_path / 'state')}
+    cli = lambda *args: [sys.executable, 'main.py', '--registry', str(reg), '--no-notion', *args]
+    procs = [subprocess.Popen(cli('--shard', f'{i}/3', '--export', str(tmp_path / f'part{i}.json')), cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL) for i in range(3)]
+    procs.append(subprocess.Popen(cli('--export', str(tmp_path / 'full.json')), cwd=ROOT, env=env, stdout=subprocess.DEVNULL))
+    assert [p.wait(timeout=120) for p in procs] == [0, 0, 0, 0]
+    parts = [json.loads((tmp_path / f'part{i}.json').read_text()) for i in range(3)]
+    assert [p['_summary']['shard'] for p in parts] == [{'index': i, 'count': 3} for i in range(3)]
+    subprocess.run(cli('--merge', *[str(tmp_path / f'part{i}.json') for i in range(3)], '--export', str(tmp_path / 'merged.json')),
+                   cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+    merged = json.loads((tmp_path / 'merged.json').read_text())
+    full = json.loads((tmp_path / 'full.json').read_text())
+    assert sorted(c['company']['id'] for c in merged['companies']) == sorted(c['company']['id'] for c in full['companies'])
+    for key in ('total_events', 'shakespeare_events', 'stale_companies', 'stale_severity_counts', 'stale_severity_weighted'):
+        assert merged['_summary'][key] == full['_summary'][key]
+    assert merged['_summary']['total_events'] == sum(range(1, 9))
+    assert [s['companies'] for s in merged['_summary']['shards']] == [len(p['companies']) for p in parts]
+    assert 'missing_shards' not in merged['_summary']
+
+
+def test_merge_state_keeps_other_shards_entries(tmp_path, monkeypatch):
+    import threading
+    from scraper.state import load_state, merge_state
+    monkeypatch.setenv('SF_STATE_DIR', str(tmp_path))
+    merge_state('probes', {'a': {'v': 1}, 'b': {'v': 1}})
+
+    def shard(i):
+        for n in range(20):
+            merge_state('probes', {f's{i}': {'v': n}})
+
+    threads = [threading.Thread(target=shard, args=(i,)) for i in range(4)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+    state = load_state('probes')
+    assert state == {'a': {'v': 1}, 'b': {'v': 1}, **{f's{i}': {'v': 19} for i in range(4)}}
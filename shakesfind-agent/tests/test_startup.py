@@ -0,0 +1,28 @@
+import subprocess, sys, textwrap
+
+from benchmarks.startup import LAZY, importtime, loaded_lazy
+
+
+def test_importing_main_and_api_loads_no_heavy_dependency():
+    assert loaded_lazy(importtime('import main, api')) == []
+
+
+def test_no_notion_run_never_imports_notion_client(tmp_path):
+    from benchmarks import synthetic
+    page = tmp_path / 'fig.html'
+    page.write_text(synthetic.figcaption_page(3)[0], encoding='utf-8')
+    reg = tmp_path / 'reg.yaml'
+    reg.write_text(f"- id: fig\n  name: Fig\n  url: https://fig.example.org/\n  strategy: [html]\n"
+                   f"  no_network: true\n  offline_html: {page}\n  html:\n    inline_detail: true\n", encoding='utf-8')
+    code = textwrap.dedent(f"""
+        import asyncio, os, sys
+        os.environ['SF_ARCHIVE_DIR'] = 'off'
+        os.environ['SF_STATE_DIR'] = {str(tmp_path / 'state')!r}
+        import main
+        rows = asyncio.run(main.scrape_all(registry_path={str(reg)!r}, notion_enabled=False))
+        assert sum(len(c['events']) for c in rows) == 3
+        print(','.join(m for m in {LAZY!r} if m in sys.modules))
+    """)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    loaded = out.strip().splitlines()[-1].split(',')
+    assert 'notion_client' not in loaded and 'httpx' not in loaded and 'requests_cache' not in loaded
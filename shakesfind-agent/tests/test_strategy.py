@@ -0,0 +1,59 @@
+import asyncio, json
+
+from scraper import strategy
+
+
+def test_plan_orders_producers_first_and_skips_known_empty(monkeypatch):
+    monkeypatch.setattr(strategy, 'REPROBE_RUNS', 3)
+    learned = strategy.record(None, {'jsonld': {'events': 0, 'ms': 9.0}, 'html': {'events': 4, 'ms': 2.0}}, 'html')
+    assert strategy.plan(['jsonld', 'html'], learned) == (['html', 'jsonld'], [], [])
+    for _ in range(2):
+        strategy.record(learned, {'jsonld': {'events': 0, 'ms': 9.0}}, None)
+    assert learned['stats']['jsonld']['empty_streak'] == 3
+    assert strategy.plan(['jsonld', 'html'], learned) == (['html'], [], ['jsonld'])
+    for _ in range(3):
+        strategy.record(learned, {'html': {'events': 4, 'ms': 2.0}}, 'html')
+    assert strategy.plan(['jsonld', 'html'], learned) == (['html', 'jsonld'], ['jsonld'], [])  # re-probe due
+    assert strategy.plan(['jsonld', 'html'], None) == (['jsonld', 'html'], [], [])
+
+
+def test_scrape_learns_order_and_reprobes(tmp_path, monkeypatch):
+    import main
+    from benchmarks import synthetic
+    monkeypatch.setenv('SF_ARCHIVE_DIR', 'off')
+    monkeypatch.setenv('SF_STATE_DIR', str(tmp_path / 'state'))
+    monkeypatch.setattr(strategy, 'REPROBE_RUNS', 3)
+    page = tmp_path / 'fig.html'
+    page.write_text(synthetic.figcaption_page(4)[0], encoding='utf-8')
+    reg = tmp_path / 'reg.yaml'
+    reg.write_text(f"- id: fig\n  name: Fig\n  url: https://fig.example.org/\n"
+                   f"  no_network: true\n  offline_html: {page}\n  html:\n    inline_detail: true\n", encoding='utf-8')
+    seen = []
+    for _ in range(5):
+        out = asyncio.run(main.scrape_all(registry_path=str(reg), notion_enabled=False))
+        assert len(out[0]['events']) == 4
+        seen.append(out[0]['meta']['strategy'])
+    assert list(seen[0]['tried']) == ['jsonld', 'html'] and seen[0]['winner'] == 'html'
+    assert seen[1]['order'] == ['html', 'jsonld'] and list(seen[1]['tried']) == ['html']  # JSON-LD no longer parsed
+    assert list(seen[3]['tried']) == ['html']
+    assert list(seen[4]['tried']) == ['html', 'jsonld']  # untried for 3 runs: re-probed
+    state = json.loads((tmp_path / 'state' / 'strategies.json').read_text())
+    assert state['fig']['winner'] == 'html' and state['fig']['runs'] == 5
+
+
+def test_one_off_runs_do_not_write_learned_state(tmp_path, monkeypatch):
+    import main
+    from benchmarks import synthetic
+    monkeypatch.setenv('SF_ARCHIVE_DIR', 'off')
+    monkeypatch.setenv('SF_STATE_DIR', str(tmp_path / 'state'))
+    page = tmp_path / 'fig.html'
+    page.write_text(synthetic.figcaption_page(2)[0], encoding='utf-8')
+    reg = tmp_path / 'reg.yaml'
+    reg.write_text(f"- id: fig\n  name: Fig\n  url: https://fig.example.org/\n"
+                   f"  no_network: true\n  offline_html: {page}\n  html:\n    inline_detail: true\n", encoding='utf-8')
+    out = asyncio.run(main.scrape_all(registry_path=str(reg), notion_enabled=False, only_ids=['fig'], learn=False))
+    assert out[0]['meta']['strategy']['winner'] == 'html'
+    asyncio.run(main.scrape_all(registry_path=str(reg), notion_enabled=False, replay=True))
+    assert not (tmp_path / 'state' / 'strategies.json').exists()
+    asyncio.run(main.scrape_all(registry_path=str(reg), notion_enabled=False))
+    assert json.loads((tmp_path / 'state' / 'strategies.json').read_text())['fig']['runs'] == 1
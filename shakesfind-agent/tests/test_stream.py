@@ -0,0 +1,58 @@
+import asyncio
+import httpx
+import pytest
+
+from scraper.stream import ListContainerTracker, read_capped, BodyRejected
+
+PAGE = (
+    "<html><body><header><p>nav</header>"
+    "<section class='shows'><div class='show-card'><h3>Hamlet</h3></div>"
+    "<div class='show-card'><h3>Macbeth</h3><img src='x.png'></div></section>"
+    "<footer>" + "x" * 5000 + "</footer></body></html>"
+)
+
+
+def _read(body: bytes, headers=None, **kw):
+    async def chunks():
+        for i in range(0, len(body), 64):
+            yield body[i:i + 64]
+
+    async def go():
+        transport = httpx.MockTransport(lambda req: httpx.Response(200, headers=headers or {'content-type': 'text/html; charset=utf-8'}, content=chunks()))
+        async with httpx.AsyncClient(transport=transport) as client:
+            async with client.stream('GET', 'https://example.org/') as resp:
+                info = {}
+                text = await read_capped(resp, info, **kw)
+                return text, info
+    return asyncio.run(go())
+
+
+def test_tracker_descendant_selector_stops_after_container():
+    t = ListContainerTracker('section.shows .show-card')
+    assert t.enabled
+    idx = PAGE.index('</section>') + len('</section>')
+    assert not t.push(PAGE[:idx - 3])
+    assert t.push(PAGE[idx - 3:idx + 10])
+
+
+def test_tracker_single_compound_uses_parent_and_unsupported_disables():
+    t = ListContainerTracker('.show-card')
+    assert t.push(PAGE)
+    assert not ListContainerTracker('.a, .b').enabled
+    assert not ListContainerTracker('p:contains("June")').enabled
+
+
+def test_read_capped_flags_oversize():
+    text, info = _read(PAGE.encode('utf-8'), max_bytes=100)
+    assert info['oversize'] and info['bytes'] == 100 and len(text) == 100
+
+
+def test_read_capped_stops_early_and_decodes_multibyte():
+    body = PAGE.replace('Hamlet', 'Hamlet – Prince').encode('utf-8')
+    text, info = _read(body, stop_after='section.shows .show-card')
+    assert info.get('stopped_early') and 'Hamlet – Prince' in text and len(text) < len(PAGE)
+
+
+def test_read_capped_rejects_content_type():
+    with pytest.raises(BodyRejected):
+        _read(b'%PDF-1.4', headers={'content-type': 'application/pdf'})
@@ -1,10 +1,29 @@
-import json, pathlib, datetime as dt
+import hashlib, json, os, pathlib, re, uuid, datetime as dt
 
 try:
     import yaml  # type: ignore
 except Exception:  # pragma: no cover
     yaml = None
 
+from scraper.changes import IGNORED_FIELDS
+
+# Every file is written to a temp file in the target directory and renamed
+# over the destination, so a crash never leaves a truncated export.
+#
+# Partitioned layout (export_partitioned):
+#   <dir>/manifest.json                      format, _meta, _summary, partitions [{id, path, sha1, events, written_at}]
+#   <dir>/companies/<id>.<sha1[:8]>.<ext>    one company entry {company, events, meta}
+# Partition files are content-addressed by the hash of the company stub and
+# its rows (fetch stamps ignored): an unchanged company keeps its file and
+# costs no write, a changed one gets a new file. The manifest is replaced
+# last; files are only removed once neither it nor the manifest it replaced
+# references them, so a reader holding either manifest sees a complete
+# snapshot. A partition's meta is from the run that last wrote it; the
+# manifest's _summary is always current.
+
+MANIFEST = 'manifest.json'
+PARTITION_DIR = 'companies'
+
 
 def _ensure_dir(path: str):
     p = pathlib.Path(path).expanduser().resolve()
@@ -12,25 +31,128 @@ def _ensure_dir(path: str):
         p.parent.mkdir(parents=True, exist_ok=True)
     return p
 
+
+def _atomic_write(p: pathlib.Path, write):
+    """Call write(file) on a temp file next to p, then rename it over p."""
+    tmp = p.with_name(f'.{p.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp')  # umask permissions, unlike mkstemp
+    try:
+        with open(tmp, 'x', encoding='utf-8') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, p)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _dump(data, f, fmt: str, pretty: bool):
+    if fmt == "yaml":
+        yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True)
+    elif pretty:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+
+
+def _check_format(fmt: str) -> str:
+    fmt = fmt.lower()
+    if fmt == "yaml" and yaml is None:
+        raise RuntimeError("PyYAML not installed; cannot export yaml")
+    return fmt
+
+
+def _export_meta(companies) -> dict:
+    return {
+        "generated_at_utc": dt.datetime.utcnow().isoformat(),
+        "record_count": sum(len(c.get("events", [])) for c in companies),
+        "shakespeare_events": sum(sum(1 for e in c.get('events', []) if e.get('is_shakespeare')) for c in companies)
+    }
+
+
 def export_data(data: dict, path: str, fmt: str = "json", pretty: bool = False):
     p = _ensure_dir(path)
-    stamp = dt.datetime.utcnow().isoformat()
     data.setdefault("_meta", {})
-    data["_meta"].update({
-        "generated_at_utc": stamp,
-        "record_count": sum(len(c.get("events", [])) for c in data.get("companies", [])),
-        "shakespeare_events": sum(sum(1 for e in c.get('events', []) if e.get('is_shakespeare')) for c in data.get('companies', []))
-    })
-    fmt = fmt.lower()
-    if fmt == "yaml":
-        if yaml is None:
-            raise RuntimeError("PyYAML not installed; cannot export yaml")
-        with p.open("w", encoding="utf-8") as f:
-            yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True)
-    else:
-        with p.open("w", encoding="utf-8") as f:
-            if pretty:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            else:
-                json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+    data["_meta"].update(_export_meta(data.get("companies", [])))
+    fmt = _check_format(fmt)
+    _atomic_write(p, lambda f: _dump(data, f, fmt, pretty))
     return str(p)
+
+
+def partition_hash(entry: dict) -> str:
+    """sha1 of a company stub and its rows, ignoring fetch stamps."""
+    rows = [{k: v for k, v in r.items() if k not in IGNORED_FIELDS} for r in entry.get('events', [])]
+    blob = json.dumps({'company': entry.get('company'), 'events': rows}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()
+
+
+def _partition_name(cid: str, digest: str, ext: str) -> str:
+    safe = re.sub(r'[^A-Za-z0-9_-]', '_', str(cid))[:80]
+    if safe != str(cid):
+        safe += '-' + hashlib.sha1(str(cid).encode('utf-8')).hexdigest()[:6]  # keep sanitized ids distinct
+    return f"{PARTITION_DIR}/{safe}.{digest[:8]}.{ext}"
+
+
+def _load_manifest(p: pathlib.Path):
+    try:
+        return json.loads(p.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def export_partitioned(data: dict, directory: str, fmt: str = "json", pretty: bool = False) -> dict:
+    """Write {companies, _summary} as one file per company plus a manifest; returns write counts."""
+    fmt = _check_format(fmt)
+    root = pathlib.Path(directory).expanduser().resolve()
+    (root / PARTITION_DIR).mkdir(parents=True, exist_ok=True)
+    manifest_path = root / MANIFEST
+    previous = _load_manifest(manifest_path) or {}
+    known = {(p['path'], p['sha1']) for p in previous.get('partitions', [])} if previous.get('format') == fmt else set()
+    ext = 'yaml' if fmt == 'yaml' else 'json'
+    companies = data.get('companies', [])
+    now = dt.datetime.utcnow().isoformat()
+    old_written = {p['path']: p.get('written_at') for p in previous.get('partitions', [])}
+    partitions, written = [], 0
+    for entry in companies:
+        digest = partition_hash(entry)
+        rel = _partition_name(entry['company']['id'], digest, ext)
+        target = root / rel
+        if (rel, digest) not in known or not target.exists():
+            _atomic_write(target, lambda f, entry=entry: _dump(entry, f, fmt, pretty))
+            written += 1
+            written_at = now
+        else:
+            written_at = old_written.get(rel) or now
+        partitions.append({'id': entry['company']['id'], 'path': rel, 'sha1': digest,
+                           'events': len(entry.get('events', [])), 'written_at': written_at})
+    manifest = {
+        'format': fmt,
+        '_meta': {**_export_meta(companies), 'partitions': len(partitions), 'written': written},
+        '_summary': data.get('_summary'),
+        'partitions': partitions,
+    }
+    _atomic_write(manifest_path, lambda f: json.dump(manifest, f, indent=2 if pretty else None, ensure_ascii=False))
+    # keep one generation back: a reader may still hold the previous manifest
+    keep = {p['path'] for p in partitions} | {p['path'] for p in previous.get('partitions', [])}
+    removed = 0
+    for stale in (root / PARTITION_DIR).iterdir():
+        rel = f"{PARTITION_DIR}/{stale.name}"
+        if rel not in keep and not stale.name.startswith('.'):
+            stale.unlink(missing_ok=True)
+            removed += 1
+    return {'manifest': str(manifest_path), 'partitions': len(partitions), 'written': written,
+            'unchanged': len(partitions) - written, 'removed': removed}
+
+
+def load_partitioned(directory: str) -> dict:
+    """Read a partitioned export back as {companies, _summary, _meta}."""
+    root = pathlib.Path(directory).expanduser()
+    manifest = json.loads((root / MANIFEST).read_text(encoding='utf-8'))
+    companies = []
+    for part in manifest['partitions']:
+        text = (root / part['path']).read_text(encoding='utf-8')
+        companies.append(yaml.safe_load(text) if manifest.get('format') == 'yaml' else json.loads(text))
+    return {'companies': companies, '_summary': manifest.get('_summary'), '_meta': manifest.get('_meta')}